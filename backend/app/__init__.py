@@ -1,17 +1,39 @@
-from flask import Flask, send_from_directory
+from flask import Flask, Response, g, request, send_from_directory
 from flask_cors import CORS
+from werkzeug.exceptions import NotFound
+from werkzeug.utils import safe_join
+from utils.request_context import bind_request_context, extract_user_id, reset_request_context
+from utils.tracing import finish_trace, reset_trace_context, start_trace
+from utils.deadline import bind_deadline, request_budget, reset_deadline
+from utils.logger import configure_logging, get_logger
+import mimetypes
 import os
+import posixpath
+
+# 생성 이미지 폴더 (파일명에 timestamp+uuid 포함 → 한 번 저장되면 바뀌지 않음)
+IMMUTABLE_STATIC_PREFIXES = ('webtoon_images/', 'character_images/')
+STATIC_IMMUTABLE_MAX_AGE = 31536000  # 1년
+
+logger = get_logger(__name__)
 
 def create_app():
+    # 로그 설정 (레벨 / JSON 출력 / 백그라운드 큐) - 라우트 모듈 임포트 전에
+    configure_logging()
+    
     # Flask 앱 생성 (static 폴더 절대 경로로 설정)
     current_dir = os.path.dirname(os.path.abspath(__file__))
     static_folder = os.path.join(os.path.dirname(current_dir), 'static')
     
-    app = Flask(__name__, 
-                static_folder=static_folder,  # 절대 경로 사용
-                static_url_path='/static')    # URL 경로 명시
+    # static 파일은 아래 serve_static_files 에서 직접 서빙 (캐시 헤더 / 프록시 오프로드)
+    app = Flask(__name__, static_folder=None)
     
     CORS(app)  # CORS 설정
+    
+    # 파일 전송 오프로드: '' (Flask가 직접 전송) / 'x-sendfile' (Apache, lighttpd) / 'x-accel' (nginx)
+    static_offload = os.environ.get('STATIC_OFFLOAD', '').lower()
+    static_x_accel_prefix = os.environ.get('STATIC_X_ACCEL_PREFIX', '/protected-static').rstrip('/')
+    if static_offload == 'x-sendfile':
+        app.config['USE_X_SENDFILE'] = True
 
     # 모든 라우트 등록
     from app.routes.character_route import character_bp
@@ -19,12 +41,65 @@ def create_app():
     from app.routes.image_route import image_bp
     from app.routes.diary_route import diary_bp
     from app.routes.summarizer_route import summarizer_bp
+    from app.routes.metrics_route import metrics_bp
 
     app.register_blueprint(character_bp)
     app.register_blueprint(gpt_bp)
     app.register_blueprint(image_bp)
     app.register_blueprint(diary_bp)
     app.register_blueprint(summarizer_bp)
+    app.register_blueprint(metrics_bp)
+    
+    # 요청 컨텍스트 (LLM 사용량을 라우트 / 사용자별로 집계하기 위해)
+    @app.before_request
+    def bind_usage_context():
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        g.request_context_tokens = bind_request_context(route, extract_user_id(request))
+        g.trace = start_trace(route, request.method)
+        # 요청 시간 예산 (LLM / 이미지 호출은 남은 시간만큼만 기다림)
+        g.deadline_token = bind_deadline(request_budget(route, request.headers))
+    
+    # 요청 트레이스 종료 (요청 지연 히스토그램 + 단계별 소요 시간 헤더)
+    @app.after_request
+    def finish_request_trace(response):
+        started = g.pop('trace', None)
+        if started is not None:
+            trace, token = started
+            response.headers['X-Trace-Id'] = trace.trace_id
+            if response.is_streamed:
+                # SSE 등 스트리밍 응답은 본문(백그라운드 파이프라인)이 이 시점 이후에 만들어지므로
+                # 전송이 끝날 때 기록 (그 사이 span 도 같은 트레이스에 쌓임)
+                reset_trace_context(token)
+                status = response.status_code
+                response.call_on_close(lambda: finish_trace(trace, None, status))
+                return response
+            server_timing = trace.server_timing()
+            if server_timing:
+                response.headers['Server-Timing'] = server_timing
+            finish_trace(trace, token, response.status_code)
+        return response
+    
+    @app.teardown_request
+    def reset_usage_context(exc):
+        # after_request 까지 가지 못한 요청(처리되지 않은 예외)도 트레이스는 닫음
+        started = g.pop('trace', None)
+        if started is not None:
+            finish_trace(*started, 500)
+        deadline_token = g.pop('deadline_token', None)
+        if deadline_token is not None:
+            reset_deadline(deadline_token)
+        tokens = g.pop('request_context_tokens', None)
+        if tokens is not None:
+            reset_request_context(tokens)
+    
+    # 빠른 시작 모드: 작업 큐 워커 등 부가 초기화를 첫 사용 시점으로 미룸
+    fast_startup = os.environ.get('FAST_STARTUP', 'false').lower() == 'true'
+    
+    # 웹툰 생성 작업 큐 워커 시작 (재시작 전 미완료 작업 재개)
+    job_autostart_default = 'false' if fast_startup else 'true'
+    if os.environ.get('WEBTOON_JOB_AUTOSTART', job_autostart_default).lower() == 'true':
+        from app.routes.diary_route import get_webtoon_job_queue
+        get_webtoon_job_queue()
     
     # Static 폴더 생성 (없으면)
     WEBTOON_IMAGES_FOLDER = os.path.join(static_folder, 'webtoon_images')
@@ -32,44 +107,55 @@ def create_app():
 
     if not os.path.exists(static_folder):
         os.makedirs(static_folder)
-        print(f"📁 Static 폴더 생성: {static_folder}")
+        logger.info("📁 Static 폴더 생성: %s", static_folder)
 
     if not os.path.exists(WEBTOON_IMAGES_FOLDER):
         os.makedirs(WEBTOON_IMAGES_FOLDER)
-        print(f"📁 웹툰 이미지 폴더 생성: {WEBTOON_IMAGES_FOLDER}")
+        logger.info("📁 웹툰 이미지 폴더 생성: %s", WEBTOON_IMAGES_FOLDER)
         
     if not os.path.exists(CHARACTER_IMAGES_FOLDER):
         os.makedirs(CHARACTER_IMAGES_FOLDER)
-        print(f"📁 캐릭터 이미지 폴더 생성: {CHARACTER_IMAGES_FOLDER}")
+        logger.info("📁 캐릭터 이미지 폴더 생성: %s", CHARACTER_IMAGES_FOLDER)
 
-    # 중복된 static 라우트 제거하고 하나만 사용
+    # 중복된 static 라우트 제거하고 하나만 사용 (Flask 기본 static 라우트는 끔)
     @app.route('/static/<path:filename>')
     def serve_static_files(filename):
-        """모든 static 파일 서빙 (통합)"""
-        try:
-            print(f"🔍 Static 파일 요청: {filename}")
-            print(f"📁 Static 폴더: {static_folder}")
-            
-            file_path = os.path.join(static_folder, filename)
-            print(f"📍 찾는 파일: {file_path}")
-            print(f"📄 파일 존재: {os.path.exists(file_path)}")
-            
-            if os.path.exists(file_path):
-                return send_from_directory(static_folder, filename)
-            else:
-                print(f"❌ 파일 없음: {file_path}")
+        """
+        모든 static 파일 서빙 (통합)
+        
+        - ETag / Last-Modified 기반 조건부 GET(304)과 Range 요청(206) 지원
+        - 생성 이미지는 파일명에 timestamp+uuid가 들어가 내용이 바뀌지 않으므로 immutable 캐시
+        - STATIC_OFFLOAD 설정 시 실제 파일 전송은 앞단 프록시에 맡김
+        - 숨김 경로(.blobs 이미지 저장소, .download_ / .link_ 임시 파일)는 서빙하지 않음
+        """
+        if any(part.startswith('.') for part in posixpath.normpath(filename).split('/')):
+            return "File not found", 404
+        
+        immutable = filename.startswith(IMMUTABLE_STATIC_PREFIXES)
+        
+        if static_offload == 'x-accel':
+            # nginx internal location 으로 넘김 (경로 탈출만 막고 존재 확인은 nginx가 처리)
+            if safe_join(static_folder, filename) is None:
+                return "File not found", 404
+            response = Response(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+            response.headers['X-Accel-Redirect'] = f"{static_x_accel_prefix}/{filename}"
+        else:
+            try:
+                response = send_from_directory(
+                    static_folder, filename,
+                    conditional=True,
+                    etag=True,
+                    max_age=STATIC_IMMUTABLE_MAX_AGE if immutable else None
+                )
+            except NotFound:
                 return "File not found", 404
-                
-        except Exception as e:
-            print(f"❌ Static 파일 서빙 오류: {e}")
-            return f"Static file error: {str(e)}", 500
+        
+        if immutable:
+            response.headers['Cache-Control'] = f"public, max-age={STATIC_IMMUTABLE_MAX_AGE}, immutable"
+        return response
 
-    print("✅ Flask 앱 생성 완료")
-    print("🔥 Firebase + 로컬 이미지 저장 시스템 활성화")
-    print("📋 요약 서비스 활성화")
-    print(f"📁 Static 폴더 절대 경로: {static_folder}")
-    print("📍 등록된 라우트:")
-    for rule in app.url_map.iter_rules():
-        print(f"  {rule}")
+    logger.info("✅ Flask 앱 생성 완료 (static: %s)", static_folder)
+    if os.environ.get('LOG_ROUTES', 'false').lower() == 'true':
+        logger.info("📍 등록된 라우트: %s", ", ".join(str(rule) for rule in app.url_map.iter_rules()))
 
     return app
\ No newline at end of file
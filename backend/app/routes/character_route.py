@@ -1,46 +1,69 @@
 from flask import Blueprint, request, jsonify, send_from_directory
-from openai import OpenAI
 import os
-import json
-import requests
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
-from config.firebase_config import db  # Firebase 연동
+from config.firebase_config import get_db  # Firebase 연동 (첫 사용 시 초기화)
+from utils.image_downloader import download_image
+from utils.image_derivatives import create_image_variants
+from app.services.image_generation_cache import generate_image_with_cache
+from app.services.character_store import get_character_store
+from utils.cache import TTLCache
+from utils.rate_limiter import AdmissionRejected
+from utils.request_context import run_in_context
+from utils.deadline import DeadlineExceeded
+from utils.single_flight import SingleFlight, make_flight_key
+from utils.tracing import span
+from utils.logger import get_logger
 
 load_dotenv()
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
 
 character_bp = Blueprint("character", __name__)
+logger = get_logger(__name__)
 
-# 캐릭터 이미지 저장 설정
+# 캐릭터 이미지 저장 설정 (폴더는 저장 시점에 생성)
 CHARACTER_IMAGES_FOLDER = os.path.join('static', 'character_images')
-if not os.path.exists(CHARACTER_IMAGES_FOLDER):
-    os.makedirs(CHARACTER_IMAGES_FOLDER)
-    print(f"📁 캐릭터 이미지 저장 폴더 생성: {CHARACTER_IMAGES_FOLDER}")
+
+# 감정 세트 동시 생성 수 (DALL-E 동시 호출 상한)
+EMOTION_GENERATION_MAX_CONCURRENCY = int(os.environ.get("EMOTION_GENERATION_MAX_CONCURRENCY", 6))
+
+# 캐릭터 조회 캐시 (Firestore 조회 결과, 저장 시 무효화)
+CHARACTER_CACHE_TTL = float(os.environ.get("CHARACTER_CACHE_TTL", 300))
+CHARACTER_CACHE_MAX_SIZE = int(os.environ.get("CHARACTER_CACHE_MAX_SIZE", 2048))
+character_cache = TTLCache(max_size=CHARACTER_CACHE_MAX_SIZE, ttl=CHARACTER_CACHE_TTL, name="character")
+
+# 실행 중인 같은 감정 세트 생성 요청 합치기 (중복 제출 / 생성 중 새로고침)
+emotion_set_flight = SingleFlight("generate_character_emotions")
+
+# 🔑 예전 방식: 각 감정별 강화된 표정 설명
+EMOTION_EXPRESSIONS = {
+    "기쁨": "bright genuine smile, sparkling happy eyes, cheerful expression, joyful energy",
+    "슬픔": "sad downcast expression, melancholic eyes, gentle frown, sorrowful mood",
+    "분노": "angry furrowed brow, intense eyes, stern mouth, frustrated expression",
+    "불안": "worried anxious eyes, nervous expression, concerned look, uneasy feeling",
+    "평온": "calm peaceful expression, serene eyes, gentle smile, relaxed demeanor",
+    "중립": "neutral natural expression, relaxed face, comfortable look, natural pose"
+}
 
 def save_character_image_to_local(dalle_url, character_id, emotion="default"):
     """캐릭터 이미지를 로컬에 저장"""
     try:
-        print(f"💾 캐릭터 이미지 저장: {emotion}")
-        
-        response = requests.get(dalle_url, timeout=60)
-        response.raise_for_status()
+        logger.debug("💾 캐릭터 이미지 저장: %s", emotion)
         
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = f"character_{character_id}_{emotion}_{timestamp}_{uuid.uuid4().hex[:8]}.png"
-        filepath = os.path.join(CHARACTER_IMAGES_FOLDER, filename)
         
-        with open(filepath, 'wb') as f:
-            f.write(response.content)
+        os.makedirs(CHARACTER_IMAGES_FOLDER, exist_ok=True)
+        download_image(dalle_url, CHARACTER_IMAGES_FOLDER, filename)
         
         local_url = f"/static/character_images/{filename}"
-        print(f"✅ 캐릭터 이미지 저장 완료: {local_url}")
+        logger.info("✅ 캐릭터 이미지 저장 완료: %s", local_url)
         
         return local_url
         
     except Exception as e:
-        print(f"❌ 캐릭터 이미지 저장 실패: {e}")
+        logger.error("❌ 캐릭터 이미지 저장 실패: %s", e)
         return None
 
 @character_bp.route("/api/generate_character", methods=["POST"])
@@ -48,7 +71,7 @@ def generate_character():
     """사용자 맞춤형 캐릭터 생성 + 로컬 저장 - 예전 방식 강화 🔑"""
     try:
         data = request.get_json()
-        print(f"🎭 캐릭터 생성 요청 데이터: {data}")
+        logger.debug("🎭 캐릭터 생성 요청", extra={"data": data})
         
         prompt = data.get("prompt", "")
         emotion = data.get("emotion", "중립")
@@ -56,6 +79,7 @@ def generate_character():
         user_id = data.get("userId", "anonymous")
         save_locally = data.get("save_locally", True)
         method = data.get("method", "description")  # 🔄 예전 방식: 생성 방법 추가
+        bypass_cache = bool(data.get("bypass_cache", False))  # 같은 프롬프트라도 새 이미지 생성
         
         if not prompt:
             return jsonify({"error": "프롬프트가 없습니다."}), 400
@@ -92,34 +116,38 @@ def generate_character():
         CONSISTENCY IS THE MOST IMPORTANT FACTOR.
         """
         
-        print(f"🎨 강화된 DALL-E 프롬프트 (처음 200자): {enhanced_prompt[:200]}...")
+        logger.debug("🎨 강화된 DALL-E 프롬프트", extra={"data": {"prompt": enhanced_prompt}})
         
-        # DALL-E 이미지 생성
-        response = client.images.generate(
-            model="dall-e-3",
-            prompt=enhanced_prompt,
+        character_id = f"{user_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        
+        # DALL-E 이미지 생성 + 로컬 저장 (같은 프롬프트로 저장한 이미지가 있으면 재사용)
+        image = generate_image_with_cache(
+            enhanced_prompt,
             size="1024x1024",
             quality="standard",
-            n=1,
+            save_local=(lambda url: save_character_image_to_local(url, character_id, emotion)) if save_locally else None,
+            bypass_cache=bypass_cache
         )
         
-        dalle_temp_url = response.data[0].url
-        print(f"✅ DALL-E 임시 URL 생성: {dalle_temp_url[:50]}...")
+        dalle_temp_url = image["dalle_url"]
+        if not image["cached"]:
+            logger.debug("✅ DALL-E 임시 URL 생성: %.50s", dalle_temp_url)
         
         # 로컬 저장 처리
         final_image_url = dalle_temp_url  # 기본값
         image_saved_locally = False
-        character_id = f"{user_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        image_variants = None
         
         if save_locally:
-            local_url = save_character_image_to_local(dalle_temp_url, character_id, emotion)
+            local_url = image["local_url"]
             
             if local_url:
                 final_image_url = local_url
                 image_saved_locally = True
-                print("🎉 캐릭터 이미지 로컬 저장 완료!")
+                image_variants = create_image_variants(local_url)
+                logger.debug("🎉 캐릭터 이미지 로컬 저장 완료")
             else:
-                print("⚠️ 로컬 저장 실패, DALL-E URL 사용")
+                logger.warning("⚠️ 로컬 저장 실패, DALL-E URL 사용")
         
         # 🔄 예전 방식: 응답 데이터 구조 개선
         result = {
@@ -129,42 +157,119 @@ def generate_character():
             "dalle_temp_url": dalle_temp_url,
             "local_url": final_image_url if image_saved_locally else None,
             "image_saved_locally": image_saved_locally,
+            "image_cached": image["cached"],
+            "image_variants": image_variants,  # 폭별 WebP URL + 블러 플레이스홀더
             "character_id": character_id,
             "method": method,  # 🔄 예전 방식: 생성 방법
             "enhanced_prompt": enhanced_prompt,  # 프롬프트 저장 (디버깅용)
             "created_at": datetime.now().isoformat()
         }
         
-        print(f"✅ 캐릭터 생성 완료 (로컬 저장: {image_saved_locally})")
+        logger.info("✅ 캐릭터 생성 완료 (로컬 저장: %s)", image_saved_locally)
         return jsonify(result)
         
+    except AdmissionRejected as e:
+        return jsonify({"error": str(e), "retry_after": e.retry_after}), 429, {"Retry-After": str(e.retry_after)}
     except Exception as e:
-        print(f"❌ 캐릭터 생성 에러: {type(e).__name__}: {str(e)}")
+        logger.error("❌ 캐릭터 생성 에러: %s: %s", type(e).__name__, e)
         return jsonify({"error": str(e)}), 500
 
+def generate_emotion_image(emotion, emotion_index, total_emotions, base_character_prompt, character_id,
+                           bypass_cache=False):
+    """감정 1개에 대한 캐릭터 이미지 생성 + 로컬 저장 (워커 스레드에서 실행)"""
+    emotion_detail = EMOTION_EXPRESSIONS.get(emotion, "natural expression")
+    
+    emotion_prompt = f"""
+    {base_character_prompt}
+    
+    EMOTION TO EXPRESS: {emotion}
+    FACIAL EXPRESSION: {emotion_detail}
+    
+    SPECIFIC REQUIREMENTS:
+    - Show {emotion} emotion in face ONLY
+    - Keep EVERYTHING else identical (hair, clothes, body, style)
+    - Consistent with other emotions in this character series
+    - Natural and authentic {emotion} expression
+    - Professional webtoon quality
+    
+    Remember: This is emotion #{emotion_index + 1} of {total_emotions} in a consistent character series.
+    """
+    
+    logger.debug("🎨 %s 표정 생성 중 (%s)", emotion, emotion_detail)
+    
+    image = generate_image_with_cache(
+        emotion_prompt,
+        size="1024x1024",
+        quality="standard",
+        save_local=lambda url: save_character_image_to_local(url, character_id, emotion),
+        bypass_cache=bypass_cache
+    )
+    
+    dalle_url = image["dalle_url"]
+    local_url = image["local_url"]
+    variants = create_image_variants(local_url)
+    
+    # 🔄 예전 방식: 생성 세부사항 저장
+    detail = {
+        "dalle_url": dalle_url,
+        "local_url": local_url,
+        "prompt_used": emotion_prompt[:100] + "...",  # 프롬프트 일부만 저장
+        "generated_at": datetime.now().isoformat(),
+        "cached": image["cached"],
+        "success": True
+    }
+    
+    return dalle_url, local_url, variants, detail
+
 @character_bp.route("/api/generate_character_emotions", methods=["POST"])
 def generate_character_emotions():
-    """모든 감정별 캐릭터 이미지 생성 - 예전 방식 강화 🔑"""
+    """
+    모든 감정별 캐릭터 이미지 생성 - 예전 방식 강화 🔑
+    
+    같은 사용자의 같은 요청이 이미 실행 중이면 새로 생성하지 않고 그 결과를 함께 받음 (X-Coalesced 헤더)
+    """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "요청 본문은 JSON 객체여야 합니다."}), 400
+    
+    try:
+        (payload, status, headers), shared = emotion_set_flight.do(
+            make_flight_key(data.get("userId", "anonymous"), data),
+            lambda: _generate_character_emotions(data)
+        )
+    except DeadlineExceeded as e:
+        return jsonify({"error": str(e)}), 504
+    
+    response = jsonify(payload)
+    response.status_code = status
+    response.headers.update(headers)
+    if shared:
+        response.headers["X-Coalesced"] = "true"
+    return response
+
+def _generate_character_emotions(data):
+    """감정 세트 생성 본체 - (응답 본문, 상태 코드, 헤더) 반환 (합쳐진 요청들이 같은 값을 공유)"""
     try:
-        data = request.get_json()
         base_prompt = data.get("prompt", "")
         user_id = data.get("userId", "anonymous")
         character_description = data.get("character_description", "")
         method = data.get("method", "description")  # 🔄 예전 방식
+        bypass_cache = bool(data.get("bypass_cache", False))
         
         if not base_prompt:
-            return jsonify({"error": "프롬프트가 없습니다."}), 400
+            return {"error": "프롬프트가 없습니다."}, 400, {}
         
         emotions = ["기쁨", "슬픔", "분노", "불안", "평온", "중립"]
         character_id = f"{user_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
         emotion_images = {}
+        emotion_image_variants = {}
         generated_count = 0
         generation_details = {}  # 🔄 예전 방식: 생성 세부사항 추적
+        retry_after = None  # 허용량 초과로 거절된 감정이 있으면 가장 긴 재시도 대기 (초)
         
-        print(f"🎭 {len(emotions)}가지 감정 캐릭터 생성 시작...")
-        print(f"📋 기본 설명: {character_description}")
-        print(f"🔧 생성 방법: {method}")
+        logger.info("🎭 %d가지 감정 캐릭터 생성 시작", len(emotions),
+                    extra={"data": {"description": character_description, "method": method}})
         
         # 🔑 예전 방식: 기본 캐릭터 특성 추출 및 강화
         base_character_prompt = f"""
@@ -186,79 +291,65 @@ def generate_character_emotions():
         CRITICAL: This is a character series - CONSISTENCY IS ESSENTIAL
         """
         
-        for emotion in emotions:
-            try:
-                # 🔑 예전 방식: 각 감정별 강화된 프롬프트
-                emotion_expressions = {
-                    "기쁨": "bright genuine smile, sparkling happy eyes, cheerful expression, joyful energy",
-                    "슬픔": "sad downcast expression, melancholic eyes, gentle frown, sorrowful mood",
-                    "분노": "angry furrowed brow, intense eyes, stern mouth, frustrated expression",
-                    "불안": "worried anxious eyes, nervous expression, concerned look, uneasy feeling",
-                    "평온": "calm peaceful expression, serene eyes, gentle smile, relaxed demeanor",
-                    "중립": "neutral natural expression, relaxed face, comfortable look, natural pose"
-                }
-                
-                emotion_detail = emotion_expressions.get(emotion, "natural expression")
-                
-                emotion_prompt = f"""
-                {base_character_prompt}
-                
-                EMOTION TO EXPRESS: {emotion}
-                FACIAL EXPRESSION: {emotion_detail}
-                
-                SPECIFIC REQUIREMENTS:
-                - Show {emotion} emotion in face ONLY
-                - Keep EVERYTHING else identical (hair, clothes, body, style)
-                - Consistent with other emotions in this character series
-                - Natural and authentic {emotion} expression
-                - Professional webtoon quality
-                
-                Remember: This is emotion #{emotions.index(emotion) + 1} of {len(emotions)} in a consistent character series.
-                """
-                
-                print(f"  🎨 {emotion} 표정 생성 중...")
-                print(f"     감정 표현: {emotion_detail}")
-                
-                response = client.images.generate(
-                    model="dall-e-3",
-                    prompt=emotion_prompt,
-                    size="1024x1024",
-                    quality="standard",
-                    n=1,
+        # 🔑 감정별 생성을 동시에 실행 (전체 시간 ≈ 가장 느린 1장)
+        max_workers = max(1, min(EMOTION_GENERATION_MAX_CONCURRENCY, len(emotions)))
+        logger.debug("⚡ 동시 생성 수: %d", max_workers)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                emotion: executor.submit(
+                    run_in_context(generate_emotion_image),
+                    emotion,
+                    index,
+                    len(emotions),
+                    base_character_prompt,
+                    character_id,
+                    bypass_cache
                 )
-                
-                dalle_url = response.data[0].url
-                local_url = save_character_image_to_local(dalle_url, character_id, emotion)
-                
-                if local_url:
-                    emotion_images[emotion] = local_url
-                    generated_count += 1
-                    print(f"  ✅ {emotion} 표정 완료 - 로컬 저장 성공")
-                else:
-                    emotion_images[emotion] = dalle_url  # 로컬 저장 실패시 DALL-E URL
-                    print(f"  ⚠️ {emotion} 표정 완료 - 로컬 저장 실패, DALL-E URL 사용")
-                
-                # 🔄 예전 방식: 생성 세부사항 저장
-                generation_details[emotion] = {
-                    "dalle_url": dalle_url,
-                    "local_url": local_url,
-                    "prompt_used": emotion_prompt[:100] + "...",  # 프롬프트 일부만 저장
-                    "generated_at": datetime.now().isoformat(),
-                    "success": True
-                }
-                
-            except Exception as emotion_error:
-                print(f"  ❌ {emotion} 표정 생성 실패: {emotion_error}")
-                emotion_images[emotion] = None
-                generation_details[emotion] = {
-                    "error": str(emotion_error),
-                    "success": False,
-                    "generated_at": datetime.now().isoformat()
-                }
+                for index, emotion in enumerate(emotions)
+            }
+            
+            # 결과는 감정 순서대로 수집
+            for emotion in emotions:
+                try:
+                    dalle_url, local_url, variants, detail = futures[emotion].result()
+                    
+                    if local_url:
+                        emotion_images[emotion] = local_url
+                        if variants:
+                            emotion_image_variants[emotion] = variants
+                        generated_count += 1
+                        logger.debug("✅ %s 표정 완료 - 로컬 저장 성공", emotion)
+                    else:
+                        emotion_images[emotion] = dalle_url  # 로컬 저장 실패시 DALL-E URL
+                        logger.warning("⚠️ %s 표정 완료 - 로컬 저장 실패, DALL-E URL 사용", emotion)
+                    
+                    generation_details[emotion] = detail
+                    
+                except Exception as emotion_error:
+                    logger.error("❌ %s 표정 생성 실패: %s", emotion, emotion_error)
+                    emotion_images[emotion] = None
+                    generation_details[emotion] = {
+                        "error": str(emotion_error),
+                        "success": False,
+                        "generated_at": datetime.now().isoformat()
+                    }
+                    if isinstance(emotion_error, AdmissionRejected):
+                        generation_details[emotion]["retry_after"] = emotion_error.retry_after
+                        retry_after = max(retry_after or 0, emotion_error.retry_after)
+        
+        # 한 장도 못 만들었고 허용량 초과가 원인이면 빈 캐릭터를 저장하지 않고 429
+        if generated_count == 0 and retry_after is not None:
+            return {
+                "error": f"이미지 생성 한도 초과 - {retry_after}초 후 다시 시도해주세요",
+                "retry_after": retry_after,
+                "generation_details": generation_details
+            }, 429, {"Retry-After": str(retry_after)}
         
         # 🔄 예전 방식: 캐릭터 데이터 구성 강화
         character_data = {
             "images": emotion_images,
+            "imageVariants": emotion_image_variants,  # 감정별 폭별 WebP URL + 블러 플레이스홀더
             "description": character_description,
             "method": method,  # 🔄 예전 방식: photo vs description
             "character_id": character_id,
@@ -272,37 +363,22 @@ def generate_character_emotions():
             "version": "enhanced_consistency_v2"  # 🔄 버전 추적
         }
         
-        print(f"🔍 캐릭터 데이터 구조 확인:")
-        print(f"  - 설명: {character_data['description']}")
-        print(f"  - 방법: {character_data['method']}")
-        print(f"  - 성공률: {character_data['success_rate']}")
-        print(f"  - 이미지 개수: {len([url for url in emotion_images.values() if url])}")
         
         # Firebase에 자동 저장
         try:
-            db.collection("characters").document(user_id).set(character_data)
-            print(f"✅ 캐릭터 세트 Firebase 자동 저장 완료")
+            get_db().collection("characters").document(user_id).set(character_data)
+            logger.debug("✅ 캐릭터 세트 Firebase 자동 저장 완료")
         except Exception as firebase_error:
-            print(f"⚠️ Firebase 자동 저장 실패: {firebase_error}")
+            logger.warning("⚠️ Firebase 자동 저장 실패: %s", firebase_error)
+        finally:
+            character_cache.invalidate(user_id)
         
         # 로컬 백업 자동 저장
         try:
-            characters_file = os.path.join('static', 'characters_backup.json')
-            
-            try:
-                with open(characters_file, 'r', encoding='utf-8') as f:
-                    all_characters = json.load(f)
-            except (FileNotFoundError, json.JSONDecodeError):
-                all_characters = {}
-            
-            all_characters[user_id] = character_data
-            
-            with open(characters_file, 'w', encoding='utf-8') as f:
-                json.dump(all_characters, f, ensure_ascii=False, indent=2)
-                
-            print(f"✅ 캐릭터 세트 로컬 백업 완료")
+            get_character_store().upsert(user_id, character_data)
+            logger.debug("✅ 캐릭터 세트 로컬 백업 완료")
         except Exception as backup_error:
-            print(f"⚠️ 로컬 백업 실패: {backup_error}")
+            logger.warning("⚠️ 로컬 백업 실패: %s", backup_error)
         
         # 🔄 예전 방식: 결과 구조 개선
         result = {
@@ -317,16 +393,16 @@ def generate_character_emotions():
             }
         }
         
-        print(f"🎉 캐릭터 감정 세트 생성 완료:")
-        print(f"   성공: {generated_count}/{len(emotions)}")
-        print(f"   방법: {method}")
-        print(f"   생성된 감정들: {result['character_preview']['available_emotions']}")
+        logger.info("🎉 캐릭터 감정 세트 생성 완료: %d/%d", generated_count, len(emotions),
+                    extra={"data": {"method": method,
+                                    "emotions": result['character_preview']['available_emotions'],
+                                    "success_rate": character_data['success_rate']}})
         
-        return jsonify(result)
+        return result, 200, {}
         
     except Exception as e:
-        print(f"❌ 캐릭터 감정 세트 생성 오류: {e}")
-        return jsonify({"error": str(e)}), 500
+        logger.error("❌ 캐릭터 감정 세트 생성 오류: %s", e)
+        return {"error": str(e)}, 500, {}
 
 @character_bp.route("/api/save-character", methods=["POST"])
 def save_character():
@@ -347,43 +423,33 @@ def save_character():
         if not character.get("created_at"):
             character["created_at"] = datetime.now().isoformat()
         
-        print(f"💾 캐릭터 저장:")
-        print(f"  - 사용자: {user_id}")
-        print(f"  - 방법: {character.get('method', 'unknown')}")
-        print(f"  - 감정 수: {len(character.get('images', {}))}")
-        print(f"  - 설명: {character.get('description', 'no description')[:50]}...")
+        logger.info("💾 캐릭터 저장", extra={"data": {
+            "method": character.get('method', 'unknown'),
+            "emotions": len(character.get('images', {})),
+            "description": character.get('description')
+        }})
         
         # Firebase에 저장
         try:
-            db.collection("characters").document(user_id).set(character)
-            print(f"✅ 캐릭터 Firebase 저장 완료 (userId: {user_id})")
+            get_db().collection("characters").document(user_id).set(character)
+            logger.debug("✅ 캐릭터 Firebase 저장 완료 (userId: %s)", user_id)
         except Exception as firebase_error:
-            print(f"❌ Firebase 저장 실패: {firebase_error}")
+            logger.error("❌ Firebase 저장 실패: %s", firebase_error)
             # Firebase 실패시에도 로컬 백업은 시도
+        finally:
+            character_cache.invalidate(user_id)
         
         # 로컬 백업 저장
         try:
-            characters_file = os.path.join('static', 'characters_backup.json')
-            
-            try:
-                with open(characters_file, 'r', encoding='utf-8') as f:
-                    all_characters = json.load(f)
-            except (FileNotFoundError, json.JSONDecodeError):
-                all_characters = {}
-            
-            all_characters[user_id] = character
-            
-            with open(characters_file, 'w', encoding='utf-8') as f:
-                json.dump(all_characters, f, ensure_ascii=False, indent=2)
-                
-            print(f"✅ 캐릭터 로컬 백업 저장 완료")
+            get_character_store().upsert(user_id, character)
+            logger.debug("✅ 캐릭터 로컬 백업 저장 완료")
         except Exception as backup_error:
-            print(f"⚠️ 로컬 백업 실패: {backup_error}")
+            logger.warning("⚠️ 로컬 백업 실패: %s", backup_error)
         
         return jsonify({"message": "캐릭터 저장 성공!"}), 200
         
     except Exception as e:
-        print(f"❌ 캐릭터 저장 오류: {e}")
+        logger.error("❌ 캐릭터 저장 오류: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @character_bp.route("/api/get-character", methods=["GET"])
@@ -392,12 +458,18 @@ def get_character():
     try:
         user_id = request.args.get("userId", "anonymous")
         
-        print(f"🔍 캐릭터 조회 요청: {user_id}")
+        # 0순위: 프로세스 내 캐시
+        cached = character_cache.get(user_id)
+        if cached is not None:
+            logger.debug("⚡ 캐릭터 캐시 적중: %s", user_id)
+            return jsonify(cached), 200
         
         # 1순위: Firebase에서 조회
         try:
-            doc_ref = db.collection("characters").document(user_id)
-            doc = doc_ref.get()
+            cache_generation = character_cache.generation()
+            doc_ref = get_db().collection("characters").document(user_id)
+            with span("firestore.characters.get"):
+                doc = doc_ref.get()
             
             if doc.exists:
                 character_data = doc.to_dict()
@@ -406,42 +478,40 @@ def get_character():
                 if not character_data.get("method"):
                     character_data["method"] = "description"  # 기본값 설정
                 
-                print(f"✅ 캐릭터 Firebase 조회 성공:")
-                print(f"  - 사용자: {user_id}")
-                print(f"  - 방법: {character_data.get('method', 'unknown')}")
-                print(f"  - 감정 수: {len(character_data.get('images', {}))}")
-                print(f"  - 설명: {character_data.get('description', 'no description')[:50]}...")
+                logger.debug("✅ 캐릭터 Firebase 조회 성공: %s", user_id)
                 
+                character_cache.set(user_id, character_data, generation=cache_generation)
                 return jsonify(character_data), 200
         except Exception as firebase_error:
-            print(f"⚠️ Firebase 조회 실패: {firebase_error}")
+            logger.warning("⚠️ Firebase 조회 실패: %s", firebase_error)
         
         # 2순위: 로컬 백업에서 조회
         try:
-            characters_file = os.path.join('static', 'characters_backup.json')
-            
-            with open(characters_file, 'r', encoding='utf-8') as f:
-                all_characters = json.load(f)
+            character_data = get_character_store().get(user_id)
             
-            if user_id in all_characters:
-                character_data = all_characters[user_id]
+            if character_data:
                 
                 # 🔄 예전 방식: 호환성 보장
                 if not character_data.get("method"):
                     character_data["method"] = "description"
                 
-                print(f"✅ 캐릭터 로컬 백업 조회 성공: {user_id}")
+                logger.debug("✅ 캐릭터 로컬 백업 조회 성공: %s", user_id)
                 return jsonify(character_data), 200
-        except (FileNotFoundError, json.JSONDecodeError) as backup_error:
-            print(f"⚠️ 로컬 백업 조회 실패: {backup_error}")
+        except Exception as backup_error:
+            logger.warning("⚠️ 로컬 백업 조회 실패: %s", backup_error)
         
-        print(f"❌ 캐릭터 없음: {user_id}")
+        logger.info("❌ 캐릭터 없음: %s", user_id)
         return jsonify({"error": "캐릭터가 존재하지 않습니다."}), 404
             
     except Exception as e:
-        print(f"❌ 캐릭터 불러오기 오류: {e}")
+        logger.error("❌ 캐릭터 불러오기 오류: %s", e)
         return jsonify({"error": str(e)}), 500
 
+@character_bp.route("/api/get-character/cache_stats", methods=["GET"])
+def get_character_cache_stats():
+    """캐릭터 조회 캐시 적중률"""
+    return jsonify(character_cache.stats())
+
 @character_bp.route("/api/generate_character", methods=["GET"])
 def test_generate_character():
     """테스트 라우트"""
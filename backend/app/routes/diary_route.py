@@ -1,57 +1,87 @@
-from flask import Blueprint, request, jsonify, send_from_directory
+from flask import Blueprint, Response, request, jsonify, send_from_directory
 from datetime import datetime
 import os
 import json
-import requests
+import base64
+import queue
 import uuid
-from openai import OpenAI
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from config.firebase_config import db  # Firebase 연동
-from app.services.unified_gpt_service import UnifiedGPTService
+from config.firebase_config import get_db  # Firebase 연동 (첫 사용 시 초기화)
+from app.services.unified_gpt_service import UnifiedGPTService, get_analysis_cache
+from app.services.job_queue import JobQueue
+from app.services.llm_client_registry import get_openai_client
+from app.services.diary_journal import get_diary_journal
+from app.services.emotion_rollup import save_diary_with_rollups, read_emotion_rollups
+from app.services.image_generation_cache import generate_image_with_cache
+from utils.image_downloader import download_image
+from utils.image_derivatives import create_image_variants
+from utils.request_context import run_in_context, bind_request_context, reset_request_context
+from utils.circuit_breaker import fallback_reason
+from utils.deadline import JOB_DEADLINE_SECONDS, DeadlineExceeded, bind_deadline, reset_deadline
+from utils.rate_limiter import AdmissionRejected
+from utils.single_flight import SingleFlight, make_flight_key
+from utils.tracing import span, traced
+from utils.logger import get_logger
 
 load_dotenv()
 
 # Blueprint 생성
 diary_bp = Blueprint('diary', __name__)
-
-# OpenAI 클라이언트
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+logger = get_logger(__name__)
 
 # UnifiedGPTService 인스턴스 생성
 unified_service = UnifiedGPTService()
 
-# 이미지 저장 설정
+# 이미지 저장 설정 (폴더는 저장 시점에 생성)
 WEBTOON_IMAGES_FOLDER = os.path.join('static', 'webtoon_images')
-if not os.path.exists(WEBTOON_IMAGES_FOLDER):
-    os.makedirs(WEBTOON_IMAGES_FOLDER)
-    print(f"📁 웹툰 이미지 저장 폴더 생성: {WEBTOON_IMAGES_FOLDER}")
 
+# 웹툰 이미지 생성 백그라운드 작업 큐 설정
+WEBTOON_JOB_DB_PATH = os.environ.get('WEBTOON_JOB_DB_PATH', os.path.join('data', 'webtoon_jobs.sqlite3'))
+WEBTOON_JOB_WORKERS = int(os.environ.get('WEBTOON_JOB_WORKERS', 4))
+WEBTOON_JOB_TYPE = "analyze_with_webtoon_image"
+
+# 주간 웹툰 패널 이미지 동시 생성 수 (DALL-E 동시 호출 상한)
+WEEKLY_PANEL_MAX_CONCURRENCY = int(os.environ.get('WEEKLY_PANEL_MAX_CONCURRENCY', 4))
+
+# 주간 웹툰에서 이미지를 그리는 패널 (중요한 패널만)
+WEEKLY_IMAGE_PANEL_INDICES = [0, 3, 6, 7]
+
+# SSE 진행 상황 스트림: 이벤트가 없을 때 연결 유지용 주석을 보내는 간격 (초)
+SSE_HEARTBEAT_INTERVAL = float(os.environ.get('SSE_HEARTBEAT_INTERVAL', 15))
+
+# 일기 목록 페이지 최대 크기
+DIARY_LIST_MAX_LIMIT = int(os.environ.get('DIARY_LIST_MAX_LIMIT', 100))
+
+_webtoon_job_queue = None
+_webtoon_job_queue_lock = threading.Lock()
+
+# 실행 중인 같은 웹툰 생성 요청 합치기 (중복 제출 / 생성 중 새로고침)
+webtoon_image_flight = SingleFlight("analyze_with_webtoon_image")
+
+@traced("save_dalle_image_to_local")
 def save_dalle_image_to_local(dalle_url, image_id):
     """DALL-E 이미지를 로컬에 저장하고 로컬 URL 반환"""
     try:
-        print(f"💾 이미지 로컬 저장 시작: {dalle_url[:60]}...")
-        
-        # 이미지 다운로드
-        response = requests.get(dalle_url, timeout=60)
-        response.raise_for_status()
+        logger.debug("💾 이미지 로컬 저장 시작: %.60s", dalle_url)
         
         # 파일명 생성
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = f"webtoon_{image_id}_{timestamp}_{uuid.uuid4().hex[:8]}.png"
-        filepath = os.path.join(WEBTOON_IMAGES_FOLDER, filename)
         
-        # 파일 저장
-        with open(filepath, 'wb') as f:
-            f.write(response.content)
+        # 이미지 다운로드 (스트리밍 + 원자적 저장)
+        os.makedirs(WEBTOON_IMAGES_FOLDER, exist_ok=True)
+        download_image(dalle_url, WEBTOON_IMAGES_FOLDER, filename)
         
         # 로컬 URL 생성
         local_url = f"/static/webtoon_images/{filename}"
         
-        print(f"✅ 이미지 로컬 저장 완료: {local_url}")
+        logger.info("✅ 이미지 로컬 저장 완료: %s", local_url)
         return local_url
         
     except Exception as e:
-        print(f"❌ 이미지 로컬 저장 실패: {e}")
+        logger.error("❌ 이미지 로컬 저장 실패: %s", e)
         return None
 
 def build_character_description(character_info):
@@ -59,8 +89,6 @@ def build_character_description(character_info):
     if not character_info:
         return "cute Korean young person with expressive eyes, casual modern clothing"
     
-    print(f"🎭 캐릭터 정보 분석: {character_info}")
-    
     # 🔑 예전 방식: description + base_images 활용 (핵심!)
     if isinstance(character_info, dict) and 'description' in character_info:
         description_text = character_info['description']
@@ -68,8 +96,8 @@ def build_character_description(character_info):
         
         # 🔑 base_images가 있으면 캐릭터 일관성 강조 (예전 방식의 핵심!)
         if 'base_images' in character_info and character_info['base_images']:
-            print(f"✅ base_images 발견 - 캐릭터 일관성 강화 모드")
-            print(f"📸 참고 이미지 개수: {len(character_info['base_images'])}")
+            logger.debug("✅ base_images 발견 - 캐릭터 일관성 강화 모드 (참고 이미지 %d개)",
+                         len(character_info['base_images']))
             
             # 캐릭터 일관성을 매우 강하게 강조
             result += ", CRITICAL: MAINTAIN EXACT SAME CHARACTER APPEARANCE as reference images"
@@ -83,7 +111,7 @@ def build_character_description(character_info):
             result += ", ONLY change facial expression for emotion, keep everything else identical"
             
         else:
-            print(f"⚠️ base_images 없음 - 기본 캐릭터 생성 모드")
+            logger.debug("⚠️ base_images 없음 - 기본 캐릭터 생성 모드")
         
         result += ", clean line art, detailed facial features, expressive eyes"
         result += ", consistent character design, professional webtoon illustration style"
@@ -111,15 +139,20 @@ def build_character_description(character_info):
     
     return ", ".join(description_parts)
 
-def generate_webtoon_image(panel_info, character_info, emotion):
-    """캐릭터 정보 기반 웹툰 이미지 생성 - 예전 방식 강화 🔑"""
+@traced("generate_webtoon_image")
+def generate_webtoon_image(panel_info, character_info, emotion, image_id, bypass_cache=False, on_generated=None):
+    """
+    캐릭터 정보 기반 웹툰 이미지 생성 + 로컬 저장 - 예전 방식 강화 🔑
+    
+    같은 프롬프트로 이미 만든 이미지가 있으면 재사용 (IMAGE_CACHE_ENABLED, bypass_cache 로 무시)
+    on_generated: DALL-E URL 이 나오면 로컬 저장 전에 호출
+    반환값: dalle_url, local_url, cached
+    """
     try:
-        print(f"🎭 DALL-E 이미지 생성 - 감정: {emotion}")
-        print(f"📋 캐릭터 정보: {character_info}")
+        logger.debug("🎭 DALL-E 이미지 생성 - 감정: %s", emotion, extra={"data": {"character_info": character_info}})
         
         # 🔑 예전 방식: 캐릭터 설명 강화
         character_description = build_character_description(character_info)
-        print(f"🎨 생성된 캐릭터 설명: {character_description[:200]}...")
         
         # 🔑 예전 방식: 감정별 표현 더 상세하게
         emotion_expressions = {
@@ -173,24 +206,25 @@ def generate_webtoon_image(panel_info, character_info, emotion):
         Focus: Character consistency + emotion expression + scene storytelling
         """
         
-        print(f"📤 DALL-E 프롬프트 (처음 300자): {prompt[:300]}...")
+        logger.debug("📤 DALL-E 프롬프트", extra={"data": {"prompt": prompt}})
         
-        # DALL-E API 호출
-        response = client.images.generate(
-            model="dall-e-3",
-            prompt=prompt,
+        # DALL-E API 호출 (프롬프트 캐시 → 미스면 생성 후 로컬 저장)
+        image = generate_image_with_cache(
+            prompt,
             size="1792x1024",  # 가로형
             quality="hd",
-            n=1,
+            save_local=lambda dalle_url: save_dalle_image_to_local(dalle_url, image_id),
+            bypass_cache=bypass_cache,
+            on_generated=on_generated
         )
         
-        temp_url = response.data[0].url
-        print(f"✅ DALL-E 임시 URL 생성: {temp_url[:60]}...")
+        if not image['cached']:
+            logger.debug("✅ DALL-E 임시 URL 생성: %.60s", image['dalle_url'])
         
-        return temp_url
+        return image
         
     except Exception as e:
-        print(f"❌ DALL-E 이미지 생성 실패: {e}")
+        logger.error("❌ DALL-E 이미지 생성 실패: %s", e)
         raise e
 
 @diary_bp.route('/api/diary/analyze', methods=['POST'])
@@ -203,7 +237,7 @@ def analyze_diary():
         if not diary_text:
             return jsonify({"error": "일기 내용이 없습니다."}), 400
         
-        print(f"일기 분석 요청: {diary_text[:50]}...")
+        logger.debug("일기 분석 요청 (%d자)", len(diary_text))
         
         prompt = f"""
         다음 일기를 분석해주세요:
@@ -220,7 +254,7 @@ def analyze_diary():
         }}
         """
         
-        response = client.chat.completions.create(
+        response = get_openai_client().chat.completions.create(
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "system", "content": "당신은 감정 일기 분석 전문가입니다."},
@@ -233,11 +267,11 @@ def analyze_diary():
         analysis = json.loads(response.choices[0].message.content)
         analysis["analysis_success"] = True
         
-        print(f"분석 완료: {analysis['emotion']}")
+        logger.info("분석 완료: %s", analysis['emotion'])
         return jsonify(analysis)
         
     except Exception as gpt_error:
-        print(f"GPT 분석 실패: {gpt_error}")
+        logger.warning("GPT 분석 실패: %s", gpt_error)
         # GPT 실패 시 기본 응답
         analysis = {
             "emotion": "평온",
@@ -260,19 +294,16 @@ def analyze_with_webtoon():
         if not diary_text:
             return jsonify({"error": "일기 내용이 없습니다."}), 400
         
-        print(f"통합 분석 요청: {diary_text[:50]}...")
-        
-        # 1. 감정 분석
-        analysis = unified_service.analyze_diary(diary_text)
-        print(f"감정 분석 완료: {analysis['emotion']}")
+        logger.debug("통합 분석 요청 (%d자)", len(diary_text))
         
-        # 2. 웹툰 스토리 생성 (1컷만)
-        story_result = unified_service.create_webtoon_story(analysis, "나나")
+        # 1. 감정 분석 + 2. 웹툰 스토리 생성 (1컷만, DIARY_STORY_MODE=combined 면 한 번의 호출)
+        analysis, story_result = unified_service.analyze_and_create_story(diary_text, "나나")
+        logger.debug("감정 분석 완료: %s", analysis['emotion'])
         
         if story_result and 'panels' in story_result and len(story_result['panels']) > 0:
             daily_panel = story_result['panels'][0]
             story = {'panels': [daily_panel]}
-            print("웹툰 스토리 생성 완료")
+            logger.debug("웹툰 스토리 생성 완료")
         else:
             story = {
                 'panels': [{
@@ -288,15 +319,152 @@ def analyze_with_webtoon():
             'timestamp': datetime.now().isoformat()
         }
         
-        print("✅ 통합 분석 완료!")
+        logger.info("✅ 통합 분석 완료: %s", analysis['emotion'])
         return jsonify(result)
         
     except Exception as e:
-        print(f"통합 분석 오류: {e}")
+        logger.error("통합 분석 오류: %s", e)
         return jsonify({
             "error": f"분석 중 오류가 발생했습니다: {str(e)}"
         }), 500
 
+def run_webtoon_image_pipeline(diary_text, character_info, user_id, bypass_image_cache=False, on_event=None):
+    """
+    감정 분석 → 스토리 → DALL-E 이미지 → 로컬 저장 → Firebase 저장 (동기 실행, 결과 dict 반환)
+    
+    on_event(event, payload): 단계가 끝날 때마다 호출
+    (analysis / story / image_generated / image_saved - 최종 결과 dict 의 해당 부분)
+    """
+    def emit(event, payload):
+        if on_event is not None:
+            on_event(event, payload)
+
+    # 🔑 예전 방식: character_info 구조 확인 및 로깅 (본문 / 캐릭터 정보는 요약만)
+    base_images = (character_info or {}).get('base_images') or {}
+    logger.info("🔥 통합 웹툰 생성 시작 (%d자)", len(diary_text), extra={"data": {
+        "description": (character_info or {}).get('description'),
+        "base_images": list(base_images.keys()) if isinstance(base_images, dict) else len(base_images)
+    }})
+    if not character_info:
+        logger.debug("⚠️ 캐릭터 정보 없음 - 기본 웹툰 생성")
+
+    # 1. 감정 분석 + 2. 웹툰 스토리 생성 (DIARY_STORY_MODE=combined 면 한 번의 호출)
+    analysis, story_result = unified_service.analyze_and_create_story(
+        diary_text, "나나", on_analysis=lambda result: emit('analysis', {'analysis': result})
+    )
+    logger.debug("감정 분석 완료: %s", analysis['emotion'])
+
+    if story_result and 'panels' in story_result and len(story_result['panels']) > 0:
+        panel = story_result['panels'][0]
+        emit('story', {'story': {'panels': [panel]}})
+
+        # 3. 웹툰 ID 생성
+        webtoon_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{analysis['emotion']}"
+
+        # 🔑 예전 방식: 캐릭터 정보가 있을 때만 이미지 생성
+        if character_info and (character_info.get('description') or character_info.get('base_images')):
+            # 4. DALL-E 이미지 생성 + 로컬 저장
+            try:
+                logger.debug("🎨 캐릭터 기반 DALL-E 이미지 생성 시작", extra={"data": {
+                    "scene": panel.get('scene'), "dialogue": panel.get('dialogue')
+                }})
+
+                # 🔑 예전 방식: 강화된 캐릭터 정보로 이미지 생성
+                image = generate_webtoon_image(
+                    panel, 
+                    character_info, 
+                    analysis['emotion'],
+                    webtoon_id,
+                    bypass_cache=bypass_image_cache,
+                    on_generated=lambda generated: emit('image_generated', generated)
+                )
+                dalle_temp_url = image['dalle_url']
+
+                if dalle_temp_url or image['local_url']:
+
+                    # 로컬 서버에 저장된 URL (캐시 적중이면 기존 파일)
+                    local_image_url = image['local_url']
+
+                    # 최종 이미지 URL 결정
+                    final_image_url = local_image_url if local_image_url else dalle_temp_url
+
+                    panel['image_url'] = final_image_url
+                    panel['dalle_temp_url'] = dalle_temp_url  # 참고용
+                    panel['local_image_url'] = local_image_url  # 로컬 URL
+                    panel['image_saved_locally'] = bool(local_image_url)
+                    panel['image_cached'] = image['cached']
+                    panel['image_variants'] = create_image_variants(local_image_url)  # 반응형 축소본
+                    panel['character_used'] = True  # 🔄 예전 방식: 캐릭터 사용 표시
+                    emit('image_saved', {
+                        'image_url': final_image_url,
+                        'local_image_url': local_image_url,
+                        'image_saved_locally': panel['image_saved_locally'],
+                        'image_variants': panel['image_variants']
+                    })
+
+
+                else:
+                    raise Exception("DALL-E 이미지 생성 실패")
+
+            except Exception as img_error:
+                logger.error("❌ 이미지 생성/저장 실패: %s", img_error)
+                panel['image_url'] = None
+                panel['image_error'] = str(img_error)
+                panel['image_fallback_reason'] = fallback_reason(img_error)
+                if isinstance(img_error, AdmissionRejected):
+                    panel['image_retry_after'] = img_error.retry_after
+                panel['image_saved_locally'] = False
+                panel['character_used'] = False
+        else:
+            logger.info("⚠️ 캐릭터 정보 부족 - 이미지 생성 스킵")
+            panel['image_url'] = None
+            panel['image_saved_locally'] = False
+            panel['character_used'] = False
+
+        story = {'panels': [panel]}
+    else:
+        story = {
+            'panels': [{
+                'scene': f"{analysis['emotion']} 감정이 느껴지는 하루",
+                'dialogue': analysis.get('one_line', '오늘 하루를 마무리합니다.'),
+                'image_url': None,
+                'image_saved_locally': False,
+                'character_used': False
+            }]
+        }
+
+    # 5. Firebase에 저장 (선택사항)
+    firebase_doc_id = None
+    try:
+        if user_id != 'anonymous':
+            firebase_doc_id = save_to_firebase(
+                user_id, 
+                diary_text, 
+                analysis, 
+                story['panels'][0].get('image_url'),
+                webtoon_id,
+                story['panels'][0].get('image_variants')
+            )
+            logger.debug("✅ Firebase 저장 완료")
+    except Exception as firebase_error:
+        logger.warning("⚠️ Firebase 저장 실패: %s", firebase_error)
+
+    # 🔄 예전 방식: 통합 결과 반환 (호환성 개선)
+    result = {
+        'analysis': analysis,
+        'story': story,
+        'diary_text': diary_text,
+        'character_info': character_info,
+        'webtoon_id': webtoon_id,
+        'firebase_doc_id': firebase_doc_id,
+        'user_id': user_id,
+        'character_used': story['panels'][0].get('character_used', False),  # 🔄 예전 방식
+        'timestamp': datetime.now().isoformat()
+    }
+
+    logger.info("✅ 통합 웹툰 생성 완료 (캐릭터 사용: %s)", result['character_used'])
+    return result
+
 @diary_bp.route('/api/diary/analyze_with_webtoon_image', methods=['POST'])
 def analyze_with_webtoon_image():
     """감정 분석 + 웹툰 스토리 + 이미지 생성 - 예전 방식 적용 🔑"""
@@ -305,134 +473,161 @@ def analyze_with_webtoon_image():
         diary_text = data.get('text', '')
         character_info = data.get('character_info', {})
         user_id = data.get('user_id', data.get('userId', 'anonymous'))  # 🔄 예전 방식 호환
+        bypass_cache = bool(data.get('bypass_cache', False))  # 같은 프롬프트라도 새 이미지 생성
         
         if not diary_text:
             return jsonify({"error": "일기 내용이 없습니다."}), 400
         
-        print(f"🔥 예전 방식 적용 통합 웹툰 생성: {diary_text[:50]}...")
-        print(f"📝 사용자: {user_id}")
-        print(f"🎭 캐릭터 정보 구조: {character_info}")
-        
-        # 🔑 예전 방식: character_info 구조 확인 및 로깅
-        if character_info:
-            print(f"✅ 캐릭터 정보 발견:")
-            print(f"  - description: {character_info.get('description', 'None')}")
-            print(f"  - base_images: {bool(character_info.get('base_images'))}")
-            if character_info.get('base_images'):
-                print(f"  - base_images 개수: {len(character_info['base_images'])}")
-                print(f"  - 감정 종류: {list(character_info['base_images'].keys())}")
-        else:
-            print(f"⚠️ 캐릭터 정보 없음 - 기본 웹툰 생성")
-        
-        # 1. 감정 분석
-        analysis = unified_service.analyze_diary(diary_text)
-        print(f"감정 분석 완료: {analysis['emotion']}")
-        
-        # 2. 웹툰 스토리 생성
-        story_result = unified_service.create_webtoon_story(analysis, "나나")
-        
-        if story_result and 'panels' in story_result and len(story_result['panels']) > 0:
-            panel = story_result['panels'][0]
-            
-            # 3. 웹툰 ID 생성
-            webtoon_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{analysis['emotion']}"
-            
-            # 🔑 예전 방식: 캐릭터 정보가 있을 때만 이미지 생성
-            if character_info and (character_info.get('description') or character_info.get('base_images')):
-                # 4. DALL-E 이미지 생성 + 로컬 저장
-                try:
-                    print("🎨 캐릭터 기반 DALL-E 이미지 생성 시작...")
-                    print(f"📋 장면: {panel['scene'][:100]}...")
-                    print(f"💬 대사: {panel['dialogue'][:50]}...")
-                    
-                    # 🔑 예전 방식: 강화된 캐릭터 정보로 이미지 생성
-                    dalle_temp_url = generate_webtoon_image(
-                        panel, 
-                        character_info, 
-                        analysis['emotion']
-                    )
-                    
-                    if dalle_temp_url:
-                        print("✅ DALL-E 이미지 생성 성공!")
-                        
-                        # 로컬 서버에 저장
-                        local_image_url = save_dalle_image_to_local(dalle_temp_url, webtoon_id)
-                        
-                        # 최종 이미지 URL 결정
-                        final_image_url = local_image_url if local_image_url else dalle_temp_url
-                        
-                        panel['image_url'] = final_image_url
-                        panel['dalle_temp_url'] = dalle_temp_url  # 참고용
-                        panel['local_image_url'] = local_image_url  # 로컬 URL
-                        panel['image_saved_locally'] = bool(local_image_url)
-                        panel['character_used'] = True  # 🔄 예전 방식: 캐릭터 사용 표시
-                        
-                        print("🎉 캐릭터 기반 이미지 로컬 저장 완료!")
-                        
-                    else:
-                        raise Exception("DALL-E 이미지 생성 실패")
-                        
-                except Exception as img_error:
-                    print(f"❌ 이미지 생성/저장 실패: {img_error}")
-                    panel['image_url'] = None
-                    panel['image_error'] = str(img_error)
-                    panel['image_saved_locally'] = False
-                    panel['character_used'] = False
-            else:
-                print("⚠️ 캐릭터 정보 부족 - 이미지 생성 스킵")
-                panel['image_url'] = None
-                panel['image_saved_locally'] = False
-                panel['character_used'] = False
-            
-            story = {'panels': [panel]}
-        else:
-            story = {
-                'panels': [{
-                    'scene': f"{analysis['emotion']} 감정이 느껴지는 하루",
-                    'dialogue': analysis.get('one_line', '오늘 하루를 마무리합니다.'),
-                    'image_url': None,
-                    'image_saved_locally': False,
-                    'character_used': False
-                }]
-            }
+        # 같은 사용자의 같은 요청(중복 제출 / 새로고침)이 실행 중이면 그 결과를 함께 받음
+        flight_key = make_flight_key(user_id, {
+            'text': diary_text, 'character_info': character_info, 'bypass_cache': bypass_cache
+        })
+        result, shared = webtoon_image_flight.do(
+            flight_key,
+            lambda: run_webtoon_image_pipeline(diary_text, character_info, user_id, bypass_cache)
+        )
+        response = jsonify(result)
+        if shared:
+            response.headers['X-Coalesced'] = 'true'
+        return response
         
-        # 5. Firebase에 저장 (선택사항)
-        firebase_doc_id = None
+    except DeadlineExceeded as e:
+        return jsonify({"error": str(e)}), 504
+    except Exception as e:
+        logger.error("통합 시스템 오류: %s", e)
+        return jsonify({
+            "error": f"웹툰 생성 중 오류가 발생했습니다: {str(e)}"
+        }), 500
+
+def format_sse(event, payload):
+    """Server-Sent Events 한 건 (event 이름 + JSON data)"""
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+@diary_bp.route('/api/diary/analyze_with_webtoon_image/stream', methods=['POST'])
+def stream_webtoon_image():
+    """
+    analyze_with_webtoon_image 의 SSE 버전 - 단계가 끝날 때마다 이벤트 전송
+    
+    analysis → story → image_generated → image_saved → done (최종 결과 전체)
+    오류 시 error 이벤트. 클라이언트가 끊겨도 생성/저장은 끝까지 진행됨
+    """
+    data = request.json or {}
+    diary_text = data.get('text', '')
+    character_info = data.get('character_info', {})
+    user_id = data.get('user_id', data.get('userId', 'anonymous'))
+    bypass_cache = bool(data.get('bypass_cache', False))
+    
+    if not diary_text:
+        return jsonify({"error": "일기 내용이 없습니다."}), 400
+    
+    # 이벤트는 만들어진 시점에 파이프라인 스레드에서 바로 직렬화해서 넣음
+    # (payload 는 파이프라인이 계속 채워 넣는 panel dict 를 가리키므로 나중에 직렬화하면 안 됨)
+    events = queue.Queue()
+    
+    def run_pipeline():
         try:
-            if user_id != 'anonymous':
-                firebase_doc_id = save_to_firebase(
-                    user_id, 
-                    diary_text, 
-                    analysis, 
-                    story['panels'][0].get('image_url'),
-                    webtoon_id
-                )
-                print("✅ Firebase 저장 완료")
-        except Exception as firebase_error:
-            print(f"⚠️ Firebase 저장 실패: {firebase_error}")
+            result = run_webtoon_image_pipeline(
+                diary_text, character_info, user_id, bypass_cache,
+                on_event=lambda event, payload: events.put(format_sse(event, payload))
+            )
+            events.put(format_sse('done', result))
+        except Exception as e:
+            logger.error("통합 시스템 오류 (스트림): %s", e)
+            events.put(format_sse('error', {"error": f"웹툰 생성 중 오류가 발생했습니다: {str(e)}"}))
+        finally:
+            events.put(None)
+    
+    threading.Thread(target=run_in_context(run_pipeline), name="webtoon-sse", daemon=True).start()
+    
+    def generate():
+        while True:
+            try:
+                item = events.get(timeout=SSE_HEARTBEAT_INTERVAL)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            if item is None:
+                return
+            yield item
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # nginx 버퍼링 끄기 (이벤트 즉시 전달)
+    })
+
+def _run_webtoon_image_job(payload):
+    """작업 큐 워커에서 실행되는 웹툰 이미지 생성 작업"""
+    # 요청 밖(워커 스레드)에서 실행되므로 사용량 집계용 라우트 / 사용자를 직접 설정
+    tokens = bind_request_context(f"job:{WEBTOON_JOB_TYPE}", payload.get('user_id', 'anonymous'))
+    deadline_token = bind_deadline(JOB_DEADLINE_SECONDS)
+    try:
+        return run_webtoon_image_pipeline(
+            payload['text'],
+            payload.get('character_info', {}),
+            payload.get('user_id', 'anonymous'),
+            payload.get('bypass_cache', False)
+        )
+    finally:
+        reset_deadline(deadline_token)
+        reset_request_context(tokens)
+
+def get_webtoon_job_queue():
+    """웹툰 이미지 생성 작업 큐 (첫 사용 시 생성 + 워커 시작, 미완료 작업 자동 재개)"""
+    global _webtoon_job_queue
+    if _webtoon_job_queue is None:
+        with _webtoon_job_queue_lock:
+            if _webtoon_job_queue is None:
+                job_queue = JobQueue(WEBTOON_JOB_DB_PATH, num_workers=WEBTOON_JOB_WORKERS)
+                job_queue.register(WEBTOON_JOB_TYPE, _run_webtoon_image_job)
+                job_queue.start()
+                _webtoon_job_queue = job_queue
+    return _webtoon_job_queue
+
+@diary_bp.route('/api/diary/jobs/analyze_with_webtoon_image', methods=['POST'])
+def submit_webtoon_image_job():
+    """웹툰 이미지 생성 작업 등록 (job_id 즉시 반환)"""
+    try:
+        data = request.json
+        diary_text = data.get('text', '')
+        character_info = data.get('character_info', {})
+        user_id = data.get('user_id', data.get('userId', 'anonymous'))  # 🔄 예전 방식 호환
+        bypass_cache = bool(data.get('bypass_cache', False))
         
-        # 🔄 예전 방식: 통합 결과 반환 (호환성 개선)
-        result = {
-            'analysis': analysis,
-            'story': story,
-            'diary_text': diary_text,
+        if not diary_text:
+            return jsonify({"error": "일기 내용이 없습니다."}), 400
+        
+        job_id = get_webtoon_job_queue().submit(WEBTOON_JOB_TYPE, {
+            'text': diary_text,
             'character_info': character_info,
-            'webtoon_id': webtoon_id,
-            'firebase_doc_id': firebase_doc_id,
             'user_id': user_id,
-            'character_used': story['panels'][0].get('character_used', False),  # 🔄 예전 방식
-            'timestamp': datetime.now().isoformat()
-        }
+            'bypass_cache': bypass_cache
+        })
         
-        print("✅ 예전 방식 적용 통합 웹툰 생성 완료!")
-        print(f"🎭 캐릭터 사용 여부: {result['character_used']}")
-        return jsonify(result)
+        logger.info("📥 웹툰 생성 작업 등록: %s (사용자: %s)", job_id, user_id)
+        return jsonify({
+            "job_id": job_id,
+            "status": "queued",
+            "status_url": f"/api/diary/jobs/{job_id}"
+        }), 202
         
     except Exception as e:
-        print(f"통합 시스템 오류: {e}")
-        return jsonify({
-            "error": f"웹툰 생성 중 오류가 발생했습니다: {str(e)}"
-        }), 500
+        logger.error("❌ 웹툰 생성 작업 등록 오류: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+@diary_bp.route('/api/diary/jobs/<job_id>', methods=['GET'])
+def get_webtoon_image_job(job_id):
+    """작업 상태 조회 (done이면 result에 analyze_with_webtoon_image와 같은 결과 포함)"""
+    try:
+        job = get_webtoon_job_queue().get(job_id)
+        
+        if job is None:
+            return jsonify({"error": "작업을 찾을 수 없습니다."}), 404
+        
+        return jsonify(job)
+        
+    except Exception as e:
+        logger.error("❌ 작업 상태 조회 오류: %s", e)
+        return jsonify({"error": str(e)}), 500
 
 @diary_bp.route('/api/diary/generate_weekly_narrative', methods=['POST'])
 def generate_weekly_narrative():
@@ -444,25 +639,34 @@ def generate_weekly_narrative():
         if len(daily_analyses) < 7:
             return jsonify({"error": "7일치 데이터가 필요합니다."}), 400
         
-        print(f"📝 주간 내레이션 생성 요청: {len(daily_analyses)}일치")
-        print(f"💰 비용 절약 모드: 텍스트 내레이션만 생성")
+        logger.info("📝 주간 내레이션 생성 요청: %d일치 (텍스트만)", len(daily_analyses))
         
         # UnifiedGPTService 사용해서 텍스트 내레이션만 생성
         narrative_result = unified_service.create_weekly_narrative(daily_analyses)
         
-        print("✅ 주간 내레이션 생성 완료!")
-        print(f"📊 주요 감정: {narrative_result.get('week_dominant_emotion', '알 수 없음')}")
-        print(f"💰 생성 비용: {narrative_result.get('generation_cost', '저렴!')}")
+        logger.info("✅ 주간 내레이션 생성 완료 (주요 감정: %s, 비용: %s)",
+                    narrative_result.get('week_dominant_emotion', '알 수 없음'),
+                    narrative_result.get('generation_cost'))
         
         return jsonify(narrative_result)
         
     except Exception as e:
-        print(f"❌ 주간 내레이션 생성 오류: {e}")
+        logger.error("❌ 주간 내레이션 생성 오류: %s", e)
         return jsonify({
             "error": f"내레이션 생성 중 오류가 발생했습니다: {str(e)}"
         }), 500
 
-def save_to_firebase(user_id, diary_text, analysis, image_url, webtoon_id):
+@diary_bp.route('/api/diary/analysis_cache/stats', methods=['GET'])
+def get_analysis_cache_stats():
+    """일기 분석 캐시 적중/미스 통계"""
+    try:
+        return jsonify(get_analysis_cache().stats())
+    except Exception as e:
+        logger.error("❌ 분석 캐시 통계 조회 오류: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+@traced("save_to_firebase")
+def save_to_firebase(user_id, diary_text, analysis, image_url, webtoon_id, image_variants=None):
     """Firebase Firestore에 웹툰 데이터 저장"""
     try:
         date = datetime.now().strftime('%Y-%m-%d')
@@ -478,19 +682,21 @@ def save_to_firebase(user_id, diary_text, analysis, image_url, webtoon_id):
             "keywords": analysis.get('keywords', []),
             "oneLine": analysis.get('one_line', ''),
             "imageUrl": image_url,  # 로컬 URL 또는 DALL-E URL
+            "imageVariants": image_variants,  # 폭별 WebP URL + 블러 플레이스홀더
             "webtoonId": webtoon_id,
             "imageSavedLocally": bool(image_url and '/static/' in str(image_url)),
             "createdAt": datetime.now().isoformat(),
             "updatedAt": datetime.now().isoformat()
         }
         
-        db.collection("diaries").document(doc_id).set(diary_data)
-        print(f"✅ Firebase 저장 성공: {doc_id}")
+        # 일기 문서 + 감정 집계(일/주/월/전체)를 한 트랜잭션으로 저장
+        save_diary_with_rollups(doc_id, diary_data)
+        logger.info("✅ Firebase 저장 성공: %s", doc_id)
         
         return doc_id
         
     except Exception as e:
-        print(f"❌ Firebase 저장 실패: {e}")
+        logger.error("❌ Firebase 저장 실패: %s", e)
         raise e
 
 @diary_bp.route('/api/diary/save', methods=['POST'])
@@ -507,6 +713,12 @@ def save_diary():
         keywords = data.get("keywords", [])
         image_url = data.get("imageUrl", "")
         
+        # 날짜는 문서 ID / 감정 집계 구간에 쓰이므로 YYYY-MM-DD 만 허용
+        try:
+            datetime.strptime(date, '%Y-%m-%d')
+        except (TypeError, ValueError):
+            return jsonify({"error": "date 는 YYYY-MM-DD 형식이어야 합니다."}), 400
+        
         # Firebase에 저장
         doc_id = f"{user_id}_{date}"
         diary_data = {
@@ -521,44 +733,100 @@ def save_diary():
             "createdAt": datetime.now().isoformat()
         }
         
-        db.collection("diaries").document(doc_id).set(diary_data)
+        # 일기 문서 + 감정 집계(일/주/월/전체)를 한 트랜잭션으로 저장
+        save_diary_with_rollups(doc_id, diary_data)
         
-        # 로컬 백업 저장 (선택사항)
+        # 로컬 백업 저장 (선택사항) - append-only 저널에 한 줄 추가
         try:
-            backup_file = os.path.join('static', 'diary_backup.json')
-            
-            try:
-                with open(backup_file, 'r', encoding='utf-8') as f:
-                    all_diaries = json.load(f)
-            except (FileNotFoundError, json.JSONDecodeError):
-                all_diaries = []
-            
             diary_data['backup_id'] = doc_id
-            all_diaries.append(diary_data)
-            
-            with open(backup_file, 'w', encoding='utf-8') as f:
-                json.dump(all_diaries, f, ensure_ascii=False, indent=2)
-                
-            print("✅ 로컬 백업 저장 완료")
+            get_diary_journal().append(doc_id, user_id, diary_data)
+            logger.debug("✅ 로컬 백업 저장 완료")
         except Exception as backup_error:
-            print(f"⚠️ 로컬 백업 실패: {backup_error}")
+            logger.warning("⚠️ 로컬 백업 실패: %s", backup_error)
         
-        print(f"✅ 일기 저장 완료: {doc_id}")
+        logger.info("✅ 일기 저장 완료: %s", doc_id)
         return jsonify({"message": "일기 저장 성공!", "doc_id": doc_id}), 200
         
     except Exception as e:
-        print(f"일기 저장 오류: {e}")
+        logger.error("일기 저장 오류: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+@diary_bp.route('/api/diary/emotion_stats', methods=['GET'])
+def get_emotion_stats():
+    """
+    사용자 감정 분포 (저장 시 갱신한 집계 문서만 읽음)
+    
+    - period: day / week / month / total (기본 day)
+    - start, end: YYYY-MM-DD (기본값: 최근 30일, total 이면 무시)
+    """
+    try:
+        user_id = request.args.get('userId')
+        if not user_id:
+            return jsonify({"error": "userId가 필요합니다."}), 400
+        
+        try:
+            stats = read_emotion_rollups(
+                user_id,
+                request.args.get('period', 'day'),
+                request.args.get('start'),
+                request.args.get('end')
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        return jsonify(stats)
+        
+    except Exception as e:
+        logger.error("❌ 감정 통계 조회 오류: %s", e)
         return jsonify({"error": str(e)}), 500
 
+def encode_diary_cursor(doc_id):
+    """다음 페이지 커서 (클라이언트에는 불투명한 토큰)"""
+    return base64.urlsafe_b64encode(json.dumps({"id": doc_id}).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_diary_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))["id"]
+
 @diary_bp.route('/api/diary/list', methods=['GET'])
 def get_diary_list():
-    """일기 목록 조회 API (Firebase)"""
+    """
+    일기 목록 조회 API (Firebase)
+    
+    - Firestore에서 date 내림차순 정렬 (userId + date 복합 인덱스 필요, firestore.indexes.json 참고)
+    - cursor: 이전 응답의 next_cursor 를 넘기면 다음 페이지
+    - fields: 쉼표로 구분한 필드만 조회 (예: fields=date,emotion,imageUrl - 목록에서 본문 제외)
+    """
     try:
         user_id = request.args.get("userId", "anonymous")
-        limit = int(request.args.get("limit", 50))
+        limit = max(1, min(int(request.args.get("limit", 50)), DIARY_LIST_MAX_LIMIT))
+        cursor = request.args.get("cursor")
+        fields = [f.strip() for f in request.args.get("fields", "").split(",") if f.strip()]
+        
+        diaries_ref = get_db().collection("diaries")
+        query = diaries_ref.where("userId", "==", user_id).order_by(
+            "date", direction="DESCENDING"
+        )
         
-        # Firebase에서 사용자 일기 조회
-        docs = db.collection("diaries").where("userId", "==", user_id).limit(limit).stream()
+        if fields:
+            query = query.select(fields)
+        
+        if cursor:
+            try:
+                with span("firestore.diaries.get"):
+                    cursor_snapshot = diaries_ref.document(decode_diary_cursor(cursor)).get()
+            except Exception:
+                return jsonify({"error": "잘못된 cursor 입니다."}), 400
+            
+            if not cursor_snapshot.exists:
+                return jsonify({"error": "cursor 위치의 일기를 찾을 수 없습니다."}), 400
+            query = query.start_after(cursor_snapshot)
+        
+        # 한 개 더 가져와서 다음 페이지 존재 여부 확인
+        with span("firestore.diaries.list", limit=limit):
+            docs = list(query.limit(limit + 1).stream())
+        has_more = len(docs) > limit
+        docs = docs[:limit]
         
         diaries = []
         for doc in docs:
@@ -566,18 +834,36 @@ def get_diary_list():
             diary_data['id'] = doc.id
             diaries.append(diary_data)
         
-        # 날짜순 정렬
-        diaries.sort(key=lambda x: x.get('date', ''), reverse=True)
+        return jsonify({
+            "status": "success",
+            "diaries": diaries,
+            "count": len(diaries),
+            "user_id": user_id,
+            "has_more": has_more,
+            "next_cursor": encode_diary_cursor(docs[-1].id) if has_more else None
+        })
+        
+    except Exception as e:
+        logger.error("일기 목록 조회 오류: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+@diary_bp.route('/api/diary/backup', methods=['GET'])
+def get_diary_backup():
+    """로컬 백업 저널에서 사용자 일기 조회 (doc_id 별 최신 버전)"""
+    try:
+        user_id = request.args.get("userId", "anonymous")
+        diaries = get_diary_journal().read_user(user_id)
         
         return jsonify({
             "status": "success",
             "diaries": diaries,
             "count": len(diaries),
-            "user_id": user_id
+            "user_id": user_id,
+            "source": "local_backup"
         })
         
     except Exception as e:
-        print(f"일기 목록 조회 오류: {e}")
+        logger.error("로컬 백업 조회 오류: %s", e)
         return jsonify({"error": str(e)}), 500
 
 # 기존 주간 웹툰 API (8컷 이미지 생성 - 비용 高)
@@ -590,13 +876,12 @@ def generate_weekly_webtoon():
         character_info = data.get('character_info', {})
         user_id = data.get('userId', 'anonymous')
         generate_images = data.get('generate_images', False)
+        bypass_cache = bool(data.get('bypass_cache', False))
         
         if len(weekly_data) < 7:
             return jsonify({"error": "일주일치 데이터가 부족합니다."}), 400
         
-        print(f"📅 기존 주간 웹툰 생성: {len(weekly_data)}일치, 사용자: {user_id}")
-        print(f"🎨 이미지 생성: {generate_images}")
-        print(f"💰 예상 비용: {'높음 (8컷 이미지 생성)' if generate_images else '낮음 (텍스트만)'}")
+        logger.info("📅 주간 웹툰 생성: %d일치 (이미지 생성: %s)", len(weekly_data), generate_images)
         
         # 주간 분석 데이터 생성
         daily_analyses = []
@@ -623,7 +908,8 @@ def generate_weekly_webtoon():
             daily_analyses, 
             character_info, 
             generate_images,
-            user_id
+            user_id,
+            bypass_cache
         )
         
         # 주간 통계
@@ -641,7 +927,7 @@ def generate_weekly_webtoon():
                     daily_analyses
                 )
         except Exception as firebase_error:
-            print(f"⚠️ 주간 웹툰 Firebase 저장 실패: {firebase_error}")
+            logger.warning("⚠️ 주간 웹툰 Firebase 저장 실패: %s", firebase_error)
         
         result = {
             'weekly_story': weekly_story_result,
@@ -655,16 +941,17 @@ def generate_weekly_webtoon():
             'timestamp': datetime.now().isoformat()
         }
         
-        print("✅ 기존 주간 웹툰 생성 완료!")
+        logger.info("✅ 주간 웹툰 생성 완료")
         return jsonify(result)
         
     except Exception as e:
-        print(f"주간 웹툰 생성 오류: {e}")
+        logger.error("주간 웹툰 생성 오류: %s", e)
         return jsonify({
             "error": f"주간 웹툰 생성 중 오류가 발생했습니다: {str(e)}"
         }), 500
 
-def create_weekly_panels_with_firebase(weekly_story_result, daily_analyses, character_info, generate_images, user_id):
+def create_weekly_panels_with_firebase(weekly_story_result, daily_analyses, character_info, generate_images, user_id,
+                                      bypass_cache=False):
     """주간 패널 생성 (Firebase 연동)"""
     panels = []
     
@@ -695,26 +982,45 @@ def create_weekly_panels_with_firebase(weekly_story_result, daily_analyses, char
             "image_saved_locally": False
         }
         
-        # 이미지 생성 (중요한 패널만)
-        if generate_images and character_info and i in [0, 3, 6, 7]:
-            try:
-                week_id = f"{user_id}_week_{datetime.now().strftime('%Y%m%d_%H%M%S')}_panel_{i+1}"
-                
-                dalle_url = generate_webtoon_image(panel, character_info, day_data['emotion'])
-                if dalle_url:
-                    local_url = save_dalle_image_to_local(dalle_url, week_id)
-                    if local_url:
-                        panel['image_url'] = local_url
-                        panel['image_saved_locally'] = True
-                        print(f"✅ 주간 패널 {i+1} 이미지 저장 완료")
-                    
-            except Exception as e:
-                print(f"❌ 주간 패널 {i+1} 이미지 생성 실패: {e}")
-        
         panels.append(panel)
     
+    # 이미지 생성 (중요한 패널만) - 패널별로 동시에 실행, 실패는 해당 패널에만 반영
+    image_indices = [i for i in WEEKLY_IMAGE_PANEL_INDICES if i < len(panels)]
+    if generate_images and character_info and image_indices:
+        max_workers = max(1, min(WEEKLY_PANEL_MAX_CONCURRENCY, len(image_indices)))
+        logger.debug("⚡ 주간 패널 이미지 동시 생성 수: %d", max_workers)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                i: executor.submit(
+                    run_in_context(generate_weekly_panel_image), panels[i], character_info, user_id, bypass_cache
+                )
+                for i in image_indices
+            }
+            
+            # 패널 순서대로 결과 반영 (panels 리스트 순서는 그대로)
+            for i in image_indices:
+                try:
+                    futures[i].result()
+                except Exception as e:
+                    logger.error("❌ 주간 패널 %d 이미지 생성 실패: %s", i + 1, e)
+    
     return panels
 
+def generate_weekly_panel_image(panel, character_info, user_id, bypass_cache=False):
+    """주간 패널 1개의 이미지 생성 + 로컬 저장 후 panel 에 반영 (워커 스레드에서 실행)"""
+    panel_number = panel['panel_number']
+    week_id = f"{user_id}_week_{datetime.now().strftime('%Y%m%d_%H%M%S')}_panel_{panel_number}"
+    
+    image = generate_webtoon_image(panel, character_info, panel['emotion'], week_id, bypass_cache)
+    if image:
+        local_url = image['local_url']
+        if local_url:
+            panel['image_url'] = local_url
+            panel['image_saved_locally'] = True
+            panel['image_variants'] = create_image_variants(local_url)
+            logger.debug("✅ 주간 패널 %s 이미지 저장 완료", panel_number)
+
 def generate_weekly_stats(daily_analyses):
     """주간 통계 생성"""
     emotions = [d['emotion'] for d in daily_analyses]
@@ -752,11 +1058,11 @@ def save_weekly_webtoon_to_firebase(user_id, weekly_story, panels, stats, daily_
             "type": "weekly_webtoon"
         }
         
-        db.collection("weekly_webtoons").document(doc_id).set(weekly_data)
-        print(f"✅ 주간 웹툰 Firebase 저장 성공: {doc_id}")
+        get_db().collection("weekly_webtoons").document(doc_id).set(weekly_data)
+        logger.info("✅ 주간 웹툰 Firebase 저장 성공: %s", doc_id)
         
         return doc_id
         
     except Exception as e:
-        print(f"❌ 주간 웹툰 Firebase 저장 실패: {e}")
+        logger.error("❌ 주간 웹툰 Firebase 저장 실패: %s", e)
         raise e
\ No newline at end of file
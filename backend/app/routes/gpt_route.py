@@ -1,5 +1,8 @@
 from flask import Blueprint, request, jsonify
 from app.services.gpt_service import generate_4cuts
+from app.services.llm_client_registry import get_client_pool_stats
+from app.services.llm_usage import get_usage_tracker
+from utils.circuit_breaker import get_breaker_stats
 
 gpt_bp = Blueprint("gpt", __name__)
 
@@ -39,4 +42,32 @@ def generate_daily():
             "mood": emotion
         }
         return jsonify(daily_result)
-    
\ No newline at end of file
+    
+
+@gpt_bp.route("/api/llm/pool_stats", methods=["GET"])
+def llm_pool_stats():
+    """공유 OpenAI 클라이언트 커넥션 풀 사용량"""
+    return jsonify({"clients": get_client_pool_stats()})
+
+@gpt_bp.route("/api/llm/circuits", methods=["GET"])
+def llm_circuits():
+    """모델 / 다운로드 호스트별 서킷 상태 (closed / open / half_open, 연속 실패 수, 거절 수)"""
+    return jsonify({"circuits": get_breaker_stats()})
+
+@gpt_bp.route("/api/llm/usage", methods=["GET"])
+def llm_usage():
+    """
+    LLM / 이미지 호출 사용량 (토큰, 이미지 수, 예상 비용, 지연시간)
+    
+    - process: 이 프로세스 시작 이후 라우트별 / 모델별 / 사용자 상위 (라우트는 p50/p95/p99 포함)
+    - persisted: 최근 hours 시간(기본 24) 동안 저장된 시간 버킷 합계
+    """
+    try:
+        hours = float(request.args.get("hours", 24))
+        tracker = get_usage_tracker()
+        return jsonify({
+            "process": tracker.snapshot(),
+            "persisted": tracker.persisted_summary(hours)
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
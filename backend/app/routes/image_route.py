@@ -1,28 +1,82 @@
 from flask import Blueprint, request, jsonify
-from openai import OpenAI
 import os
-from dotenv import load_dotenv
+import uuid
+from datetime import datetime
+from app.services.image_generation_cache import (
+    IMAGE_CACHE_ENABLED, generate_image_with_cache, get_image_generation_cache
+)
+from utils.image_downloader import download_image
+from utils.image_store import get_image_store
+from utils.rate_limiter import AdmissionRejected, get_image_admission
+from utils.logger import get_logger
 
-load_dotenv()
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+logger = get_logger(__name__)
 
 image_bp = Blueprint("image", __name__)
 
+# 캐시 사용 시 생성 이미지 저장 폴더 (DALL-E 임시 URL 은 만료되므로 로컬 사본을 캐시)
+GENERATED_IMAGES_FOLDER = os.path.join('static', 'generated_images')
+
+def save_generated_image_to_local(dalle_url):
+    """생성 이미지를 로컬에 저장하고 로컬 URL 반환 (실패 시 None)"""
+    try:
+        filename = f"image_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.png"
+        os.makedirs(GENERATED_IMAGES_FOLDER, exist_ok=True)
+        download_image(dalle_url, GENERATED_IMAGES_FOLDER, filename)
+        return f"/static/generated_images/{filename}"
+    except Exception as e:
+        logger.error("❌ 생성 이미지 로컬 저장 실패: %s", e)
+        return None
+
 @image_bp.route("/generate_image", methods=["POST"])
 def generate_image():
     data = request.get_json()
     prompt = data.get("prompt", "")
+    bypass_cache = bool(data.get("bypass_cache", False))  # 같은 프롬프트라도 새 이미지 생성
     if not prompt:
         return jsonify({"error": "프롬프트가 없습니다."}), 400
 
     try:
-        response = client.images.generate(
-            model="dall-e-3",  # dall-e-2도 가능
-            prompt=prompt,
+        image = generate_image_with_cache(
+            prompt,
             size="1024x1024",
-            n=1
+            quality="standard",
+            # 캐시가 켜져 있을 때만 로컬 사본 저장 (캐시 값이 로컬 이미지를 가리켜야 하므로)
+            save_local=save_generated_image_to_local if IMAGE_CACHE_ENABLED else None,
+            bypass_cache=bypass_cache
         )
-        image_url = response.data[0].url
-        return jsonify({"url": image_url})
+        image_url = image["local_url"] or image["dalle_url"]
+        return jsonify({"url": image_url, "cached": image["cached"]})
+    except AdmissionRejected as e:
+        return jsonify({"error": str(e), "retry_after": e.retry_after}), 429, {"Retry-After": str(e.retry_after)}
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@image_bp.route("/api/image_cache/stats", methods=["GET"])
+def get_image_cache_stats():
+    """DALL-E 프롬프트 캐시 적중/미스 통계"""
+    try:
+        if not IMAGE_CACHE_ENABLED:
+            return jsonify({"enabled": False})
+        return jsonify({"enabled": True, **get_image_generation_cache().stats()})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@image_bp.route("/api/image_admission/stats", methods=["GET"])
+def get_image_admission_stats():
+    """DALL-E 호출 허용량: 허용 / 거절 수, 대기 중인 호출 수, 버킷별 다음 대기 시간"""
+    return jsonify(get_image_admission().stats())
+
+
+@image_bp.route("/api/image_store/stats", methods=["GET"])
+def get_image_store_stats():
+    """내용 해시 이미지 저장소: 고유 이미지 수 / 참조 수 / 절약한 바이트"""
+    try:
+        store = get_image_store()
+        if store is None:
+            return jsonify({"enabled": False})
+        return jsonify({"enabled": True, **store.stats()})
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
@@ -0,0 +1,26 @@
+from flask import Blueprint, Response, jsonify
+from utils.metrics import render_prometheus
+from utils.tracing import TRACE_SLOW_MS, get_slow_traces
+
+metrics_bp = Blueprint("metrics", __name__)
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    Prometheus 스크레이프 엔드포인트
+
+    - http_request_duration_seconds / http_requests_in_flight: 라우트별 요청 지연 / 처리 중 요청 수
+    - stage_duration_seconds / stage_in_flight / stage_errors_total: 파이프라인 단계별
+    """
+    return Response(render_prometheus(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+@metrics_bp.route("/api/traces/slow", methods=["GET"])
+def slow_traces():
+    """최근 TRACE_SLOW_MS 이상 걸린 요청의 단계별 span 목록 (느린 순)"""
+    try:
+        return jsonify({
+            "threshold_ms": TRACE_SLOW_MS,
+            "traces": get_slow_traces()
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
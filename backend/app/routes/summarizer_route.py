@@ -1,12 +1,24 @@
 from flask import Blueprint, request, jsonify
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import os
+import time
 from app.services.summarizer_service import (
     summarize_text_service, 
     summarize_diary_for_webtoon, 
     generate_scene_description
 )
+from utils.request_context import run_in_context
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 summarizer_bp = Blueprint("summarizer", __name__)
 
+# 일괄 요약 동시 실행 설정
+BATCH_SUMMARIZE_DEFAULT_CONCURRENCY = int(os.environ.get("BATCH_SUMMARIZE_DEFAULT_CONCURRENCY", 4))
+BATCH_SUMMARIZE_MAX_CONCURRENCY = int(os.environ.get("BATCH_SUMMARIZE_MAX_CONCURRENCY", 8))
+BATCH_SUMMARIZE_ITEM_TIMEOUT = float(os.environ.get("BATCH_SUMMARIZE_ITEM_TIMEOUT", 30))
+
 @summarizer_bp.route("/summarize", methods=["POST"])
 def summarize():
     """기본 텍스트 요약 API"""
@@ -17,7 +29,7 @@ def summarize():
         if not input_text:
             return jsonify({"error": "텍스트가 비어 있습니다."}), 400
         
-        print(f"텍스트 요약 요청: {input_text[:50]}...")
+        logger.debug("텍스트 요약 요청 (%d자)", len(input_text))
         
         summary = summarize_text_service(input_text)
         
@@ -29,7 +41,7 @@ def summarize():
         })
         
     except Exception as e:
-        print(f"텍스트 요약 오류: {e}")
+        logger.error("텍스트 요약 오류: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @summarizer_bp.route("/summarize_for_webtoon", methods=["POST"])
@@ -43,7 +55,7 @@ def summarize_for_webtoon():
         if not diary_text:
             return jsonify({"error": "일기 내용이 비어 있습니다."}), 400
         
-        print(f"웹툰용 일기 요약 요청: {diary_text[:50]}...")
+        logger.debug("웹툰용 일기 요약 요청 (%d자)", len(diary_text))
         
         # 웹툰용 요약
         webtoon_summary = summarize_diary_for_webtoon(diary_text)
@@ -61,7 +73,7 @@ def summarize_for_webtoon():
         })
         
     except Exception as e:
-        print(f"웹툰용 요약 오류: {e}")
+        logger.error("웹툰용 요약 오류: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @summarizer_bp.route("/generate_scene", methods=["POST"])
@@ -76,7 +88,7 @@ def generate_scene():
         if not diary_text:
             return jsonify({"error": "일기 내용이 비어 있습니다."}), 400
         
-        print(f"웹툰 장면 생성 요청: {emotion} 감정, {character_name}")
+        logger.debug("웹툰 장면 생성 요청: %s 감정, %s", emotion, character_name)
         
         scene_description = generate_scene_description(diary_text, emotion)
         
@@ -88,9 +100,56 @@ def generate_scene():
         })
         
     except Exception as e:
-        print(f"장면 생성 오류: {e}")
+        logger.error("장면 생성 오류: %s", e)
         return jsonify({"error": str(e)}), 500
 
+def _summarize_one(text, summary_type):
+    if summary_type == "webtoon":
+        return summarize_diary_for_webtoon(text)
+    return summarize_text_service(text)
+
+def run_batch_summaries(texts, summary_type, max_concurrency):
+    """
+    텍스트들을 워커 풀에서 동시에 요약
+    
+    반환: {index: (summary, error)} - 실행 시작 후 BATCH_SUMMARIZE_ITEM_TIMEOUT 초를
+    넘긴 항목은 기다리지 않고 시간 초과 오류로 처리
+    """
+    executor = ThreadPoolExecutor(max_workers=max_concurrency)
+    started_at = {}
+    results = {}
+    
+    def run(index, text):
+        started_at[index] = time.monotonic()
+        return _summarize_one(text, summary_type)
+    
+    futures = {executor.submit(run_in_context(run), i, text): i for i, text in enumerate(texts)}
+    pending = set(futures)
+    
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            
+            for future in done:
+                index = futures[future]
+                try:
+                    results[index] = (future.result(), None)
+                except Exception as text_error:
+                    results[index] = (None, str(text_error))
+            
+            now = time.monotonic()
+            for future in list(pending):
+                index = futures[future]
+                if index in started_at and now - started_at[index] > BATCH_SUMMARIZE_ITEM_TIMEOUT:
+                    pending.discard(future)
+                    future.cancel()
+                    results[index] = (None, f"요약 시간 초과 ({BATCH_SUMMARIZE_ITEM_TIMEOUT}초)")
+    finally:
+        # 시간 초과된 작업은 기다리지 않고 응답
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    return results
+
 @summarizer_bp.route("/batch_summarize", methods=["POST"])
 def batch_summarize():
     """여러 텍스트 일괄 요약 API (주간 웹툰용)"""
@@ -102,32 +161,39 @@ def batch_summarize():
         if not texts or not isinstance(texts, list):
             return jsonify({"error": "텍스트 배열이 필요합니다."}), 400
         
-        print(f"일괄 요약 요청: {len(texts)}개 텍스트, 타입: {summary_type}")
+        logger.info("일괄 요약 요청: %d개 텍스트, 타입: %s", len(texts), summary_type)
         
-        summaries = []
+        # 요청별 동시 실행 수 (서버 상한으로 제한)
+        try:
+            max_concurrency = int(data.get("max_concurrency", BATCH_SUMMARIZE_DEFAULT_CONCURRENCY))
+        except (TypeError, ValueError):
+            max_concurrency = BATCH_SUMMARIZE_DEFAULT_CONCURRENCY
+        max_concurrency = max(1, min(max_concurrency, BATCH_SUMMARIZE_MAX_CONCURRENCY, len(texts)))
+        
+        logger.debug("⚡ 동시 실행 수: %d, 항목별 제한 시간: %s초", max_concurrency, BATCH_SUMMARIZE_ITEM_TIMEOUT)
         
+        results = run_batch_summaries(texts, summary_type, max_concurrency)
+        
+        summaries = []
         for i, text in enumerate(texts):
-            try:
-                if summary_type == "webtoon":
-                    summary = summarize_diary_for_webtoon(text)
-                else:
-                    summary = summarize_text_service(text)
-                
+            summary, error = results[i]
+            original = text[:50] + "..." if len(text) > 50 else text
+            
+            if error is None:
                 summaries.append({
                     "index": i,
-                    "original": text[:50] + "..." if len(text) > 50 else text,
+                    "original": original,
                     "summary": summary,
                     "success": True
                 })
-                
-            except Exception as text_error:
-                print(f"텍스트 {i} 요약 실패: {text_error}")
+            else:
+                logger.warning("텍스트 %s 요약 실패: %s", i, error)
                 summaries.append({
                     "index": i,
-                    "original": text[:50] + "..." if len(text) > 50 else text,
+                    "original": original,
                     "summary": "요약 실패",
                     "success": False,
-                    "error": str(text_error)
+                    "error": error
                 })
         
         successful_count = sum(1 for s in summaries if s["success"])
@@ -140,7 +206,7 @@ def batch_summarize():
         })
         
     except Exception as e:
-        print(f"일괄 요약 오류: {e}")
+        logger.error("일괄 요약 오류: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @summarizer_bp.route("/summarize/test", methods=["GET"])
@@ -152,6 +218,6 @@ def test_summarizer():
             "POST /summarize - 기본 텍스트 요약",
             "POST /summarize_for_webtoon - 웹툰용 일기 요약",
             "POST /generate_scene - 웹툰 장면 설명 생성",
-            "POST /batch_summarize - 일괄 요약"
+            "POST /batch_summarize - 일괄 요약 (max_concurrency로 동시 실행 수 지정)"
         ]
     })
\ No newline at end of file
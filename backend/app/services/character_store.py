@@ -0,0 +1,129 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 캐릭터 로컬 저장소 설정
+CHARACTER_STORE_PATH = os.environ.get('CHARACTER_STORE_PATH', os.path.join('data', 'characters.sqlite3'))
+LEGACY_CHARACTERS_FILE = os.path.join('static', 'characters_backup.json')
+
+_store = None
+_store_lock = threading.Lock()
+
+
+class CharacterStore:
+    """
+    사용자별 캐릭터 로컬 백업 저장소 (SQLite WAL)
+
+    - user_id 기본키로 한 명씩 upsert / 조회 (전체 파일을 다시 쓰지 않음)
+    - WAL 모드라 읽기와 쓰기가 서로 막지 않고, 여러 워커 프로세스가 써도 갱신이 유실되지 않음
+    - 처음 열 때 기존 characters_backup.json 내용을 한 번만 옮겨옴
+    """
+
+    def __init__(self, path=CHARACTER_STORE_PATH, legacy_json_path=LEGACY_CHARACTERS_FILE):
+        self.path = path
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS characters (
+                user_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT)")
+
+        if legacy_json_path:
+            self._migrate_legacy_json(legacy_json_path)
+
+    def _connection(self):
+        """스레드별 커넥션 (sqlite3 커넥션은 스레드 간 공유하지 않음)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _migrate_legacy_json(self, legacy_json_path):
+        """characters_backup.json → SQLite 1회 이전"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            done = conn.execute(
+                "SELECT value FROM store_meta WHERE key = 'legacy_json_migrated'"
+            ).fetchone()
+            if done:
+                conn.execute("COMMIT")
+                return
+
+            migrated = 0
+            try:
+                with open(legacy_json_path, 'r', encoding='utf-8') as f:
+                    all_characters = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                all_characters = {}
+
+            now = time.time()
+            for user_id, character in all_characters.items():
+                # 이미 새 저장소에 있는 사용자는 덮어쓰지 않음
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO characters (user_id, data, updated_at) VALUES (?, ?, ?)",
+                    (user_id, json.dumps(character, ensure_ascii=False), now)
+                )
+                migrated += cursor.rowcount
+
+            conn.execute(
+                "INSERT INTO store_meta (key, value) VALUES ('legacy_json_migrated', ?)",
+                (str(now),)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        if migrated:
+            logger.info("📦 캐릭터 백업 이전 완료: %s → %s (%s명)", legacy_json_path, self.path, migrated)
+
+    def upsert(self, user_id: str, character: Dict):
+        """사용자 캐릭터 저장 (있으면 교체)"""
+        self._connection().execute(
+            """
+            INSERT INTO characters (user_id, data, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at
+            """,
+            (user_id, json.dumps(character, ensure_ascii=False), time.time())
+        )
+
+    def get(self, user_id: str) -> Optional[Dict]:
+        """사용자 캐릭터 조회 (없으면 None)"""
+        row = self._connection().execute(
+            "SELECT data FROM characters WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM characters").fetchone()[0]
+
+
+def get_character_store() -> CharacterStore:
+    """프로세스 공유 캐릭터 저장소"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CharacterStore()
+    return _store
@@ -0,0 +1,351 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 일기 로컬 백업 저널 설정
+DIARY_JOURNAL_DIR = os.environ.get('DIARY_JOURNAL_DIR', os.path.join('data', 'diary_journal'))
+DIARY_JOURNAL_SEGMENT_MAX_BYTES = int(os.environ.get('DIARY_JOURNAL_SEGMENT_MAX_BYTES', 8 * 1024 * 1024))
+DIARY_JOURNAL_FSYNC = os.environ.get('DIARY_JOURNAL_FSYNC', 'interval')  # always / interval / never
+DIARY_JOURNAL_FSYNC_INTERVAL = float(os.environ.get('DIARY_JOURNAL_FSYNC_INTERVAL', 1.0))
+DIARY_JOURNAL_COMPACT_INTERVAL = float(os.environ.get('DIARY_JOURNAL_COMPACT_INTERVAL', 3600))
+LEGACY_DIARY_BACKUP_FILE = os.path.join('static', 'diary_backup.json')
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+class DiaryJournal:
+    """
+    일기 로컬 백업용 append-only JSONL 저널
+
+    - 저장할 때마다 한 줄만 덧붙임 (전체 파일을 다시 쓰지 않으므로 O(1), 중간에 죽어도 기존 기록은 안전)
+    - 세그먼트는 날짜가 바뀌거나 크기 상한을 넘으면 새 파일로 교체 (프로세스별 파일이라 멀티 워커 안전)
+    - SQLite 인덱스(user_id, doc_id → 세그먼트, 오프셋)로 한 사용자 기록만 바로 읽음
+    - 백그라운드 컴팩션이 닫힌 세그먼트들을 doc_id 별 최신 버전만 남긴 파일 하나로 합침
+    """
+
+    def __init__(self, directory=DIARY_JOURNAL_DIR, segment_max_bytes=DIARY_JOURNAL_SEGMENT_MAX_BYTES,
+                 fsync=DIARY_JOURNAL_FSYNC, fsync_interval=DIARY_JOURNAL_FSYNC_INTERVAL,
+                 legacy_json_path=LEGACY_DIARY_BACKUP_FILE):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._segment_name = None
+        self._segment_date = None
+        self._segment_counter = 0
+        self._last_fsync = 0.0
+        self._compactor = None
+        self._stop = threading.Event()
+
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._index = sqlite3.connect(os.path.join(directory, 'index.sqlite3'),
+                                      check_same_thread=False, timeout=30, isolation_level=None)
+        self._index.execute("PRAGMA journal_mode=WAL")
+        self._index.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                segment TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                doc_id TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                PRIMARY KEY (segment, offset)
+            )
+            """
+        )
+        self._index.execute("CREATE INDEX IF NOT EXISTS idx_entries_user ON entries (user_id, doc_id, seq)")
+        self._index.execute("CREATE INDEX IF NOT EXISTS idx_entries_doc ON entries (doc_id, seq)")
+        self._index.execute(
+            "CREATE TABLE IF NOT EXISTS segments (name TEXT PRIMARY KEY, indexed_bytes INTEGER NOT NULL)"
+        )
+        self._index.execute("CREATE TABLE IF NOT EXISTS journal_meta (key TEXT PRIMARY KEY, value TEXT)")
+
+        self._catch_up_index()
+        self._last_seq = self._index.execute("SELECT MAX(seq) FROM entries").fetchone()[0] or 0
+
+        if legacy_json_path:
+            self._migrate_legacy_json(legacy_json_path)
+
+    # ---------- 인덱스 복구 ----------
+
+    def _segment_files(self):
+        return sorted(name for name in os.listdir(self.directory) if name.endswith('.jsonl'))
+
+    def _catch_up_index(self):
+        """인덱스에 반영되지 않은 세그먼트 끝부분을 다시 읽어 인덱스 보정 (비정상 종료 대비)"""
+        indexed = dict(self._index.execute("SELECT name, indexed_bytes FROM segments").fetchall())
+        for name in self._segment_files():
+            path = os.path.join(self.directory, name)
+            size = os.path.getsize(path)
+            start = indexed.get(name, 0)
+            if size <= start:
+                continue
+
+            rows = []
+            valid_end = start
+            with open(path, 'rb') as f:
+                f.seek(start)
+                offset = start
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break  # 쓰다 만 마지막 줄은 무시
+                    try:
+                        record = json.loads(line)
+                        rows.append((name, offset, len(line), record['seq'], record['doc_id'], record['user_id']))
+                    except (ValueError, KeyError):
+                        pass
+                    offset += len(line)
+                    valid_end = offset
+
+            self._index.execute("BEGIN")
+            self._index.executemany("INSERT OR IGNORE INTO entries VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._index.execute("INSERT OR REPLACE INTO segments VALUES (?, ?)", (name, valid_end))
+            self._index.execute("COMMIT")
+
+    def _migrate_legacy_json(self, legacy_json_path):
+        """static/diary_backup.json → 저널 1회 이전"""
+        if self._index.execute("SELECT 1 FROM journal_meta WHERE key = 'legacy_json_migrated'").fetchone():
+            return
+
+        try:
+            with open(legacy_json_path, 'r', encoding='utf-8') as f:
+                all_diaries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            all_diaries = []
+
+        for diary_data in all_diaries:
+            doc_id = diary_data.get('backup_id') or f"{diary_data.get('userId', 'anonymous')}_{diary_data.get('date', '')}"
+            self.append(doc_id, diary_data.get('userId', 'anonymous'), diary_data)
+
+        self._index.execute("INSERT OR REPLACE INTO journal_meta VALUES ('legacy_json_migrated', ?)", (str(time.time()),))
+        if all_diaries:
+            logger.info("📦 일기 백업 이전 완료: %s → %s (%s개)", legacy_json_path, self.directory, len(all_diaries))
+
+    # ---------- 쓰기 ----------
+
+    def _open_segment(self):
+        """날짜가 바뀌었거나 크기 상한을 넘으면 새 세그먼트 열기 (lock 안에서 호출)"""
+        today = datetime.now().strftime('%Y%m%d')
+        if self._file is not None:
+            if self._segment_date == today and self._file.tell() < self.segment_max_bytes:
+                return
+            self._close_segment()
+
+        self._segment_counter += 1
+        name = f"segment-{today}-{os.getpid()}-{int(time.time() * 1000)}-{self._segment_counter:04d}.jsonl"
+        self._file = open(os.path.join(self.directory, name), 'ab')
+        self._segment_name = name
+        self._segment_date = today
+        self._index.execute("INSERT OR IGNORE INTO segments VALUES (?, 0)", (name,))
+
+    def _close_segment(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+            self._segment_name = None
+
+    def append(self, doc_id: str, user_id: str, data: Dict) -> int:
+        """일기 한 건 기록, seq 반환"""
+        with self._lock:
+            self._open_segment()
+
+            # 나노초 시각 기반 seq (여러 프로세스가 써도 나중 기록이 더 큰 값)
+            seq = max(time.time_ns(), self._last_seq + 1)
+            self._last_seq = seq
+            record = {
+                "seq": seq,
+                "doc_id": doc_id,
+                "user_id": user_id,
+                "written_at": datetime.now().isoformat(),
+                "data": data
+            }
+            line = (json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8')
+
+            offset = self._file.tell()
+            self._file.write(line)
+            self._file.flush()
+
+            now = time.monotonic()
+            if self.fsync == 'always' or (self.fsync == 'interval' and now - self._last_fsync >= self.fsync_interval):
+                os.fsync(self._file.fileno())
+                self._last_fsync = now
+
+            self._index.execute("BEGIN")
+            self._index.execute(
+                "INSERT OR IGNORE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (self._segment_name, offset, len(line), seq, doc_id, user_id)
+            )
+            self._index.execute(
+                "UPDATE segments SET indexed_bytes = MAX(indexed_bytes, ?) WHERE name = ?",
+                (offset + len(line), self._segment_name)
+            )
+            self._index.execute("COMMIT")
+            return seq
+
+    # ---------- 읽기 ----------
+
+    def _read_at(self, segment, offset, length):
+        with open(os.path.join(self.directory, segment), 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
+
+    def read_user(self, user_id: str) -> List[Dict]:
+        """사용자의 백업 일기 (doc_id 별 최신 버전, 날짜 내림차순)"""
+        with self._lock:
+            rows = self._index.execute(
+                """
+                SELECT segment, offset, length FROM entries e
+                WHERE user_id = ? AND seq = (SELECT MAX(seq) FROM entries WHERE doc_id = e.doc_id)
+                """,
+                (user_id,)
+            ).fetchall()
+            if self._file is not None:
+                self._file.flush()
+            diaries = [self._read_at(*row)["data"] for row in rows]
+
+        diaries.sort(key=lambda x: x.get('date', ''), reverse=True)
+        return diaries
+
+    def get(self, doc_id: str) -> Optional[Dict]:
+        """doc_id 최신 버전"""
+        with self._lock:
+            row = self._index.execute(
+                "SELECT segment, offset, length FROM entries WHERE doc_id = ? ORDER BY seq DESC LIMIT 1",
+                (doc_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self._file is not None:
+                self._file.flush()
+            return self._read_at(*row)["data"]
+
+    # ---------- 컴팩션 ----------
+
+    def compact(self) -> Dict:
+        """
+        이 프로세스가 쓰고 있지 않은 세그먼트들을 doc_id 별 최신 버전만 남긴 세그먼트 하나로 합침
+
+        다른 세그먼트(현재 쓰는 중인 세그먼트 포함)에 더 새 버전이 있는 doc_id 는 버림.
+        """
+        with self._lock:
+            # 다른 워커 프로세스가 쓰는 중일 수 있는 오늘 날짜 / 최근 수정된 세그먼트는 제외
+            today = datetime.now().strftime('%Y%m%d')
+            recent = time.time() - 60
+            sealed = [
+                name for name in self._segment_files()
+                if name != self._segment_name
+                and f"-{today}-" not in name
+                and os.path.getmtime(os.path.join(self.directory, name)) < recent
+            ]
+            if len(sealed) < 2 or not self._acquire_compaction_lock():
+                return {"compacted_segments": 0}
+
+            try:
+                result = self._compact_segments(sealed)
+            finally:
+                self._index.execute("DELETE FROM journal_meta WHERE key = 'compaction_lock'")
+
+        logger.info("🗜️ 일기 저널 컴팩션: 세그먼트 %s개 → 1개, 기록 %s개 → %s개", len(sealed), result['entries_before'], result['entries_after'])
+        return result
+
+    def _acquire_compaction_lock(self):
+        """여러 프로세스가 동시에 컴팩션하지 않도록 인덱스 DB에 잠금 기록 (1시간 지나면 무효)"""
+        self._index.execute("BEGIN IMMEDIATE")
+        row = self._index.execute("SELECT value FROM journal_meta WHERE key = 'compaction_lock'").fetchone()
+        if row and time.time() - float(row[0]) < 3600:
+            self._index.execute("COMMIT")
+            return False
+        self._index.execute("INSERT OR REPLACE INTO journal_meta VALUES ('compaction_lock', ?)", (str(time.time()),))
+        self._index.execute("COMMIT")
+        return True
+
+    def _compact_segments(self, sealed):
+        """sealed 세그먼트들을 합쳐 새 세그먼트로 교체 (lock 안에서 호출)"""
+        placeholders = ",".join("?" * len(sealed))
+        rows = self._index.execute(
+            f"""
+            SELECT segment, offset, length FROM entries e
+            WHERE segment IN ({placeholders})
+              AND seq = (SELECT MAX(seq) FROM entries WHERE doc_id = e.doc_id)
+            ORDER BY seq
+            """,
+            sealed
+        ).fetchall()
+        before = self._index.execute(
+            f"SELECT COUNT(*) FROM entries WHERE segment IN ({placeholders})", sealed
+        ).fetchone()[0]
+
+        name = f"compact-{int(time.time() * 1000)}-{os.getpid()}.jsonl"
+        temp_path = os.path.join(self.directory, name + ".tmp")
+        new_rows = []
+        with open(temp_path, 'wb') as out:
+            for segment, offset, length in rows:
+                with open(os.path.join(self.directory, segment), 'rb') as f:
+                    f.seek(offset)
+                    line = f.read(length)
+                record = json.loads(line)
+                new_rows.append((name, out.tell(), len(line), record['seq'], record['doc_id'], record['user_id']))
+                out.write(line)
+            out.flush()
+            os.fsync(out.fileno())
+        size = os.path.getsize(temp_path)
+        os.replace(temp_path, os.path.join(self.directory, name))
+
+        self._index.execute("BEGIN")
+        self._index.execute(f"DELETE FROM entries WHERE segment IN ({placeholders})", sealed)
+        self._index.execute(f"DELETE FROM segments WHERE name IN ({placeholders})", sealed)
+        self._index.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?)", new_rows)
+        self._index.execute("INSERT INTO segments VALUES (?, ?)", (name, size))
+        self._index.execute("COMMIT")
+
+        for segment in sealed:
+            os.remove(os.path.join(self.directory, segment))
+
+        return {"compacted_segments": len(sealed), "entries_before": before, "entries_after": len(new_rows)}
+
+    def _compaction_loop(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.compact()
+            except Exception as e:
+                logger.warning("⚠️ 일기 저널 컴팩션 실패: %s", e)
+
+    def start_compaction(self, interval=DIARY_JOURNAL_COMPACT_INTERVAL):
+        """백그라운드 컴팩션 스레드 시작"""
+        if self._compactor is None and interval > 0:
+            self._compactor = threading.Thread(target=self._compaction_loop, args=(interval,),
+                                               name="diary-journal-compactor", daemon=True)
+            self._compactor.start()
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            self._close_segment()
+
+
+def get_diary_journal() -> DiaryJournal:
+    """프로세스 공유 일기 백업 저널 (첫 사용 시 컴팩션 스레드 시작)"""
+    global _journal
+    if _journal is None:
+        with _journal_lock:
+            if _journal is None:
+                journal = DiaryJournal()
+                journal.start_compaction()
+                _journal = journal
+    return _journal
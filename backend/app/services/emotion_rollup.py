@@ -0,0 +1,217 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from config.firebase_config import get_db
+from utils.tracing import span
+
+# 사용자별 감정 집계 문서 (일기 저장 시 같은 트랜잭션에서 갱신)
+ROLLUP_COLLECTION = "emotion_rollups"
+ROLLUP_PERIODS = ("day", "week", "month", "total")
+ROLLUP_MAX_BUCKETS = 400  # 한 번에 읽는 구간 수 상한 (약 1년치 일 단위)
+UNKNOWN_EMOTION = "unknown"
+
+
+def _parse_date(value) -> date:
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+
+
+def _try_parse_date(value) -> Optional[date]:
+    """형식이 맞지 않으면 None (집계 때문에 일기 저장 전체가 실패하지 않도록)"""
+    if not value:
+        return None
+    try:
+        return _parse_date(value)
+    except ValueError:
+        return None
+
+
+def bucket_key(period: str, day: date) -> str:
+    """기간별 구간 키 (day: 2025-01-31, week: 2025-W05, month: 2025-01, total: all)"""
+    if period == "day":
+        return day.isoformat()
+    if period == "week":
+        year, week, _ = day.isocalendar()
+        return f"{year}-W{week:02d}"
+    if period == "month":
+        return day.strftime("%Y-%m")
+    if period == "total":
+        return "all"
+    raise ValueError(f"알 수 없는 기간: {period}")
+
+
+def rollup_doc_id(user_id: str, period: str, bucket: str) -> str:
+    return f"{user_id}_{period}_{bucket}"
+
+
+def _intensity(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _add_delta(deltas, user_id, day, emotion, intensity, sign):
+    """일기 1건을 모든 기간 집계 변화량에 더하거나(sign=1) 빼기(sign=-1)"""
+    emotion = emotion or UNKNOWN_EMOTION
+    intensity = _intensity(intensity)
+    for period in ROLLUP_PERIODS:
+        delta = deltas.setdefault((user_id, period, bucket_key(period, day)), {
+            "count": 0, "intensitySum": 0.0, "emotions": {}, "intensityByEmotion": {}
+        })
+        delta["count"] += sign
+        delta["intensitySum"] += sign * intensity
+        delta["emotions"][emotion] = delta["emotions"].get(emotion, 0) + sign
+        delta["intensityByEmotion"][emotion] = delta["intensityByEmotion"].get(emotion, 0.0) + sign * intensity
+
+
+def _write_deltas(transaction, db, deltas):
+    """집계 문서마다 한 번씩 Increment 로 반영 (변화 없는 값은 생략)"""
+    from firebase_admin import firestore
+
+    for (user_id, period, bucket), delta in deltas.items():
+        update = {
+            "count": delta["count"],
+            "intensitySum": delta["intensitySum"],
+            "emotions": {e: n for e, n in delta["emotions"].items() if n},
+            "intensityByEmotion": {e: x for e, x in delta["intensityByEmotion"].items() if x}
+        }
+        if not (update["count"] or update["intensitySum"] or update["emotions"] or update["intensityByEmotion"]):
+            continue
+
+        ref = db.collection(ROLLUP_COLLECTION).document(rollup_doc_id(user_id, period, bucket))
+        transaction.set(ref, {
+            "userId": user_id,
+            "period": period,
+            "bucket": bucket,
+            "count": firestore.Increment(update["count"]),
+            "intensitySum": firestore.Increment(update["intensitySum"]),
+            "emotions": {e: firestore.Increment(n) for e, n in update["emotions"].items()},
+            "intensityByEmotion": {e: firestore.Increment(x) for e, x in update["intensityByEmotion"].items()},
+            "updatedAt": datetime.now().isoformat()
+        }, merge=True)
+
+
+def save_diary_with_rollups(doc_id: str, diary_data: Dict):
+    """
+    diaries 문서 저장 + 감정 집계 갱신을 한 트랜잭션으로
+
+    같은 doc_id 를 덮어쓰는 경우(같은 날 다시 저장) 이전 감정/강도를 빼고 새 값을 더함
+    """
+    from firebase_admin import firestore
+
+    db = get_db()
+    doc_ref = db.collection("diaries").document(doc_id)
+    user_id = diary_data["userId"]
+
+    @firestore.transactional
+    def write(transaction):
+        deltas = {}
+        previous = doc_ref.get(transaction=transaction)
+        if previous.exists:
+            old = previous.to_dict()
+            old_day = _try_parse_date(old.get("date"))
+            # 예전에 형식 검사 없이 저장된 날짜는 집계된 적이 없으므로 뺄 것도 없음
+            if old_day is not None:
+                _add_delta(deltas, old.get("userId", user_id), old_day,
+                           old.get("emotion"), old.get("emotionIntensity"), -1)
+        _add_delta(deltas, user_id, _parse_date(diary_data["date"]),
+                   diary_data.get("emotion"), diary_data.get("emotionIntensity"), 1)
+
+        transaction.set(doc_ref, diary_data)
+        _write_deltas(transaction, db, deltas)
+
+    write(db.transaction())
+
+
+def iter_bucket_keys(period: str, start: date, end: date) -> List[str]:
+    """
+    start~end 를 덮는 구간 키 목록 (오래된 순)
+
+    구간 수가 ROLLUP_MAX_BUCKETS 를 넘으면 일부만 읽지 않고 ValueError (잘린 통계를 돌려주지 않음)
+    """
+    if period == "total":
+        return ["all"]
+
+    keys = []
+    day = start
+    while day <= end:
+        key = bucket_key(period, day)
+        if not keys or keys[-1] != key:
+            if len(keys) >= ROLLUP_MAX_BUCKETS:
+                raise ValueError(
+                    f"조회 기간이 너무 깁니다: {period} 단위는 최대 {ROLLUP_MAX_BUCKETS}개 구간까지 조회할 수 있습니다."
+                )
+            keys.append(key)
+        if period == "day":
+            day += timedelta(days=1)
+        elif period == "week":
+            day += timedelta(days=7 - day.weekday())  # 다음 주 월요일
+        else:
+            day = (day.replace(day=1) + timedelta(days=32)).replace(day=1)  # 다음 달 1일
+    return keys
+
+
+def read_emotion_rollups(user_id: str, period: str, start: Optional[str] = None,
+                         end: Optional[str] = None) -> Dict:
+    """
+    기간 집계 문서만 읽어서 감정 분포 반환 (일기 수와 무관하게 구간 수만큼 읽음)
+
+    start / end: YYYY-MM-DD (기본값: 오늘 기준 최근 30일)
+    """
+    if period not in ROLLUP_PERIODS:
+        raise ValueError(f"period 는 {', '.join(ROLLUP_PERIODS)} 중 하나여야 합니다.")
+
+    end_day = _parse_date(end) if end else date.today()
+    start_day = _parse_date(start) if start else end_day - timedelta(days=29)
+    if start_day > end_day:
+        raise ValueError("start 가 end 보다 늦습니다.")
+
+    db = get_db()
+    keys = iter_bucket_keys(period, start_day, end_day)
+    refs = [db.collection(ROLLUP_COLLECTION).document(rollup_doc_id(user_id, period, key)) for key in keys]
+    with span("firestore.emotion_rollups.get_all", buckets=len(refs)):
+        snapshots = {snapshot.id: snapshot for snapshot in db.get_all(refs)} if refs else {}
+
+    buckets = []
+    total_count = 0
+    total_intensity = 0.0
+    emotion_totals: Dict[str, int] = {}
+    for key, ref in zip(keys, refs):
+        snapshot = snapshots.get(ref.id)
+        if snapshot is None or not snapshot.exists:
+            continue
+        data = snapshot.to_dict()
+        count = int(data.get("count", 0))
+        if count <= 0:
+            continue
+        intensity_sum = float(data.get("intensitySum", 0))
+        emotions = {emotion: int(n) for emotion, n in (data.get("emotions") or {}).items() if n > 0}
+
+        buckets.append({
+            "bucket": key,
+            "count": count,
+            "intensitySum": intensity_sum,
+            "avgIntensity": round(intensity_sum / count, 2),
+            "emotions": emotions
+        })
+        total_count += count
+        total_intensity += intensity_sum
+        for emotion, n in emotions.items():
+            emotion_totals[emotion] = emotion_totals.get(emotion, 0) + n
+
+    dominant: Optional[Tuple[str, int]] = max(emotion_totals.items(), key=lambda x: x[1]) if emotion_totals else None
+    return {
+        "userId": user_id,
+        "period": period,
+        "start": start_day.isoformat(),
+        "end": end_day.isoformat(),
+        "buckets": buckets,
+        "totals": {
+            "count": total_count,
+            "avgIntensity": round(total_intensity / total_count, 2) if total_count else 0,
+            "emotions": emotion_totals,
+            "dominantEmotion": dominant[0] if dominant else None
+        }
+    }
@@ -1,20 +1,20 @@
 import os
 import json
 from dotenv import load_dotenv
-from openai import OpenAI
+from app.services.llm_client_registry import get_openai_client
 from app.services.unified_gpt_service import UnifiedGPTService
+from utils.logger import get_logger
 
 # 환경변수 로드
 load_dotenv()
+logger = get_logger(__name__)
 
-# OpenAI 클라이언트 초기화
+# OpenAI API 키 확인 (클라이언트는 첫 호출 시 생성)
 api_key = os.environ.get("OPENAI_API_KEY")
 if not api_key:
-    print("⚠️ 경고: OPENAI_API_KEY가 설정되지 않았습니다!")
+    logger.warning("⚠️ 경고: OPENAI_API_KEY가 설정되지 않았습니다!")
 else:
-    print(f"✅ API Key 로드됨: sk-...{api_key[-4:]}")
-
-client = OpenAI(api_key=api_key)
+    logger.info("✅ API Key 로드됨: sk-...%s", api_key[-4:])
 
 # 통합 서비스 인스턴스
 unified_service = UnifiedGPTService()
@@ -63,7 +63,7 @@ def generate_4cuts(text, emotion):
             }}
             """
             
-            response = client.chat.completions.create(
+            response = get_openai_client().chat.completions.create(
                 model="gpt-4",  # GPT-4 사용
                 messages=[
                     {"role": "system", "content": "당신은 일상을 웹툰으로 만드는 전문가입니다."},
@@ -76,7 +76,7 @@ def generate_4cuts(text, emotion):
             story_result = json.loads(response.choices[0].message.content)
             
         except Exception as gpt_error:
-            print(f"GPT-4 스토리 생성 실패, 통합 서비스 사용: {gpt_error}")
+            logger.warning("GPT-4 스토리 생성 실패, 통합 서비스 사용: %s", gpt_error)
             story_result = unified_service.create_webtoon_story(analysis, "캐릭터")
                 
         # 기존 형식으로 변환 (호환성 유지)
@@ -91,11 +91,11 @@ def generate_4cuts(text, emotion):
                 result[f'cut{i+1}'] = f"{i+1}번째 장면"
                 result[f'bubble{i+1}'] = "..."
                 
-        print("✅ 4컷 웹툰 생성 완료!")
+        logger.info("✅ 4컷 웹툰 생성 완료!")
         return result
             
     except Exception as e:
-        print(f"❌ GPT API 오류: {type(e).__name__}: {str(e)}")
+        logger.error("❌ GPT API 오류: %s: %s", type(e).__name__, e)
                 
         # 자세한 오류 메시지
         if "insufficient_quota" in str(e):
@@ -130,7 +130,7 @@ def generate_story_from_diary(diary_text):
             'success': True
         }
     except Exception as e:
-        print(f"스토리 생성 오류: {e}")
+        logger.warning("스토리 생성 오류: %s", e)
         return {
             'analysis': None,
             'story': None,
@@ -169,7 +169,7 @@ def generate_daily_webtoon(diary_text, emotion):
             }
             
     except Exception as e:
-        print(f"일일 웹툰 생성 오류: {e}")
+        logger.warning("일일 웹툰 생성 오류: %s", e)
         return {
             'scene': "오늘의 한 장면",
             'dialogue': "일기를 작성해주세요.",
@@ -0,0 +1,93 @@
+import hashlib
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from app.services.llm_client_registry import get_openai_client
+from utils.cache import PersistentLRUCache
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# DALL-E 생성 결과 캐시 설정 (기본 꺼짐 - 같은 프롬프트면 같은 이미지를 돌려주므로 opt-in)
+IMAGE_CACHE_ENABLED = os.getenv('IMAGE_CACHE_ENABLED', 'false').lower() == 'true'
+IMAGE_CACHE_TTL = float(os.getenv('IMAGE_CACHE_TTL', 7 * 24 * 3600))
+IMAGE_CACHE_PATH = os.getenv('IMAGE_CACHE_PATH', os.path.join('data', 'image_cache.sqlite3'))
+IMAGE_CACHE_MEMORY_SIZE = int(os.getenv('IMAGE_CACHE_MEMORY_SIZE', 256))
+IMAGE_CACHE_DISK_SIZE = int(os.getenv('IMAGE_CACHE_DISK_SIZE', 5000))
+
+_image_cache = None
+_image_cache_lock = threading.Lock()
+
+
+def get_image_generation_cache() -> PersistentLRUCache:
+    """프롬프트 해시 → 로컬 저장 이미지 URL 캐시"""
+    global _image_cache
+    if _image_cache is None:
+        with _image_cache_lock:
+            if _image_cache is None:
+                _image_cache = PersistentLRUCache(
+                    IMAGE_CACHE_PATH,
+                    memory_size=IMAGE_CACHE_MEMORY_SIZE,
+                    disk_size=IMAGE_CACHE_DISK_SIZE,
+                    ttl=IMAGE_CACHE_TTL,
+                    name="image_generation"
+                )
+    return _image_cache
+
+
+def make_image_cache_key(prompt: str, **params) -> str:
+    """공백 정리한 프롬프트 + 생성 파라미터(model/size/quality 등)의 해시"""
+    normalized = " ".join((prompt or "").split())
+    raw = "\n".join(f"{name}={params[name]}" for name in sorted(params)) + "\n" + normalized
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _local_file_exists(local_url: str) -> bool:
+    return os.path.exists(os.path.join(*local_url.lstrip("/").split("/")))
+
+
+def generate_image_with_cache(prompt: str, size: str, quality: str,
+                              save_local: Optional[Callable[[str], Optional[str]]] = None,
+                              model: str = "dall-e-3", bypass_cache: bool = False,
+                              on_generated: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    DALL-E 이미지 생성 (같은 프롬프트 + 파라미터면 이미 저장한 로컬 이미지 재사용)
+
+    - save_local(dalle_url) 이 돌려준 로컬 URL 만 캐시 (DALL-E 임시 URL 은 곧 만료되므로)
+    - bypass_cache=True 면 캐시를 보지 않고 새로 생성한 결과로 캐시를 갱신 (다른 변형 강제)
+    - on_generated: 이미지 URL 이 나오면 로컬 저장 전에 호출 (진행 상황 알림용)
+    - 반환값: dalle_url, local_url, cached
+    """
+    use_cache = IMAGE_CACHE_ENABLED and save_local is not None
+    key = make_image_cache_key(prompt, model=model, size=size, quality=quality) if use_cache else None
+
+    if use_cache and not bypass_cache:
+        cached = get_image_generation_cache().get(key)
+        if cached and cached.get("local_url") and _local_file_exists(cached["local_url"]):
+            logger.debug("⚡ 이미지 캐시 적중: %s", cached['local_url'])
+            if on_generated is not None:
+                on_generated({"dalle_url": cached.get("dalle_url"), "cached": True})
+            return {"dalle_url": cached.get("dalle_url"), "local_url": cached["local_url"], "cached": True}
+
+    response = get_openai_client().images.generate(
+        model=model,
+        prompt=prompt,
+        size=size,
+        quality=quality,
+        n=1,
+    )
+    dalle_url = response.data[0].url
+    if on_generated is not None:
+        on_generated({"dalle_url": dalle_url, "cached": False})
+
+    local_url = save_local(dalle_url) if save_local is not None else None
+    if use_cache and local_url:
+        get_image_generation_cache().set(key, {
+            "dalle_url": dalle_url,
+            "local_url": local_url,
+            "created_at": time.time()
+        })
+
+    return {"dalle_url": dalle_url, "local_url": local_url, "cached": False}
@@ -0,0 +1,223 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, Optional
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class JobQueue:
+    """
+    SQLite 기반 내구성 백그라운드 작업 큐
+
+    - 작업은 submit 즉시 DB에 기록되므로 프로세스가 재시작돼도 유지됨
+    - 워커 스레드 풀이 queued 작업을 하나씩 원자적으로 가져가 실행
+    - running 상태로 lease_timeout 초가 지난 작업은 중단된 것으로 보고 다시 가져감
+      (재시작 직전 실행 중이던 작업 복구, 여러 프로세스가 같은 파일을 써도 안전)
+    """
+
+    def __init__(self, path, num_workers=4, lease_timeout=600, max_attempts=3, poll_interval=1.0):
+        self.path = path
+        self.num_workers = num_workers
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+
+        self._handlers: Dict[str, Callable[[Dict], Dict]] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._workers = []
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                job_type TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+
+    def register(self, job_type: str, handler: Callable[[Dict], Dict]):
+        """작업 타입별 실행 함수 등록 (payload dict -> result dict)"""
+        self._handlers[job_type] = handler
+
+    def submit(self, job_type: str, payload: Dict) -> str:
+        """작업 등록 후 바로 job_id 반환"""
+        if job_type not in self._handlers:
+            raise ValueError(f"등록되지 않은 작업 타입: {job_type}")
+
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, job_type, payload, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                (job_id, job_type, json.dumps(payload, ensure_ascii=False), time.time())
+            )
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """작업 상태/결과 조회"""
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT id, job_type, status, result, error, attempts, created_at, started_at, finished_at
+                FROM jobs WHERE id = ?
+                """,
+                (job_id,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        job = {
+            "job_id": row[0],
+            "job_type": row[1],
+            "status": row[2],
+            "result": json.loads(row[3]) if row[3] else None,
+            "error": row[4],
+            "attempts": row[5],
+            "created_at": _to_iso(row[6]),
+            "started_at": _to_iso(row[7]),
+            "finished_at": _to_iso(row[8])
+        }
+        if job["status"] == "queued":
+            job["queue_position"] = self._queue_position(row[6])
+        return job
+
+    def _queue_position(self, created_at):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created_at < ?",
+                (created_at,)
+            ).fetchone()[0] + 1
+
+    def stats(self) -> Dict:
+        """상태별 작업 수"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {status: count for status, count in rows}
+        return {
+            "workers": len(self._workers),
+            "queued": counts.get("queued", 0),
+            "running": counts.get("running", 0),
+            "done": counts.get("done", 0),
+            "failed": counts.get("failed", 0)
+        }
+
+    def _claim(self):
+        """다음 작업을 원자적으로 running 상태로 가져오기"""
+        now = time.time()
+        stale_before = now - self.lease_timeout
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # 재시도 한도를 넘긴 채 중단된 작업은 실패 처리
+                self._conn.execute(
+                    """
+                    UPDATE jobs SET status = 'failed', error = '작업이 시간 내에 끝나지 않았습니다.', finished_at = ?
+                    WHERE status = 'running' AND started_at < ? AND attempts >= ?
+                    """,
+                    (now, stale_before, self.max_attempts)
+                )
+                row = self._conn.execute(
+                    """
+                    SELECT id, job_type, payload, attempts FROM jobs
+                    WHERE status = 'queued'
+                       OR (status = 'running' AND started_at < ? AND attempts < ?)
+                    ORDER BY created_at ASC LIMIT 1
+                    """,
+                    (stale_before, self.max_attempts)
+                ).fetchone()
+
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                    (now, row[0])
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        return {"id": row[0], "job_type": row[1], "payload": json.loads(row[2]), "attempts": row[3] + 1}
+
+    def _finish(self, job_id, status, result=None, error=None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                (
+                    status,
+                    json.dumps(result, ensure_ascii=False) if result is not None else None,
+                    error,
+                    time.time(),
+                    job_id
+                )
+            )
+
+    def _worker_loop(self):
+        while not self._stop.is_set():
+            try:
+                job = self._claim()
+            except Exception as e:
+                logger.error("❌ 작업 큐 조회 오류: %s", e)
+                job = None
+
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            handler = self._handlers.get(job["job_type"])
+            logger.info("🛠️ 작업 시작: %s (%s, 시도 %d)", job['id'], job['job_type'], job['attempts'])
+            try:
+                if handler is None:
+                    raise ValueError(f"등록되지 않은 작업 타입: {job['job_type']}")
+                result = handler(job["payload"])
+                self._finish(job["id"], "done", result=result)
+                logger.info("✅ 작업 완료: %s", job['id'])
+            except Exception as e:
+                logger.error("❌ 작업 실패: %s - %s", job['id'], e)
+                self._finish(job["id"], "failed", error=str(e))
+
+    def start(self):
+        """워커 스레드 시작 (이미 시작됐으면 무시)"""
+        with self._lock:
+            if self._workers:
+                return
+            for i in range(self.num_workers):
+                worker = threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+        logger.info("🛠️ 작업 큐 워커 %s개 시작: %s", self.num_workers, self.path)
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+
+def _to_iso(timestamp):
+    return datetime.fromtimestamp(timestamp).isoformat() if timestamp else None
@@ -0,0 +1,137 @@
+import os
+import threading
+from typing import TYPE_CHECKING, Dict, Optional
+
+from dotenv import load_dotenv
+
+from app.services.llm_usage import AccountedClient
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# openai / httpx 는 임포트가 무거워서 첫 클라이언트 생성 시점에 임포트
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+load_dotenv()
+
+# 커넥션 풀 / 타임아웃 기본값
+OPENAI_MAX_CONNECTIONS = int(os.getenv('OPENAI_MAX_CONNECTIONS', 32))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('OPENAI_MAX_KEEPALIVE_CONNECTIONS', 16))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv('OPENAI_KEEPALIVE_EXPIRY', 60))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv('OPENAI_CONNECT_TIMEOUT', 10))
+OPENAI_READ_TIMEOUT = float(os.getenv('OPENAI_READ_TIMEOUT', 120))
+OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', 2))
+
+_clients: Dict[tuple, "_RegisteredClient"] = {}
+_registry_lock = threading.Lock()
+_counting_transport_class = None
+
+
+def _get_counting_transport_class():
+    """요청 수 / 진행 중 요청 수를 세는 httpx 전송 계층 클래스"""
+    global _counting_transport_class
+    if _counting_transport_class is None:
+        import httpx
+
+        class CountingTransport(httpx.HTTPTransport):
+            def __init__(self, **kwargs):
+                super().__init__(**kwargs)
+                self.requests_total = 0
+                self.in_flight = 0
+                self._lock = threading.Lock()
+
+            def handle_request(self, request):
+                with self._lock:
+                    self.requests_total += 1
+                    self.in_flight += 1
+                try:
+                    return super().handle_request(request)
+                finally:
+                    with self._lock:
+                        self.in_flight -= 1
+
+        _counting_transport_class = CountingTransport
+    return _counting_transport_class
+
+
+class _RegisteredClient:
+    """등록된 클라이언트와 전송 계층"""
+
+    def __init__(self, name, client, transport):
+        self.name = name
+        self.client = client
+        self.transport = transport
+
+    def stats(self):
+        stats = {
+            "name": self.name,
+            "requests_total": self.transport.requests_total,
+            "in_flight": self.transport.in_flight,
+            "max_connections": OPENAI_MAX_CONNECTIONS,
+            "max_keepalive_connections": OPENAI_MAX_KEEPALIVE_CONNECTIONS
+        }
+
+        # httpcore 커넥션 풀 상태 (내부 속성이므로 없으면 생략)
+        try:
+            connections = self.transport._pool.connections
+            idle = sum(1 for conn in connections if conn.is_idle())
+            stats["open_connections"] = len(connections)
+            stats["idle_connections"] = idle
+            stats["active_connections"] = len(connections) - idle
+            stats["utilization"] = round((len(connections) - idle) / OPENAI_MAX_CONNECTIONS, 3)
+        except Exception:
+            pass
+
+        return stats
+
+
+def get_openai_client(timeout: Optional[float] = None, max_retries: Optional[int] = None,
+                      api_key: Optional[str] = None) -> "OpenAI":
+    """
+    설정별로 하나씩만 만들어 공유하는 OpenAI 클라이언트
+
+    OpenAI/httpx 클라이언트는 스레드 안전하므로 모든 모듈이 같은 인스턴스를 쓰고,
+    커넥션 풀(keep-alive)을 공유해 요청마다 TLS 핸드셰이크를 다시 하지 않는다.
+    """
+    api_key = api_key or os.getenv('OPENAI_API_KEY')
+    read_timeout = timeout if timeout is not None else OPENAI_READ_TIMEOUT
+    retries = max_retries if max_retries is not None else OPENAI_MAX_RETRIES
+    key = (api_key, read_timeout, retries)
+
+    registered = _clients.get(key)
+    if registered is not None:
+        return registered.client
+
+    with _registry_lock:
+        registered = _clients.get(key)
+        if registered is None:
+            import httpx
+            from openai import OpenAI, DefaultHttpxClient
+
+            name = f"openai(timeout={read_timeout}, retries={retries})"
+            client_timeout = httpx.Timeout(read_timeout, connect=OPENAI_CONNECT_TIMEOUT)
+            transport = _get_counting_transport_class()(
+                limits=httpx.Limits(
+                    max_connections=OPENAI_MAX_CONNECTIONS,
+                    max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY
+                )
+            )
+            # 호출마다 토큰 / 비용 / 지연시간을 기록하는 래퍼로 감싸서 공유
+            client = AccountedClient(OpenAI(
+                api_key=api_key,
+                http_client=DefaultHttpxClient(transport=transport, timeout=client_timeout),
+                timeout=client_timeout,
+                max_retries=retries
+            ))
+            registered = _RegisteredClient(name, client, transport)
+            _clients[key] = registered
+            logger.info("🔌 OpenAI 클라이언트 생성: %s", name)
+
+    return registered.client
+
+
+def get_client_pool_stats():
+    """등록된 모든 클라이언트의 커넥션 풀 사용량"""
+    return [registered.stats() for registered in list(_clients.values())]
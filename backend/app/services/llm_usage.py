@@ -0,0 +1,404 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Optional
+
+from utils.circuit_breaker import get_breaker
+from utils.deadline import call_timeout, remaining
+from utils.rate_limiter import get_image_admission
+from utils.request_context import current_route, current_user
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 사용량 집계 설정
+LLM_USAGE_DB_PATH = os.getenv('LLM_USAGE_DB_PATH', os.path.join('data', 'llm_usage.sqlite3'))
+LLM_USAGE_FLUSH_INTERVAL = float(os.getenv('LLM_USAGE_FLUSH_INTERVAL', 60))
+LLM_USAGE_LATENCY_SAMPLES = int(os.getenv('LLM_USAGE_LATENCY_SAMPLES', 512))
+
+# 모델별 단가 (USD, 100만 토큰당 입력/출력) - LLM_PRICING_JSON 으로 덮어쓰기 가능
+CHAT_PRICING = {
+    "gpt-4": (30.0, 60.0),
+    "gpt-4-turbo": (10.0, 30.0),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.6),
+    "gpt-3.5-turbo": (0.5, 1.5),
+}
+# 이미지 1장 단가 (USD) - (model, size, quality)
+IMAGE_PRICING = {
+    ("dall-e-3", "1024x1024", "standard"): 0.04,
+    ("dall-e-3", "1024x1024", "hd"): 0.08,
+    ("dall-e-3", "1792x1024", "standard"): 0.08,
+    ("dall-e-3", "1792x1024", "hd"): 0.12,
+    ("dall-e-3", "1024x1792", "standard"): 0.08,
+    ("dall-e-3", "1024x1792", "hd"): 0.12,
+}
+
+_pricing_override = os.getenv('LLM_PRICING_JSON')
+if _pricing_override:
+    CHAT_PRICING.update({model: tuple(prices) for model, prices in json.loads(_pricing_override).items()})
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def estimate_chat_cost(model: Optional[str], prompt_tokens: int, completion_tokens: int) -> float:
+    """토큰 수 → 예상 비용 (단가를 모르는 모델은 0)"""
+    prices = CHAT_PRICING.get(model or "")
+    if prices is None:
+        # gpt-4-turbo-2024-04-09 처럼 날짜가 붙은 이름은 가장 긴 접두어로 찾음
+        matches = [name for name in CHAT_PRICING if (model or "").startswith(name)]
+        prices = CHAT_PRICING[max(matches, key=len)] if matches else (0.0, 0.0)
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+def estimate_image_cost(model: Optional[str], size: Optional[str], quality: Optional[str], count: int = 1) -> float:
+    return IMAGE_PRICING.get((model or "dall-e-2", size or "1024x1024", quality or "standard"), 0.0) * count
+
+
+def _percentile(sorted_values, ratio):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(ratio * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class _Aggregate:
+    """호출 수 / 토큰 / 이미지 / 비용 / 지연시간 누적"""
+
+    __slots__ = ("calls", "errors", "prompt_tokens", "completion_tokens", "images", "cost_usd",
+                 "latency_ms_sum", "latency_ms_max", "latencies")
+
+    def __init__(self, keep_samples=False):
+        self.calls = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.images = 0
+        self.cost_usd = 0.0
+        self.latency_ms_sum = 0.0
+        self.latency_ms_max = 0.0
+        self.latencies = deque(maxlen=LLM_USAGE_LATENCY_SAMPLES) if keep_samples else None
+
+    def add(self, record):
+        self.calls += 1
+        self.errors += 1 if record["error"] else 0
+        self.prompt_tokens += record["prompt_tokens"]
+        self.completion_tokens += record["completion_tokens"]
+        self.images += record["images"]
+        self.cost_usd += record["cost_usd"]
+        self.latency_ms_sum += record["latency_ms"]
+        self.latency_ms_max = max(self.latency_ms_max, record["latency_ms"])
+        if self.latencies is not None:
+            self.latencies.append(record["latency_ms"])
+
+    def to_dict(self):
+        result = {
+            "calls": self.calls,
+            "errors": self.errors,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "images": self.images,
+            "cost_usd": round(self.cost_usd, 6),
+            "latency_ms": {
+                "avg": round(self.latency_ms_sum / self.calls, 1) if self.calls else 0.0,
+                "max": round(self.latency_ms_max, 1)
+            }
+        }
+        if self.latencies is not None:
+            samples = sorted(self.latencies)
+            result["latency_ms"].update({
+                "p50": round(_percentile(samples, 0.50), 1),
+                "p95": round(_percentile(samples, 0.95), 1),
+                "p99": round(_percentile(samples, 0.99), 1)
+            })
+        return result
+
+
+class UsageTracker:
+    """
+    LLM / 이미지 호출 사용량 집계
+
+    - 메모리: 라우트별 / 모델별 / 사용자별 누적 (라우트는 최근 지연시간 샘플로 p50/p95/p99)
+    - 디스크: flush_interval 초마다 시간 단위 버킷으로 SQLite 에 더해서 저장 (재시작 후에도 조회)
+    """
+
+    def __init__(self, path=LLM_USAGE_DB_PATH, flush_interval=LLM_USAGE_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.started_at = time.time()
+
+        self._lock = threading.Lock()
+        self._by_route: Dict[str, _Aggregate] = {}
+        self._by_model: Dict[str, _Aggregate] = {}
+        self._by_user: Dict[str, _Aggregate] = {}
+        self._pending: Dict[tuple, _Aggregate] = {}  # 아직 디스크에 안 쓴 (hour, route, user, model, kind)
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_usage (
+                hour TEXT NOT NULL,
+                route TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                model TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                calls INTEGER NOT NULL,
+                errors INTEGER NOT NULL,
+                prompt_tokens INTEGER NOT NULL,
+                completion_tokens INTEGER NOT NULL,
+                images INTEGER NOT NULL,
+                cost_usd REAL NOT NULL,
+                latency_ms_sum REAL NOT NULL,
+                PRIMARY KEY (hour, route, user_id, model, kind)
+            )
+            """
+        )
+        self._db_lock = threading.Lock()
+
+        self._flusher = threading.Thread(target=self._flush_loop, name="llm-usage-flush", daemon=True)
+        self._flusher.start()
+
+    def record(self, kind, model, latency_ms, prompt_tokens=0, completion_tokens=0,
+               images=0, size=None, quality=None, error=False, route=None, user_id=None):
+        """호출 1건 기록 (route / user_id 를 안 주면 현재 요청 컨텍스트에서 가져옴)"""
+        if kind == "image":
+            cost = estimate_image_cost(model, size, quality, images)
+        else:
+            cost = estimate_chat_cost(model, prompt_tokens, completion_tokens)
+
+        record = {
+            "prompt_tokens": prompt_tokens or 0,
+            "completion_tokens": completion_tokens or 0,
+            "images": images,
+            "cost_usd": cost,
+            "latency_ms": latency_ms,
+            "error": error
+        }
+        route = route or current_route.get()
+        user_id = user_id or current_user.get()
+        model_key = f"{model}:{size}:{quality}" if kind == "image" else str(model)
+        hour = datetime.now().strftime("%Y-%m-%dT%H:00")
+
+        with self._lock:
+            self._by_route.setdefault(route, _Aggregate(keep_samples=True)).add(record)
+            self._by_model.setdefault(model_key, _Aggregate()).add(record)
+            self._by_user.setdefault(user_id, _Aggregate()).add(record)
+            self._pending.setdefault((hour, route, user_id, model_key, kind), _Aggregate()).add(record)
+        return cost
+
+    def snapshot(self, top_users=20):
+        """프로세스 시작 이후 메모리 집계"""
+        with self._lock:
+            users = sorted(self._by_user.items(), key=lambda item: item[1].cost_usd, reverse=True)[:top_users]
+            return {
+                "since": datetime.fromtimestamp(self.started_at).isoformat(),
+                "by_route": {route: agg.to_dict() for route, agg in self._by_route.items()},
+                "by_model": {model: agg.to_dict() for model, agg in self._by_model.items()},
+                "top_users": {user: agg.to_dict() for user, agg in users}
+            }
+
+    def flush(self):
+        """쌓인 집계를 시간 버킷에 더해서 저장"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        rows = [
+            (hour, route, user_id, model, kind, agg.calls, agg.errors, agg.prompt_tokens,
+             agg.completion_tokens, agg.images, agg.cost_usd, agg.latency_ms_sum)
+            for (hour, route, user_id, model, kind), agg in pending.items()
+        ]
+        with self._db_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    """
+                    INSERT INTO llm_usage VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (hour, route, user_id, model, kind) DO UPDATE SET
+                        calls = calls + excluded.calls,
+                        errors = errors + excluded.errors,
+                        prompt_tokens = prompt_tokens + excluded.prompt_tokens,
+                        completion_tokens = completion_tokens + excluded.completion_tokens,
+                        images = images + excluded.images,
+                        cost_usd = cost_usd + excluded.cost_usd,
+                        latency_ms_sum = latency_ms_sum + excluded.latency_ms_sum
+                    """,
+                    rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning("⚠️ LLM 사용량 저장 실패: %s", e)
+
+    def persisted_summary(self, hours=24):
+        """최근 hours 시간 동안 저장된 사용량 (라우트별 / 사용자 상위)"""
+        self.flush()
+        since = datetime.fromtimestamp(time.time() - hours * 3600).strftime("%Y-%m-%dT%H:00")
+        columns = ("calls", "errors", "prompt_tokens", "completion_tokens", "images", "cost_usd", "latency_ms_sum")
+        aggregate_sql = ", ".join(f"SUM({column})" for column in columns)
+
+        with self._db_lock:
+            by_route = self._conn.execute(
+                f"SELECT route, {aggregate_sql} FROM llm_usage WHERE hour >= ? GROUP BY route ORDER BY 7 DESC",
+                (since,)
+            ).fetchall()
+            by_user = self._conn.execute(
+                f"SELECT user_id, {aggregate_sql} FROM llm_usage WHERE hour >= ? "
+                f"GROUP BY user_id ORDER BY 7 DESC LIMIT 20",
+                (since,)
+            ).fetchall()
+
+        def to_dict(row):
+            values = dict(zip(columns, row[1:]))
+            values["cost_usd"] = round(values["cost_usd"], 6)
+            values["avg_latency_ms"] = round(values.pop("latency_ms_sum") / values["calls"], 1) if values["calls"] else 0.0
+            return values
+
+        return {
+            "since": since,
+            "by_route": {row[0]: to_dict(row) for row in by_route},
+            "top_users": {row[0]: to_dict(row) for row in by_user}
+        }
+
+
+def get_usage_tracker() -> UsageTracker:
+    """프로세스 공유 사용량 집계기"""
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = UsageTracker()
+    return _tracker
+
+
+def _budgeted_client(client):
+    """
+    현재 요청의 남은 시간 예산에 맞춘 클라이언트 (마감이 없으면 그대로)
+
+    SDK 재시도는 예산을 몇 배로 늘릴 수 있으므로 예산 안에서는 끄고,
+    반복 실패는 서킷 브레이커 + 호출부의 대체 결과로 처리한다.
+    """
+    if remaining() is None:
+        return client
+    default_timeout = getattr(client.timeout, "read", client.timeout)
+    cap = default_timeout if isinstance(default_timeout, (int, float)) else 600
+    return client.with_options(timeout=call_timeout(cap), max_retries=0)
+
+
+class _AccountedCompletions:
+    def __init__(self, client):
+        self._client = client
+        self._completions = client.chat.completions
+
+    def create(self, **kwargs):
+        budgeted = _budgeted_client(self._client)  # 예산 소진이면 서킷에 반영하지 않고 DeadlineExceeded
+        breaker = get_breaker(f"chat:{kwargs.get('model')}")
+        breaker.before_call()
+        started = time.perf_counter()
+        try:
+            response = budgeted.chat.completions.create(**kwargs)
+        except Exception as e:
+            breaker.record_failure(e)
+            get_usage_tracker().record("chat", kwargs.get("model"), (time.perf_counter() - started) * 1000, error=True)
+            raise
+        breaker.record_success()
+
+        usage = getattr(response, "usage", None)
+        get_usage_tracker().record(
+            "chat",
+            getattr(response, "model", None) or kwargs.get("model"),
+            (time.perf_counter() - started) * 1000,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0
+        )
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self._completions, name)
+
+
+class _AccountedChat:
+    def __init__(self, client):
+        self._chat = client.chat
+        self.completions = _AccountedCompletions(client)
+
+    def __getattr__(self, name):
+        return getattr(self._chat, name)
+
+
+class _AccountedImages:
+    def __init__(self, client):
+        self._client = client
+        self._images = client.images
+
+    def generate(self, **kwargs):
+        model = kwargs.get("model", "dall-e-2")
+        size = kwargs.get("size", "1024x1024")
+        quality = kwargs.get("quality", "standard")
+        # 서킷이 열려 있으면 허용량을 쓰거나 기다리지 않고 바로 CircuitOpenError
+        breaker = get_breaker(f"image:{model}")
+        breaker.before_call()
+        try:
+            # 분당 이미지 / 요청 허용량 확인 (차례를 기다린 뒤 남은 예산으로 타임아웃 계산)
+            get_image_admission().acquire(images=kwargs.get("n", 1), requests=1)
+            budgeted = _budgeted_client(self._client)
+        except Exception:
+            breaker.release()
+            raise
+        started = time.perf_counter()
+        try:
+            response = budgeted.images.generate(**kwargs)
+        except Exception as e:
+            breaker.record_failure(e)
+            get_usage_tracker().record("image", model, (time.perf_counter() - started) * 1000,
+                                       size=size, quality=quality, error=True)
+            raise
+        breaker.record_success()
+
+        get_usage_tracker().record("image", model, (time.perf_counter() - started) * 1000,
+                                   images=len(getattr(response, "data", None) or []) or kwargs.get("n", 1),
+                                   size=size, quality=quality)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self._images, name)
+
+
+class AccountedClient:
+    """
+    OpenAI 클라이언트 래퍼 - chat.completions.create / images.generate 호출마다
+    모델, 토큰, 이미지 크기/품질, 지연시간을 현재 라우트 / 사용자 기준으로 기록
+    (나머지 속성은 원래 클라이언트로 그대로 전달)
+
+    호출마다 현재 요청의 남은 시간 예산을 타임아웃으로 넘기고,
+    모델별 서킷이 열려 있으면 호출하지 않고 CircuitOpenError 를 바로 발생시킨다.
+    이미지 생성은 공유 허용량(분당 이미지 / 요청 수)을 먼저 통과해야 한다 (초과 시 AdmissionRejected).
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self.chat = _AccountedChat(client)
+        self.images = _AccountedImages(client)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
@@ -1,15 +1,15 @@
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
+from app.services.llm_client_registry import get_openai_client
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
-load_dotenv()
 
 def summarize_text_service(text: str) -> str:
     """
     텍스트 요약 서비스
     """
     try:
-        client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        client = get_openai_client()
         
         prompt = f"""
         다음 텍스트를 간결하고 핵심적으로 요약해주세요:
@@ -34,12 +34,12 @@ def summarize_text_service(text: str) -> str:
         )
         
         summary = response.choices[0].message.content.strip()
-        print(f"✅ 텍스트 요약 완료: {summary[:50]}...")
+        logger.debug("✅ 텍스트 요약 완료 (%d자)", len(summary))
         
         return summary
         
     except Exception as e:
-        print(f"❌ 텍스트 요약 실패: {e}")
+        logger.error("❌ 텍스트 요약 실패: %s", e)
         # 실패 시 기본 요약 제공
         return text[:100] + "..." if len(text) > 100 else text
 
@@ -48,7 +48,7 @@ def summarize_diary_for_webtoon(diary_text: str) -> str:
     웹툰 생성을 위한 일기 요약 (더 감정 중심)
     """
     try:
-        client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        client = get_openai_client()
         
         prompt = f"""
         다음 일기를 웹툰 제작에 적합하도록 요약해주세요:
@@ -74,12 +74,12 @@ def summarize_diary_for_webtoon(diary_text: str) -> str:
         )
         
         summary = response.choices[0].message.content.strip()
-        print(f"✅ 웹툰용 일기 요약 완료: {summary}")
+        logger.debug("✅ 웹툰용 일기 요약 완료 (%d자)", len(summary))
         
         return summary
         
     except Exception as e:
-        print(f"❌ 웹툰용 일기 요약 실패: {e}")
+        logger.error("❌ 웹툰용 일기 요약 실패: %s", e)
         return diary_text[:80] + "..." if len(diary_text) > 80 else diary_text
 
 def generate_scene_description(diary_text: str, emotion: str) -> str:
@@ -87,7 +87,7 @@ def generate_scene_description(diary_text: str, emotion: str) -> str:
     일기와 감정을 바탕으로 웹툰 장면 설명 생성
     """
     try:
-        client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        client = get_openai_client()
         
         prompt = f"""
         일기 내용과 감정을 바탕으로 웹툰 장면을 상세히 묘사해주세요:
@@ -114,10 +114,10 @@ def generate_scene_description(diary_text: str, emotion: str) -> str:
         )
         
         description = response.choices[0].message.content.strip()
-        print(f"✅ 장면 설명 생성 완료: {description[:50]}...")
+        logger.debug("✅ 장면 설명 생성 완료 (%d자)", len(description))
         
         return description
         
     except Exception as e:
-        print(f"❌ 장면 설명 생성 실패: {e}")
+        logger.error("❌ 장면 설명 생성 실패: %s", e)
         return f"{emotion} 감정이 느껴지는 일상의 한 장면"
\ No newline at end of file
@@ -1,23 +1,103 @@
 import json
-from typing import Dict, List
+import hashlib
+import threading
+import time
+import unicodedata
+from typing import Callable, Dict, List, Optional
 import os
 from dotenv import load_dotenv
-from openai import OpenAI
+from app.services.llm_client_registry import get_openai_client
+from app.services.llm_usage import estimate_chat_cost
+from utils.cache import PersistentLRUCache
+from utils.circuit_breaker import fallback_reason
+from utils.tracing import traced
+from utils.logger import get_logger
 
 load_dotenv()
+logger = get_logger(__name__)
+
+# 일기 분석 모델 / 프롬프트 버전 (프롬프트를 바꾸면 버전을 올려서 기존 캐시 무효화)
+ANALYSIS_MODEL = "gpt-4-turbo"
+ANALYSIS_PROMPT_VERSION = "v1"
+
+# 일기 → 웹툰 스토리 생성 방식
+# two_step: 분석 호출 후 스토리 호출 (기존), combined: 분석 + 1컷 스토리를 한 번의 JSON 응답으로
+DIARY_STORY_MODE = os.getenv('DIARY_STORY_MODE', 'two_step').lower()
+
+# 분석 결과 캐시 설정
+ANALYSIS_CACHE_PATH = os.getenv('ANALYSIS_CACHE_PATH', os.path.join('data', 'analysis_cache.sqlite3'))
+ANALYSIS_CACHE_MEMORY_SIZE = int(os.getenv('ANALYSIS_CACHE_MEMORY_SIZE', 256))
+ANALYSIS_CACHE_DISK_SIZE = int(os.getenv('ANALYSIS_CACHE_DISK_SIZE', 5000))
+
+_analysis_cache = None
+_analysis_cache_lock = threading.Lock()
+
+def get_analysis_cache() -> PersistentLRUCache:
+    """프로세스 전체에서 공유하는 일기 분석 캐시"""
+    global _analysis_cache
+    if _analysis_cache is None:
+        with _analysis_cache_lock:
+            if _analysis_cache is None:
+                _analysis_cache = PersistentLRUCache(
+                    ANALYSIS_CACHE_PATH,
+                    memory_size=ANALYSIS_CACHE_MEMORY_SIZE,
+                    disk_size=ANALYSIS_CACHE_DISK_SIZE,
+                    name="diary_analysis"
+                )
+    return _analysis_cache
+
+def normalize_diary_text(text: str) -> str:
+    """캐시 키용 정규화 (유니코드 NFC + 공백 정리)"""
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+def make_analysis_cache_key(text: str, model: str = ANALYSIS_MODEL,
+                            prompt_version: str = ANALYSIS_PROMPT_VERSION) -> str:
+    """정규화된 텍스트 + 모델 + 프롬프트 버전의 해시"""
+    raw = f"{model}\n{prompt_version}\n{normalize_diary_text(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
 
 class UnifiedGPTService:
-    def __init__(self):
-        # 새 OpenAI 클라이언트 방식
-        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    def __init__(self, cache: Optional[PersistentLRUCache] = None):
+        self.cache = cache
+        
+    @property
+    def client(self):
+        # 공유 OpenAI 클라이언트 (커넥션 풀 재사용, 첫 사용 시 생성)
+        return get_openai_client()
         
+    def _get_cache(self) -> Optional[PersistentLRUCache]:
+        if self.cache is None:
+            try:
+                self.cache = get_analysis_cache()
+            except Exception as e:
+                logger.warning("⚠️ 분석 캐시 사용 불가: %s", e)
+        return self.cache
+        
+    @traced("analyze_diary")
     def analyze_diary(self, text: str) -> Dict:
         """
         일기 텍스트를 한 번에 분석 (감정 + 요약 + 키워드)
+        
+        같은 텍스트(정규화 기준)는 캐시된 결과를 반환하고,
+        분석에 성공한 결과만 캐시에 저장한다.
         """
+        cache = self._get_cache()
+        cache_key = make_analysis_cache_key(text)
+        
+        if cache is not None:
+            try:
+                cached = cache.get(cache_key)
+            except Exception as cache_error:
+                logger.warning("⚠️ 분석 캐시 조회 실패: %s", cache_error)
+                cached = None
+            
+            if cached is not None:
+                logger.debug("⚡ 일기 분석 캐시 적중")
+                return cached
+        
         try:
             response = self.client.chat.completions.create(
-                model="gpt-4-turbo",  # JSON 응답 형식을 지원하는 모델
+                model=ANALYSIS_MODEL,  # JSON 응답 형식을 지원하는 모델
                 messages=[
                     {
                         "role": "system",
@@ -43,30 +123,158 @@ class UnifiedGPTService:
             )
             
             result = json.loads(response.choices[0].message.content)
+            analysis = self._build_analysis(result)
+            self._store_analysis(cache, cache_key, analysis)
+            return analysis
             
-            # 기본 구조 보장
-            return {
-                "emotion": result.get("emotion", "평온"),
-                "emotion_intensity": result.get("emotion_intensity", 5),
-                "sub_emotions": result.get("sub_emotions", []),
-                "summary": result.get("summary", ""),
-                "keywords": result.get("keywords", []),
-                "one_line": result.get("one_line", ""),
-                "analysis_success": True
-            }
+        except Exception as e:
+            logger.warning("GPT 분석 오류: %s", e)
+            return self._fallback_analysis(text, fallback_reason(e))
+    
+    @staticmethod
+    def _build_analysis(result: Dict) -> Dict:
+        """모델 응답 → 분석 결과 (기본 구조 보장)"""
+        return {
+            "emotion": result.get("emotion", "평온"),
+            "emotion_intensity": result.get("emotion_intensity", 5),
+            "sub_emotions": result.get("sub_emotions", []),
+            "summary": result.get("summary", ""),
+            "keywords": result.get("keywords", []),
+            "one_line": result.get("one_line", ""),
+            "analysis_success": True
+        }
+    
+    @staticmethod
+    def _fallback_analysis(text: str, reason: str = "error") -> Dict:
+        """분석 실패 / 서킷 open / 시간 예산 소진 시 대체 결과 (fallback_reason 으로 구분)"""
+        return {
+            "emotion": "평온",
+            "emotion_intensity": 5,
+            "sub_emotions": ["차분함"],
+            "summary": text[:100] + "..." if len(text) > 100 else text,
+            "keywords": ["일상", "하루"],
+            "one_line": "평범하지만 소중한 하루였습니다.",
+            "analysis_success": False,
+            "fallback_reason": reason
+        }
+    
+    @staticmethod
+    def _store_analysis(cache: Optional[PersistentLRUCache], cache_key: str, analysis: Dict):
+        if cache is not None:
+            try:
+                cache.set(cache_key, analysis)
+            except Exception as cache_error:
+                logger.warning("⚠️ 분석 캐시 저장 실패: %s", cache_error)
+    
+    @staticmethod
+    def _is_valid_story(story: Dict) -> bool:
+        """create_webtoon_story 와 같은 구조인지 확인 (panels[0] 에 scene / dialogue 문자열)"""
+        panels = story.get("panels") if isinstance(story, dict) else None
+        if not isinstance(panels, list) or not panels or not isinstance(panels[0], dict):
+            return False
+        return all(isinstance(panels[0].get(field), str) and panels[0][field].strip()
+                   for field in ("scene", "dialogue"))
+    
+    def analyze_and_create_story(self, text: str, character_name: str,
+                                 on_analysis: Optional[Callable[[Dict], None]] = None):
+        """
+        일기 분석 + 1컷 웹툰 스토리 (DIARY_STORY_MODE 에 따라 호출 방식 선택)
+        
+        on_analysis: 분석 결과가 나오는 즉시 호출 (2단계 방식이면 스토리 생성 전에)
+        반환값: (analysis, story_result) - analyze_diary / create_webtoon_story 결과와 같은 구조
+        """
+        if DIARY_STORY_MODE == "combined":
+            analysis, story_result = self.analyze_diary_with_story(text, character_name)
+            if on_analysis is not None:
+                on_analysis(analysis)
+            return analysis, story_result
+        
+        analysis = self.analyze_diary(text)
+        if on_analysis is not None:
+            on_analysis(analysis)
+        return analysis, self.create_webtoon_story(analysis, character_name)
+    
+    @traced("analyze_diary_with_story")
+    def analyze_diary_with_story(self, text: str, character_name: str):
+        """
+        분석과 1컷 스토리를 한 번의 JSON 응답으로 생성 (LLM 왕복 1회 절약)
+        
+        - 분석 캐시에 있으면 스토리만 생성 (어차피 1회 호출)
+        - 응답 구조가 맞지 않으면 기존 2단계 방식으로 다시 생성
+        - 제공자 장애 / 서킷 open / 시간 예산 소진이면 다시 호출하지 않고 바로 대체 결과
+        - 성공한 분석 결과는 analyze_diary 와 같은 캐시 키로 저장
+        """
+        cache = self._get_cache()
+        cache_key = make_analysis_cache_key(text)
+        
+        if cache is not None:
+            try:
+                cached = cache.get(cache_key)
+            except Exception as cache_error:
+                logger.warning("⚠️ 분석 캐시 조회 실패: %s", cache_error)
+                cached = None
+            
+            if cached is not None:
+                logger.debug("⚡ 일기 분석 캐시 적중")
+                return cached, self.create_webtoon_story(cached, character_name)
+        
+        try:
+            response = self.client.chat.completions.create(
+                model=ANALYSIS_MODEL,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": f"""당신은 일기 분석 전문가이자 감성적인 웹툰 작가입니다.
+                        사용자의 일기를 분석하고, 그 결과로 캐릭터 '{character_name}'의 하루를 1컷 웹툰으로 만들어
+                        JSON 형식으로 반환하세요:
+                        {{
+                            "analysis": {{
+                                "emotion": "기쁨/슬픔/분노/불안/평온 중 하나",
+                                "emotion_intensity": 1-10 사이의 숫자,
+                                "sub_emotions": ["부가 감정 2-3개"],
+                                "summary": "일기를 2-3문장으로 요약",
+                                "keywords": ["주요 키워드 3-5개"],
+                                "one_line": "하루를 한 문장으로 표현"
+                            }},
+                            "panels": [
+                                {{
+                                    "scene": "장면 상세 묘사 (캐릭터의 위치, 표정, 행동, 배경 등 - 웹툰으로 그릴 수 있게)",
+                                    "dialogue": "캐릭터 대사나 독백 (감정에 맞는 자연스러운 말)"
+                                }}
+                            ]
+                        }}
+                        """
+                    },
+                    {
+                        "role": "user",
+                        "content": f"다음 일기를 분석하고 1컷 웹툰으로 만들어주세요:\n\n{text}"
+                    }
+                ],
+                temperature=0.7,
+                response_format={"type": "json_object"}
+            )
             
+            result = json.loads(response.choices[0].message.content)
+            if not isinstance(result.get("analysis"), dict) or not self._is_valid_story(result):
+                raise ValueError("응답 구조 불일치 (analysis / panels)")
+            
+            analysis = self._build_analysis(result["analysis"])
+            self._store_analysis(cache, cache_key, analysis)
+            return analysis, {"panels": result["panels"][:1]}
+            
+        except (ValueError, KeyError, TypeError, IndexError, AttributeError) as e:
+            # 응답이 JSON 이 아니거나 구조가 다름 (JSONDecodeError 는 ValueError) → 2단계 방식으로 재시도
+            logger.warning("⚠️ 분석+스토리 통합 응답 형식 오류, 2단계 방식으로 재시도: %s", e)
+            analysis = self.analyze_diary(text)
+            return analysis, self.create_webtoon_story(analysis, character_name)
         except Exception as e:
-            print(f"GPT 분석 오류: {e}")
-            return {
-                "emotion": "평온",
-                "emotion_intensity": 5,
-                "sub_emotions": ["차분함"],
-                "summary": text[:100] + "..." if len(text) > 100 else text,
-                "keywords": ["일상", "하루"],
-                "one_line": "평범하지만 소중한 하루였습니다.",
-                "analysis_success": False
-            }
+            # 같은 제공자에 2번 더 보내도 실패할 가능성이 높으므로 바로 대체 결과
+            reason = fallback_reason(e)
+            logger.warning("⚠️ 분석+스토리 통합 생성 실패 (%s), 대체 결과 사용: %s", reason, e)
+            analysis = self._fallback_analysis(text, reason)
+            return analysis, self._fallback_story(analysis, reason)
     
+    @traced("create_webtoon_story")
     def create_webtoon_story(self, analysis: Dict, character_name: str) -> Dict:
         """
         분석 결과를 바탕으로 웹툰 스토리 생성 (1컷 버전)
@@ -111,15 +319,22 @@ class UnifiedGPTService:
             return json.loads(response.choices[0].message.content)
             
         except Exception as e:
-            print(f"스토리 생성 오류: {e}")
-            return {
-                "panels": [
-                    {
-                        "scene": f"{analysis['emotion']} 감정이 느껴지는 하루의 한 장면",
-                        "dialogue": analysis.get('one_line', '오늘도 소중한 하루였어요.')
-                    }
-                ]
-            }
+            logger.warning("스토리 생성 오류: %s", e)
+            return self._fallback_story(analysis, fallback_reason(e))
+    
+    @staticmethod
+    def _fallback_story(analysis: Dict, reason: str = "error") -> Dict:
+        """스토리 생성 실패 시 분석 결과로 만드는 1컷 대체 스토리"""
+        return {
+            "panels": [
+                {
+                    "scene": f"{analysis['emotion']} 감정이 느껴지는 하루의 한 장면",
+                    "dialogue": analysis.get('one_line', '오늘도 소중한 하루였어요.')
+                }
+            ],
+            "fallback": True,
+            "fallback_reason": reason
+        }
     
     def create_weekly_story(self, daily_analyses: List[Dict]) -> Dict:
         """
@@ -164,10 +379,12 @@ class UnifiedGPTService:
             }
             
         except Exception as e:
-            print(f"주간 스토리 생성 오류: {e}")
+            logger.warning("주간 스토리 생성 오류: %s", e)
             return {
                 "weekly_story": "주간 스토리 생성 중 오류가 발생했습니다.",
-                "emotion_journey": []
+                "emotion_journey": [],
+                "fallback": True,
+                "fallback_reason": fallback_reason(e)
             }
     
     def create_weekly_narrative(self, daily_analyses: List[Dict]) -> Dict:
@@ -175,7 +392,8 @@ class UnifiedGPTService:
         🔥 새로운 함수: 일주일 분석 결과를 연결된 내레이션으로 만들기 (이미지 생성 없음!)
         """
         try:
-            print(f"📝 주간 내레이션 생성 시작: {len(daily_analyses)}일치")
+            logger.debug("📝 주간 내레이션 생성 시작: %d일치", len(daily_analyses))
+            started = time.perf_counter()
             
             # 주간 감정 흐름 생성
             emotion_flow = [d['emotion'] for d in daily_analyses]
@@ -229,6 +447,13 @@ class UnifiedGPTService:
             )
             
             result = json.loads(response.choices[0].message.content)
+            elapsed = time.perf_counter() - started
+            
+            # 실제 사용량 기준 비용
+            usage = getattr(response, "usage", None)
+            prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+            completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+            cost_usd = estimate_chat_cost("gpt-4-turbo", prompt_tokens, completion_tokens)
             
             # 감정 통계 추가
             emotion_stats = {}
@@ -242,19 +467,25 @@ class UnifiedGPTService:
                 "emotion_flow": emotion_flow,
                 "emotion_stats": emotion_stats,
                 "week_dominant_emotion": max(emotion_stats.items(), key=lambda x: x[1])[0] if emotion_stats else "평온",
-                "generation_cost": "텍스트만 생성 - 매우 저렴!",
-                "generation_time": "5-15초",
-                "cost_saving": "기존 대비 99% 절약"
+                "generation_cost": f"${cost_usd:.4f} (텍스트만 생성)",
+                "generation_time": f"{elapsed:.1f}초",
+                "cost_saving": "기존 대비 99% 절약",
+                "usage": {
+                    "model": "gpt-4-turbo",
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "cost_usd": round(cost_usd, 6),
+                    "latency_ms": round(elapsed * 1000, 1)
+                }
             }
             
-            print(f"✅ 주간 내레이션 생성 완료!")
-            print(f"📊 주요 감정: {final_result['week_dominant_emotion']}")
-            print(f"💰 비용: {final_result['generation_cost']}")
+            logger.info("✅ 주간 내레이션 생성 완료 (주요 감정: %s, 비용: %s)",
+                        final_result['week_dominant_emotion'], final_result['generation_cost'])
             
             return final_result
             
         except Exception as e:
-            print(f"❌ 주간 내레이션 생성 오류: {e}")
+            logger.error("❌ 주간 내레이션 생성 오류: %s", e)
             
             # 에러 발생시 기본 내레이션 생성
             day_names = ['월', '화', '수', '목', '금', '토', '일']
@@ -281,7 +512,9 @@ class UnifiedGPTService:
                 "emotion_stats": {},
                 "week_dominant_emotion": "평온",
                 "generation_cost": "오류 발생 - 무료 대체 버전",
-                "error": str(e)
+                "error": str(e),
+                "fallback": True,
+                "fallback_reason": fallback_reason(e)
             }
     
     def generate_webtoon_prompt(self, panel_info: Dict, character_description: str, emotion: str) -> str:
@@ -0,0 +1,108 @@
+# bench_requests.py - 요청 1건당 서버 처리 오버헤드 측정 (Flask 테스트 클라이언트, 네트워크 제외)
+#
+# 사용법 (backend 폴더에서):
+#   python bench_requests.py                          # /static, /api/diary/list 각 2000회
+#   python bench_requests.py --requests 5000 --env LOG_LEVEL=WARNING
+#   python bench_requests.py --app-dir /tmp/before/backend   # 다른 체크아웃과 비교 (git worktree add /tmp/before <커밋>)
+#
+# /api/diary/list 는 Firestore 가 필요함 (firebase-key.json 또는 FIRESTORE_EMULATOR_HOST).
+# 연결이 안 되면 오류 응답 경로를 재게 되므로 상태 코드 분포를 같이 출력한다.
+# 앱 로그(stdout)는 기본적으로 파이프로 받아서 버림 (컨테이너 / systemd 로그 수집과 같은 조건).
+#   --stdout devnull 이면 /dev/null 로 바로 씀 (쓰기 비용 제외)
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+DEFAULT_PATHS = ["/static/bench_sample.txt", "/api/diary/list?userId=bench&limit=20"]
+
+# 새 프로세스에서 실행되는 측정 코드 (결과는 stderr 마지막 줄 JSON)
+CHILD_CODE = """
+import json, os, sys, time
+from collections import Counter
+sys.path.insert(0, os.getcwd())
+from app import create_app
+
+paths, requests, warmup = json.loads(sys.argv[1]), int(sys.argv[2]), int(sys.argv[3])
+sample = os.path.join("static", "bench_sample.txt")
+created = not os.path.exists(sample)
+if created:
+    os.makedirs("static", exist_ok=True)
+    with open(sample, "w") as f:
+        f.write("x" * 1024)
+
+app = create_app()
+client = app.test_client()
+results = {}
+try:
+    for path in paths:
+        for _ in range(warmup):
+            client.get(path).close()
+        timings, statuses = [], Counter()
+        for _ in range(requests):
+            t0 = time.perf_counter()
+            response = client.get(path)
+            response.get_data()
+            timings.append(time.perf_counter() - t0)
+            statuses[response.status_code] += 1
+            response.close()
+        timings.sort()
+        results[path] = {
+            "p50": timings[len(timings) // 2],
+            "p99": timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+            "mean": sum(timings) / len(timings),
+            "statuses": dict(statuses)
+        }
+finally:
+    if created:
+        os.remove(sample)
+
+sys.stderr.write("\\n" + json.dumps(results) + "\\n")
+"""
+
+
+def run_once(app_dir, env, paths, requests, warmup, stdout):
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD_CODE, json.dumps(paths), str(requests), str(warmup)],
+        cwd=app_dir, env=env, stderr=subprocess.PIPE, text=True,
+        stdout=subprocess.PIPE if stdout == "pipe" else subprocess.DEVNULL
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "측정 실패")
+    return json.loads(result.stderr.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="요청 1건당 서버 처리 오버헤드 측정")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=3, help="프로세스 반복 횟수 (중앙값 사용)")
+    parser.add_argument("--path", action="append", dest="paths", help="측정할 경로 (여러 번 지정 가능)")
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE 환경변수 추가")
+    parser.add_argument("--stdout", choices=["pipe", "devnull"], default="pipe", help="앱 로그 출력 대상")
+    parser.add_argument("--app-dir", default=os.path.dirname(os.path.abspath(__file__)))
+    args = parser.parse_args()
+
+    paths = args.paths or DEFAULT_PATHS
+    env = dict(os.environ)
+    env.setdefault("WEBTOON_JOB_AUTOSTART", "false")
+    for item in args.env:
+        key, _, value = item.partition("=")
+        env[key] = value
+
+    print(f"🚀 요청 오버헤드 측정: {args.app_dir} ({args.runs}회 x {args.requests}요청, stdout={args.stdout})")
+    runs = [run_once(args.app_dir, env, paths, args.requests, args.warmup, args.stdout) for _ in range(args.runs)]
+
+    for path in paths:
+        p50 = statistics.median(r[path]["p50"] * 1e6 for r in runs)
+        p99 = statistics.median(r[path]["p99"] * 1e6 for r in runs)
+        mean = statistics.median(r[path]["mean"] * 1e6 for r in runs)
+        statuses = runs[-1][path]["statuses"]
+        print(f"  {path}")
+        print(f"    p50 {p50:8.1f}µs  p99 {p99:8.1f}µs  평균 {mean:8.1f}µs  상태 코드 {statuses}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# bench_startup.py - 앱 콜드 스타트 시간 측정
+#
+# 사용법 (backend 폴더에서):
+#   python bench_startup.py                 # 기본 5회
+#   python bench_startup.py --runs 10 --fast
+#   python bench_startup.py --importtime    # 느린 임포트 모듈 상위 목록
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# 새 프로세스에서 실행되는 측정 코드 (매번 콜드 스타트)
+CHILD_CODE = """
+import json, time, io, contextlib
+t0 = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    from app import create_app
+    t1 = time.perf_counter()
+    app = create_app()
+t2 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "create_app": t2 - t1, "total": t2 - t0}))
+"""
+
+
+def run_once(env):
+    output = subprocess.check_output([sys.executable, "-c", CHILD_CODE], env=env, text=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def print_import_times(env, top):
+    """python -X importtime 결과에서 누적 시간이 큰 모듈 출력"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "from app import create_app"],
+        env=env, capture_output=True, text=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+
+    rows.sort(reverse=True)
+    print(f"\n📦 누적 임포트 시간 상위 {top}개")
+    for cumulative_us, self_us, name in rows[:top]:
+        print(f"  {cumulative_us / 1000:8.1f}ms (self {self_us / 1000:6.1f}ms)  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="앱 콜드 스타트 시간 측정")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--fast", action="store_true", help="FAST_STARTUP=true 로 측정")
+    parser.add_argument("--importtime", action="store_true", help="임포트 시간 상위 모듈 출력")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.fast:
+        env["FAST_STARTUP"] = "true"
+
+    print(f"🚀 콜드 스타트 측정: {args.runs}회 (FAST_STARTUP={env.get('FAST_STARTUP', 'false')})")
+    results = [run_once(env) for _ in range(args.runs)]
+
+    for key in ("import", "create_app", "total"):
+        values = [r[key] * 1000 for r in results]
+        print(f"  {key:<11} 중앙값 {statistics.median(values):7.1f}ms  최소 {min(values):7.1f}ms  최대 {max(values):7.1f}ms")
+
+    if args.importtime:
+        print_import_times(env, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
-
 import os
-import firebase_admin
-from firebase_admin import credentials, firestore
+import threading
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 # 프로젝트 베이스 디렉토리 찾기
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -10,15 +12,41 @@ key_path = os.path.join(BASE_DIR, "backend", "firebase-key.json")
 # Firebase 키 파일 경로 정규화
 normalized_key_path = os.path.normpath(key_path)
 
-# Firebase 초기화
-try:
-    cred = credentials.Certificate(normalized_key_path)
-    firebase_admin.initialize_app(cred)
-    print(f"✅ Firebase 초기화 완료: {normalized_key_path}")
-except Exception as e:
-    print(f"❌ Firebase 초기화 실패: {e}")
-    print(f"   키 파일 경로: {normalized_key_path}")
-    print(f"   키 파일 존재 여부: {os.path.exists(normalized_key_path)}")
-
-# Firestore 클라이언트
-db = firestore.client()
\ No newline at end of file
+_db = None
+_db_lock = threading.Lock()
+
+
+def get_db():
+    """
+    Firestore 클라이언트 (첫 사용 시 Firebase 초기화)
+
+    firebase_admin / google-cloud 임포트와 인증 준비가 무거워서
+    앱 임포트 시점이 아니라 실제로 Firestore를 쓸 때 초기화한다.
+    """
+    global _db
+    if _db is None:
+        with _db_lock:
+            if _db is None:
+                import firebase_admin
+                from firebase_admin import credentials, firestore
+
+                # Firebase 초기화
+                if not firebase_admin._apps:
+                    try:
+                        cred = credentials.Certificate(normalized_key_path)
+                        firebase_admin.initialize_app(cred)
+                        logger.info("✅ Firebase 초기화 완료: %s", normalized_key_path)
+                    except Exception as e:
+                        logger.error("❌ Firebase 초기화 실패: %s (키 파일: %s, 존재 여부: %s)",
+                                     e, normalized_key_path, os.path.exists(normalized_key_path))
+
+                # Firestore 클라이언트
+                _db = firestore.client()
+    return _db
+
+
+def __getattr__(name):
+    # 기존 `from config.firebase_config import db` 호환 (그 시점에 초기화됨)
+    if name == "db":
+        return get_db()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
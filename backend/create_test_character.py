@@ -1,7 +1,7 @@
 # create_test_character.py 파일로 저장
-import json
 import os
 from datetime import datetime
+from app.services.character_store import CharacterStore
 
 def create_test_character():
     user_id = "6YsP19kDbnf7ZuszKfb5LYFKaFL2"
@@ -19,29 +19,12 @@ def create_test_character():
         "created_at": datetime.now().isoformat()
     }
     
-    # static 폴더 확인/생성
-    if not os.path.exists('static'):
-        os.makedirs('static')
-        print("📁 static 폴더 생성됨")
-    
-    # 로컬 백업 파일 생성
-    characters_file = os.path.join('static', 'characters_backup.json')
-    
-    try:
-        with open(characters_file, 'r', encoding='utf-8') as f:
-            all_characters = json.load(f)
-        print("📖 기존 백업 파일 로드됨")
-    except (FileNotFoundError, json.JSONDecodeError):
-        all_characters = {}
-        print("📄 새 백업 파일 생성")
-    
-    all_characters[user_id] = test_character
-    
-    with open(characters_file, 'w', encoding='utf-8') as f:
-        json.dump(all_characters, f, ensure_ascii=False, indent=2)
+    # 로컬 캐릭터 저장소에 저장 (기존 characters_backup.json은 처음 열 때 자동 이전)
+    store = CharacterStore()
+    store.upsert(user_id, test_character)
     
     print(f"✅ 테스트 캐릭터 생성 완료!")
-    print(f"📍 파일: {os.path.abspath(characters_file)}")
+    print(f"📍 파일: {os.path.abspath(store.path)}")
     print(f"👤 사용자 ID: {user_id}")
     print(f"🎭 캐릭터 감정 수: {len(test_character['images'])}")
 
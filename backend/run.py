@@ -2,15 +2,18 @@ import os
 import sys
 from dotenv import load_dotenv
 
-print("🔍 PYTHONPATH:", sys.path)
-
 # 환경변수 로드
 load_dotenv()
 
 # Flask 앱 생성
-from app import create_app
+# (spawn 으로 만든 자식 프로세스 - 파생 이미지 풀 - 는 이 파일을 __mp_main__ 으로 다시 임포트하므로
+#  앱 / 로깅 / 작업 큐 워커를 만들지 않음)
+if __name__ != "__mp_main__":
+    print("🔍 PYTHONPATH:", sys.path)
+
+    from app import create_app
 
-app = create_app()
+    app = create_app()
 
 # 추가 설정 (선택사항)
 if __name__ == "__main__":
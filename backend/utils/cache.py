@@ -0,0 +1,227 @@
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class PersistentLRUCache:
+    """
+    메모리 LRU + SQLite 디스크 2단 캐시
+
+    - 메모리 계층: 최근 사용한 항목을 memory_size 개까지 유지
+    - 디스크 계층: 재시작 후에도 남아있는 저장소, disk_size 개 초과 시 오래 안 쓴 항목부터 삭제
+    - ttl(초)을 주면 만료된 항목은 miss로 처리
+    - 값은 JSON 직렬화 가능한 객체만 저장
+    """
+
+    def __init__(self, path, memory_size=256, disk_size=5000, ttl=None, name="cache"):
+        self.path = path
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self.ttl = ttl
+        self.name = name
+
+        self._memory = OrderedDict()  # key -> (value, created_at)
+        self._lock = threading.Lock()
+        self._hits = {"memory": 0, "disk": 0}
+        self._misses = 0
+        self._evictions = 0
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache_entries (accessed_at)"
+        )
+        self._conn.commit()
+
+    def _is_expired(self, created_at, now):
+        return self.ttl is not None and now - created_at > self.ttl
+
+    def _remember(self, key, value, created_at):
+        """메모리 계층에 넣고 상한 초과분은 LRU로 제거"""
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """캐시 조회 (없거나 만료되면 None)"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if not self._is_expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self._hits["memory"] += 1
+                    return json.loads(json.dumps(value))  # 호출자가 수정해도 캐시는 안전하게
+                del self._memory[key]
+
+            row = self._conn.execute(
+                "SELECT value, created_at FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or self._is_expired(row[1], now):
+                if row is not None:
+                    self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+                    self._conn.commit()
+                self._misses += 1
+                return None
+
+            value = json.loads(row[0])
+            self._conn.execute(
+                "UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self._remember(key, value, row[1])
+            self._hits["disk"] += 1
+            return json.loads(row[0])
+
+    def set(self, key, value):
+        """캐시 저장 (메모리 + 디스크)"""
+        now = time.time()
+        serialized = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._remember(key, json.loads(serialized), now)
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO cache_entries (key, value, created_at, accessed_at)
+                VALUES (?, ?, ?, ?)
+                """,
+                (key, serialized, now, now)
+            )
+            self._evict_disk()
+            self._conn.commit()
+
+    def delete(self, key):
+        """항목 삭제"""
+        with self._lock:
+            self._memory.pop(key, None)
+            self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def _evict_disk(self):
+        """디스크 계층 상한 초과분을 오래 안 쓴 순서로 삭제 (lock 안에서 호출)"""
+        count = self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+        overflow = count - self.disk_size
+        if overflow > 0:
+            self._conn.execute(
+                """
+                DELETE FROM cache_entries WHERE key IN (
+                    SELECT key FROM cache_entries ORDER BY accessed_at ASC LIMIT ?
+                )
+                """,
+                (overflow,)
+            )
+            self._evictions += overflow
+
+    def stats(self):
+        """적중/미스 카운터"""
+        with self._lock:
+            disk_entries = self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+            hits = self._hits["memory"] + self._hits["disk"]
+            total = hits + self._misses
+            return {
+                "name": self.name,
+                "hits": hits,
+                "memory_hits": self._hits["memory"],
+                "disk_hits": self._hits["disk"],
+                "misses": self._misses,
+                "hit_ratio": round(hits / total, 3) if total else 0.0,
+                "evictions": self._evictions,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries,
+                "memory_size": self.memory_size,
+                "disk_size": self.disk_size,
+                "ttl": self.ttl
+            }
+
+
+class TTLCache:
+    """
+    메모리 전용 TTL + LRU 캐시 (프로세스 내 read-through 캐시용)
+
+    - ttl(초)이 지난 항목은 miss로 처리
+    - max_size 초과 시 가장 오래 안 쓴 항목부터 제거
+    - 조회 시작 전에 generation() 을 받아 set 에 넘기면, 그 사이 invalidate 가 있었을 때
+      옛 값을 다시 넣지 않음 (읽기-쓰기 경합 방지)
+    """
+
+    def __init__(self, max_size=1024, ttl=60, name="ttl_cache"):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.name = name
+
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+        self._generation = 0
+
+    def generation(self):
+        return self._generation
+
+    def get(self, key):
+        """캐시 조회 (없거나 만료되면 None)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return copy.deepcopy(entry[0])
+
+    def set(self, key, value, generation=None):
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (copy.deepcopy(value), time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, key):
+        """쓰기 후 무효화"""
+        with self._lock:
+            self._generation += 1
+            if self._entries.pop(key, None) is not None:
+                self._invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "name": self.name,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / total, 3) if total else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "entries": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl
+            }
@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+
+from utils.deadline import DeadlineExceeded
+from utils.logger import get_logger
+from utils.metrics import Counter, Gauge
+from utils.rate_limiter import AdmissionRejected
+
+logger = get_logger(__name__)
+
+# 서킷 브레이커 설정 (모델 / 엔드포인트별로 하나씩)
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', 5))  # 연속 실패 수 → open
+CIRCUIT_RESET_TIMEOUT = float(os.environ.get('CIRCUIT_RESET_TIMEOUT', 30))  # open 유지 시간 (초) → half-open
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+CIRCUIT_STATE = Gauge("circuit_state", "서킷 상태 (0=closed, 1=half_open, 2=open)", ("breaker",))
+CIRCUIT_REJECTIONS = Counter("circuit_rejections_total", "서킷이 열려서 바로 거절한 호출 수", ("breaker",))
+
+# 제공자 장애로 보는 예외 (잘못된 요청 400 등은 서킷에 반영하지 않음)
+_PROVIDER_FAILURE_NAMES = {
+    "APITimeoutError", "APIConnectionError", "RateLimitError", "InternalServerError",
+    "Timeout", "ConnectTimeout", "ReadTimeout", "ConnectionError"
+}
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+class CircuitOpenError(Exception):
+    """서킷이 열려 있어 외부 호출을 하지 않음 (바로 대체 결과로)"""
+
+
+def is_provider_failure(error):
+    """타임아웃 / 연결 실패 / 429 / 5xx 만 제공자 장애로 취급"""
+    if type(error).__name__ in _PROVIDER_FAILURE_NAMES:
+        return True
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
+
+def fallback_reason(error):
+    """대체 결과에 붙이는 사유 (circuit_open / rate_limited / deadline / error)"""
+    if isinstance(error, CircuitOpenError):
+        return "circuit_open"
+    if isinstance(error, AdmissionRejected):
+        return "rate_limited"
+    if isinstance(error, DeadlineExceeded) or type(error).__name__ in ("APITimeoutError", "Timeout", "ReadTimeout"):
+        return "deadline"
+    return "error"
+
+
+class CircuitBreaker:
+    """
+    연속 실패가 threshold 번이면 open → reset_timeout 동안 호출 없이 CircuitOpenError
+    → 이후 half-open 에서 시험 호출 1건만 통과, 성공하면 closed / 실패하면 다시 open
+    """
+
+    def __init__(self, name, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_timeout=CIRCUIT_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        CIRCUIT_STATE.set(0, breaker=name)
+
+    def _set_state(self, state):
+        if state != self.state:
+            logger.warning("🔌 서킷 %s: %s → %s", self.name, self.state, state)
+        self.state = state
+        CIRCUIT_STATE.set(_STATE_VALUES[state], breaker=self.name)
+
+    def before_call(self):
+        """호출 전 확인 - 열려 있으면 CircuitOpenError (남은 open 시간 포함)"""
+        with self._lock:
+            if self.state == OPEN:
+                waited = time.monotonic() - self.opened_at
+                if waited < self.reset_timeout:
+                    self.rejected += 1
+                    CIRCUIT_REJECTIONS.inc(breaker=self.name)
+                    raise CircuitOpenError(f"{self.name} 서킷 open ({self.reset_timeout - waited:.0f}초 후 재시도)")
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._probe_in_flight:
+                    self.rejected += 1
+                    CIRCUIT_REJECTIONS.inc(breaker=self.name)
+                    raise CircuitOpenError(f"{self.name} 서킷 half-open (시험 호출 진행 중)")
+                self._probe_in_flight = True
+
+    def release(self):
+        """before_call 은 통과했지만 호출하지 않고 포기한 경우 (허용량 / 예산 거절) - 시험 호출 슬롯만 반납"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probe_in_flight = False
+            self._set_state(CLOSED)
+
+    def record_failure(self, error):
+        """제공자 장애만 실패로 집계 (그 외 예외는 시험 호출 슬롯만 반납)"""
+        with self._lock:
+            self._probe_in_flight = False
+            if not is_provider_failure(error):
+                if self.state == HALF_OPEN:
+                    self._set_state(CLOSED)
+                return
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    def call(self, fn, *args, **kwargs):
+        self.before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "rejected": self.rejected,
+                "open_for_seconds": round(max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)), 1)
+                if self.state == OPEN else 0.0
+            }
+
+
+def get_breaker(name):
+    """이름별 공유 서킷 브레이커 (예: chat:gpt-4-turbo, image:dall-e-3, download:<host>)"""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(name)
+            if breaker is None:
+                breaker = _breakers[name] = CircuitBreaker(name)
+    return breaker
+
+
+def get_breaker_stats():
+    return {name: breaker.stats() for name, breaker in list(_breakers.items())}
@@ -0,0 +1,68 @@
+import contextvars
+import json
+import os
+import time
+
+# 요청 전체 시간 예산 (초) - 모든 외부 호출(LLM / 이미지 생성 / 다운로드)은 남은 시간만큼만 기다림
+REQUEST_DEADLINE_SECONDS = float(os.environ.get('REQUEST_DEADLINE_SECONDS', 90))
+# 라우트별 예산 덮어쓰기 (JSON, 예: {"/api/diary/generate_weekly_webtoon": 180})
+REQUEST_DEADLINE_ROUTES = json.loads(os.environ.get(
+    'REQUEST_DEADLINE_ROUTES', '{"/api/diary/generate_weekly_webtoon": 180}'
+))
+# 작업 큐 작업 1건의 예산 (응답을 기다리는 클라이언트가 없으므로 더 길게)
+JOB_DEADLINE_SECONDS = float(os.environ.get('JOB_DEADLINE_SECONDS', 300))
+# 남은 시간이 이보다 적으면 외부 호출을 시작하지 않음
+DEADLINE_MIN_CALL_SECONDS = float(os.environ.get('DEADLINE_MIN_CALL_SECONDS', 0.5))
+
+# 클라이언트가 예산을 줄이고 싶을 때 보내는 헤더 (초, 서버 예산보다 길게는 못 늘림)
+DEADLINE_HEADER = "X-Request-Timeout"
+
+_current_deadline = contextvars.ContextVar("current_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """요청 시간 예산이 남지 않아 외부 호출을 시작하지 않음"""
+
+
+def request_budget(route, headers=None):
+    """라우트 기본 예산과 클라이언트 헤더 중 짧은 쪽 (초)"""
+    budget = float(REQUEST_DEADLINE_ROUTES.get(route, REQUEST_DEADLINE_SECONDS))
+    requested = headers.get(DEADLINE_HEADER) if headers is not None else None
+    if requested:
+        try:
+            budget = min(budget, max(0.0, float(requested)))
+        except ValueError:
+            pass
+    return budget
+
+
+def bind_deadline(seconds):
+    """지금부터 seconds 초 뒤를 현재 컨텍스트의 마감 시각으로 설정 (reset 용 토큰 반환)"""
+    return _current_deadline.set(time.monotonic() + seconds)
+
+
+def reset_deadline(token):
+    _current_deadline.reset(token)
+
+
+def remaining():
+    """남은 시간 (초), 마감이 없으면 None"""
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def call_timeout(cap):
+    """
+    외부 호출 1건에 줄 타임아웃 = min(cap, 남은 시간)
+
+    남은 시간이 DEADLINE_MIN_CALL_SECONDS 보다 적으면 호출하지 않도록 DeadlineExceeded.
+    마감이 없는 컨텍스트(스크립트 등)에서는 cap 그대로.
+    """
+    left = remaining()
+    if left is None:
+        return cap
+    if left < DEADLINE_MIN_CALL_SECONDS:
+        raise DeadlineExceeded(f"요청 시간 예산 소진 (남은 시간 {max(left, 0.0):.2f}초)")
+    return min(cap, left)
@@ -0,0 +1,162 @@
+import base64
+import io
+import os
+import tempfile
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from utils.deadline import DeadlineExceeded, call_timeout
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 파생 이미지 설정 (원본 PNG 옆에 폭별 축소본을 저장)
+IMAGE_VARIANTS_ENABLED = os.environ.get('IMAGE_VARIANTS_ENABLED', 'true').lower() == 'true'
+IMAGE_VARIANT_WIDTHS = [
+    int(width) for width in os.environ.get('IMAGE_VARIANT_WIDTHS', '256,512,1024').split(',') if width.strip()
+]
+IMAGE_VARIANT_FORMATS = [
+    fmt.strip().lower() for fmt in os.environ.get('IMAGE_VARIANT_FORMATS', 'webp').split(',') if fmt.strip()
+]
+IMAGE_VARIANT_QUALITY = int(os.environ.get('IMAGE_VARIANT_QUALITY', 80))
+IMAGE_VARIANT_WORKERS = int(os.environ.get('IMAGE_VARIANT_WORKERS', 2))
+IMAGE_VARIANT_TIMEOUT = float(os.environ.get('IMAGE_VARIANT_TIMEOUT', 30))
+PLACEHOLDER_WIDTH = 16
+
+_pool = None
+_pool_lock = threading.Lock()
+_pillow_available = None
+
+
+def _save_atomic(image, path, fmt, **options):
+    """임시 파일에 인코딩한 뒤 os.replace (반쯤 쓰인 파생 이미지가 서빙되지 않도록)"""
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".variant_", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            image.save(f, format=fmt, **options)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _build_variants(source_path, widths, formats, quality):
+    """
+    원본 이미지 → 폭별 축소본 + 블러 플레이스홀더 (프로세스 풀 워커에서 실행)
+
+    반환값: 원본 크기, 포맷별 {폭: 파일명}, 플레이스홀더 data URI
+    """
+    from PIL import Image, ImageFilter
+
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    folder = os.path.dirname(source_path)
+
+    with Image.open(source_path) as original:
+        original.load()
+        image = original.convert("RGBA" if original.mode in ("RGBA", "LA", "P") else "RGB")
+    width, height = image.size
+
+    # 원본보다 큰 폭은 만들지 않음
+    targets = sorted({w for w in widths if 0 < w < width}) or [width]
+
+    sizes = {}
+    for fmt in formats:
+        files = {}
+        try:
+            for target in targets:
+                resized = image.resize((target, max(1, round(height * target / width))), Image.LANCZOS)
+                filename = f"{stem}_w{target}.{fmt}"
+                _save_atomic(resized, os.path.join(folder, filename), fmt.upper(), quality=quality)
+                files[str(target)] = filename
+        except (KeyError, OSError, ValueError) as e:
+            # 이 Pillow 빌드가 지원하지 않는 포맷(예: avif)은 건너뜀
+            logger.warning("⚠️ 파생 이미지 포맷 건너뜀 (%s): %s", fmt, e)
+            continue
+        sizes[fmt] = files
+
+    # LQIP: 아주 작은 블러 이미지를 data URI 로 (목록 화면에서 바로 그릴 수 있게)
+    tiny = image.resize(
+        (PLACEHOLDER_WIDTH, max(1, round(height * PLACEHOLDER_WIDTH / width))), Image.BILINEAR
+    ).filter(ImageFilter.GaussianBlur(1))
+    buffer = io.BytesIO()
+    tiny.save(buffer, format="WEBP", quality=30)
+    placeholder = "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+    return {"width": width, "height": height, "sizes": sizes, "placeholder": placeholder}
+
+
+def _get_pool():
+    """파생 이미지 생성용 프로세스 풀 (리사이즈/인코딩은 CPU 작업이라 GIL 밖에서 실행)"""
+    global _pool, _pillow_available
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                if _pillow_available is None:
+                    import importlib.util
+                    _pillow_available = importlib.util.find_spec("PIL") is not None
+                    if not _pillow_available:
+                        logger.warning("⚠️ Pillow 미설치 - 파생 이미지 생성 비활성화")
+                if not _pillow_available:
+                    return None
+
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+
+                # 요청 스레드가 돌고 있는 프로세스를 fork 하지 않도록 spawn 사용
+                _pool = ProcessPoolExecutor(
+                    max_workers=IMAGE_VARIANT_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+    return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        broken, _pool = _pool, None
+    if broken is not None:
+        broken.shutdown(wait=False, cancel_futures=True)
+
+
+def create_image_variants(local_url, timeout=IMAGE_VARIANT_TIMEOUT):
+    """
+    로컬 저장된 이미지(/static/...)의 반응형 축소본 생성 후 URL 정보 반환
+
+    실패하거나 비활성화된 경우 None (원본 imageUrl 만으로도 동작하므로 저장 흐름은 막지 않음)
+    기다리는 시간은 min(timeout, 요청의 남은 시간 예산)
+    """
+    if not IMAGE_VARIANTS_ENABLED or not local_url or not local_url.startswith("/static/"):
+        return None
+
+    try:
+        timeout = call_timeout(timeout)
+        pool = _get_pool()
+        if pool is None:
+            return None
+
+        source_path = os.path.join(*local_url.lstrip("/").split("/"))
+        future = pool.submit(
+            _build_variants, source_path, IMAGE_VARIANT_WIDTHS, IMAGE_VARIANT_FORMATS, IMAGE_VARIANT_QUALITY
+        )
+        result = future.result(timeout=timeout)
+    except (FutureTimeoutError, DeadlineExceeded):
+        logger.warning("⚠️ 파생 이미지 생성 시간 초과: %s", local_url)
+        return None
+    except BrokenProcessPool as e:
+        # 워커 프로세스가 죽으면 풀을 버리고 다음 요청에서 새로 만듦
+        _reset_pool()
+        logger.warning("⚠️ 파생 이미지 프로세스 풀 재시작: %s", e)
+        return None
+    except Exception as e:
+        logger.warning("⚠️ 파생 이미지 생성 실패: %s", e)
+        return None
+
+    base_url = local_url.rsplit("/", 1)[0]
+    result["sizes"] = {
+        fmt: {width: f"{base_url}/{filename}" for width, filename in files.items()}
+        for fmt, files in result["sizes"].items()
+    }
+    logger.info("🖼️ 파생 이미지 생성 완료: %s (%s)", local_url, ', '.join(result['sizes']) or '없음')
+    return result
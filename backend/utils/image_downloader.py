@@ -0,0 +1,190 @@
+import hashlib
+import os
+import socket
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+from utils.circuit_breaker import get_breaker
+from utils.deadline import DeadlineExceeded, call_timeout, remaining
+from utils.image_store import get_image_store
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 다운로드 설정
+DOWNLOAD_POOL_SIZE = int(os.environ.get('IMAGE_DOWNLOAD_POOL_SIZE', 16))
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+DOWNLOAD_MAX_BYTES = int(os.environ.get('IMAGE_DOWNLOAD_MAX_BYTES', 20 * 1024 * 1024))
+DOWNLOAD_MIN_BYTES = 1024
+DOWNLOAD_TIMEOUT = float(os.environ.get('IMAGE_DOWNLOAD_TIMEOUT', 60))  # 요청 예산이 더 짧으면 그쪽을 따름
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class ImageDownloadError(Exception):
+    """이미지 다운로드/검증 실패"""
+
+
+def get_download_session():
+    """keep-alive 커넥션 풀을 공유하는 requests 세션"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                # requests 는 첫 다운로드 시점에 임포트 (앱 시작 시간 단축)
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=DOWNLOAD_POOL_SIZE, pool_maxsize=DOWNLOAD_POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def _abort_at_deadline(response):
+    """
+    요청 시간 예산이 끝나는 순간 소켓을 끊는 타이머 (마감이 없으면 None)
+
+    requests 의 timeout 은 읽기 1회 기준이고 iter_content 는 청크가 다 찰 때까지 막히므로,
+    조금씩 느리게 오는 응답이 예산을 넘기지 않도록 다른 스레드에서 끊는다.
+    """
+    left = remaining()
+    if left is None:
+        return None
+
+    def abort():
+        # 복제한 fd 로 shutdown 해도 같은 연결이 끊겨서 막혀 있던 읽기가 바로 깨어남
+        try:
+            with socket.fromfd(response.raw.fileno(), socket.AF_INET, socket.SOCK_STREAM) as sock:
+                sock.shutdown(socket.SHUT_RDWR)
+        except (OSError, ValueError):
+            pass
+
+    watchdog = threading.Timer(max(0.0, left), abort)
+    watchdog.daemon = True
+    watchdog.start()
+    return watchdog
+
+
+def download_image(url, dest_folder, filename, timeout=None):
+    """
+    이미지를 청크 단위로 임시 파일에 받은 뒤 검증하고 dest_folder/filename 으로 원자적 이동
+
+    - Content-Type 이 image/* 인지, 크기가 Content-Length 와 일치하고 허용 범위인지 확인
+    - 실패하면 임시 파일을 지우고 ImageDownloadError 발생 (반쯤 쓰인 파일이 남지 않음)
+    - 이미지 저장소가 켜져 있으면 내용 해시로 한 벌만 저장하고 filename 은 링크로 연결
+      (같은 URL 재다운로드 / 같은 내용 재저장 시 바이트가 늘지 않음)
+    - 타임아웃은 min(timeout, 요청의 남은 시간 예산), 본문을 받는 중 예산이 끝나면 DeadlineExceeded
+    - 호스트별 서킷이 열려 있으면 바로 CircuitOpenError
+    - 반환값: 저장 경로, 바이트 수, 소요 시간, 초당 바이트, sha256, 중복 여부
+    """
+    started = time.perf_counter()
+    final_path = os.path.join(dest_folder, filename)
+    store = get_image_store()
+
+    # 이미 받은 URL 이면 네트워크 요청 없이 기존 blob 에 연결
+    if store is not None:
+        linked = store.link_existing_source(url, final_path)
+        if linked is not None:
+            logger.info("♻️ 이미지 재사용 (같은 URL): %s", filename)
+            return {
+                "path": final_path,
+                "bytes": linked["bytes"],
+                "elapsed": round(time.perf_counter() - started, 3),
+                "bytes_per_sec": 0.0,
+                "content_type": None,
+                "sha256": linked["sha256"],
+                "deduplicated": True
+            }
+
+    timeout = call_timeout(timeout or DOWNLOAD_TIMEOUT)
+    breaker = get_breaker(f"download:{urlsplit(url).hostname}")
+    breaker.before_call()
+    # 성공 / 실패는 본문을 끝까지 받은 뒤에 기록 (스트리밍 중 읽기 타임아웃도 서킷에 반영)
+    watchdog = None
+    try:
+        with get_download_session().get(url, stream=True, timeout=timeout) as response:
+            watchdog = _abort_at_deadline(response)
+            response.raise_for_status()
+
+            content_type = response.headers.get("Content-Type", "")
+            if not content_type.startswith("image/"):
+                raise ImageDownloadError(f"이미지가 아닌 응답: {content_type or 'Content-Type 없음'}")
+
+            # 압축 전송이면 Content-Length 가 디코딩된 크기와 다르므로 비교하지 않음
+            expected_length = response.headers.get("Content-Length")
+            if response.headers.get("Content-Encoding") or not (expected_length and expected_length.isdigit()):
+                expected_length = None
+            else:
+                expected_length = int(expected_length)
+            if expected_length is not None and expected_length > DOWNLOAD_MAX_BYTES:
+                raise ImageDownloadError(f"이미지가 너무 큽니다: {expected_length} bytes")
+
+            # 같은 폴더에 임시 파일을 만들어야 os.replace 가 원자적으로 동작
+            fd, temp_path = tempfile.mkstemp(dir=dest_folder, prefix=".download_", suffix=".part")
+            written = 0
+            digest = hashlib.sha256()
+            deduplicated = False
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        if not chunk:
+                            continue
+                        left = remaining()
+                        if left is not None and left <= 0:
+                            raise DeadlineExceeded(f"이미지 다운로드 중 요청 시간 예산 소진 ({written} bytes 수신)")
+                        written += len(chunk)
+                        if written > DOWNLOAD_MAX_BYTES:
+                            raise ImageDownloadError(f"이미지가 너무 큽니다: {written} bytes 초과")
+                        digest.update(chunk)
+                        f.write(chunk)
+
+                if expected_length is not None and written != expected_length:
+                    raise ImageDownloadError(f"다운로드 크기 불일치: {written}/{expected_length} bytes")
+                if written < DOWNLOAD_MIN_BYTES:
+                    raise ImageDownloadError(f"이미지가 너무 작습니다: {written} bytes")
+
+                os.chmod(temp_path, 0o644)  # mkstemp 기본 권한(600) 대신 일반 정적 파일 권한
+                if store is not None:
+                    ingested = store.ingest(temp_path, final_path, digest.hexdigest(), written, source_url=url)
+                    deduplicated = ingested["deduplicated"]
+                else:
+                    os.replace(temp_path, final_path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+    except Exception as e:
+        left = remaining()
+        if isinstance(e, DeadlineExceeded) or left is None or left > 0:
+            breaker.record_failure(e)
+            raise
+        # 타이머가 소켓을 끊어서 난 읽기 오류 → 예산 소진으로 보고
+        error = DeadlineExceeded(f"이미지 다운로드 중 요청 시간 예산 소진: {e}")
+        breaker.record_failure(error)
+        raise error from e
+    else:
+        breaker.record_success()
+    finally:
+        if watchdog is not None:
+            watchdog.cancel()
+
+    elapsed = time.perf_counter() - started
+    bytes_per_sec = written / elapsed if elapsed > 0 else 0.0
+    logger.info("📥 이미지 다운로드: %.0fKB, %.2fs, %.0fKB/s%s", written / 1024, elapsed, bytes_per_sec / 1024,
+                " (중복 내용 - 기존 파일에 연결)" if deduplicated else "")
+
+    return {
+        "path": final_path,
+        "bytes": written,
+        "elapsed": round(elapsed, 3),
+        "bytes_per_sec": round(bytes_per_sec, 1),
+        "content_type": content_type,
+        "sha256": digest.hexdigest(),
+        "deduplicated": deduplicated
+    }
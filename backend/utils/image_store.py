@@ -0,0 +1,272 @@
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+
+# 내용 해시 기반 이미지 저장소 설정
+IMAGE_DEDUP_ENABLED = os.environ.get('IMAGE_DEDUP_ENABLED', 'true').lower() == 'true'
+# blob 은 static 밖에 둠 (공개 URL 은 static 아래 링크 파일만)
+IMAGE_BLOB_FOLDER = os.environ.get('IMAGE_BLOB_FOLDER', os.path.join('data', 'image_blobs'))
+IMAGE_STORE_DB_PATH = os.environ.get('IMAGE_STORE_DB_PATH', os.path.join('data', 'image_store.sqlite3'))
+
+_store = None
+_store_lock = threading.Lock()
+
+
+class ImageStore:
+    """
+    내용 해시(sha256)로 한 번만 저장하는 이미지 저장소 (SQLite WAL 참조 카운트)
+
+    - 실제 바이트는 blob_folder/<해시 앞 2자리>/<해시><확장자> 에 한 벌만 둠
+    - 기존 URL 파일명(static/webtoon_images/...)은 blob 을 가리키는 하드링크
+      (다른 파일시스템이면 심볼릭 링크, 그것도 안 되면 복사)
+    - images 테이블: 파일명 → 해시 / 원본 URL, blobs 테이블: 해시별 참조 수
+    - 같은 원본 URL 을 다시 받으면 다운로드 없이 링크만 추가
+    - 파일 교체 / 삭제는 COMMIT 이 끝난 뒤에만 (롤백되면 DB 와 디스크가 그대로 일치)
+    """
+
+    def __init__(self, path=IMAGE_STORE_DB_PATH, blob_folder=IMAGE_BLOB_FOLDER):
+        self.path = path
+        self.blob_folder = blob_folder
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                blob_path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                refcount INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS images (
+                file_path TEXT PRIMARY KEY,
+                hash TEXT NOT NULL,
+                source_url TEXT,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_images_source_url ON images (source_url)")
+
+    def _connection(self):
+        """스레드별 커넥션 (sqlite3 커넥션은 스레드 간 공유하지 않음)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _blob_path(self, digest, extension):
+        return os.path.join(self.blob_folder, digest[:2], f"{digest}{extension}")
+
+    @staticmethod
+    def _link(blob_path, file_path):
+        """
+        blob 을 file_path 옆 임시 이름으로 연결 (하드링크 → 심볼릭 링크 → 복사 순으로 시도)
+
+        기존 file_path 는 건드리지 않음 - COMMIT 후 _publish 로 교체
+        반환값: 임시 경로, 연결 방식
+        """
+        staged = os.path.join(os.path.dirname(file_path), f".link_{uuid.uuid4().hex}{os.path.splitext(file_path)[1]}")
+        try:
+            os.link(blob_path, staged)
+            return staged, "hardlink"
+        except OSError:
+            pass
+        try:
+            os.symlink(os.path.abspath(blob_path), staged)
+            return staged, "symlink"
+        except OSError:
+            shutil.copyfile(blob_path, staged)
+            os.chmod(staged, 0o644)
+            return staged, "copy"
+
+    def _publish(self, staged, file_path, removals):
+        """COMMIT 후 호출 - 임시 링크를 file_path 로 원자적 교체, 참조가 끝난 blob 삭제"""
+        os.replace(staged, file_path)
+        if os.path.lexists(staged):
+            # 둘 다 같은 inode 의 하드링크면 rename 이 아무것도 하지 않음 (POSIX)
+            os.remove(staged)
+        if removals:
+            self._remove_orphan_blobs(removals)
+
+    def _remove_orphan_blobs(self, blob_paths):
+        """
+        참조가 0 이 된 blob 파일 삭제 - 쓰기 잠금을 잡고 행이 다시 생기지 않았는지 확인한 뒤에만
+
+        COMMIT 과 삭제 사이에 다른 스레드 / 프로세스가 같은 내용을 다시 넣었으면
+        (같은 경로에 blob 을 쓰고 행 추가) 그 파일을 지우지 않도록
+        """
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for path in blob_paths:
+                if conn.execute("SELECT 1 FROM blobs WHERE blob_path = ?", (path,)).fetchone() is not None:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _discard(*paths):
+        """ROLLBACK 후 호출 - 이번 트랜잭션에서 새로 만든 파일만 삭제"""
+        for path in paths:
+            if path is not None and os.path.lexists(path):
+                os.remove(path)
+
+    def ingest(self, temp_path, file_path, digest, size, source_url=None):
+        """
+        검증이 끝난 임시 파일을 저장소에 넣고 file_path 로 연결
+
+        같은 해시가 이미 있으면 임시 파일은 버리고 기존 blob 에 링크만 추가
+        반환값: 해시, 중복 여부, 연결 방식
+        """
+        extension = os.path.splitext(file_path)[1]
+        staged = new_blob = None
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT blob_path FROM blobs WHERE hash = ?", (digest,)).fetchone()
+            deduplicated = row is not None and os.path.exists(row[0])
+
+            if deduplicated:
+                blob_path = row[0]
+            else:
+                blob_path = new_blob = self._blob_path(digest, extension)
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                os.replace(temp_path, blob_path)
+
+            staged, link_type = self._link(blob_path, file_path)
+            removals = self._add_reference(conn, file_path, digest, blob_path, size, source_url)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            self._discard(staged, new_blob)
+            raise
+
+        self._publish(staged, file_path, removals)
+        if deduplicated:
+            os.remove(temp_path)
+        return {"sha256": digest, "deduplicated": deduplicated, "link": link_type}
+
+    def link_existing_source(self, source_url, file_path):
+        """
+        같은 원본 URL 을 이미 저장했다면 다운로드 없이 file_path 로 연결
+
+        반환값: ingest 와 같은 dict, 저장한 적이 없으면 None
+        """
+        staged = None
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                """
+                SELECT blobs.hash, blobs.blob_path, blobs.size FROM images
+                JOIN blobs ON blobs.hash = images.hash
+                WHERE images.source_url = ? LIMIT 1
+                """,
+                (source_url,)
+            ).fetchone()
+            if row is None or not os.path.exists(row[1]):
+                conn.execute("COMMIT")
+                return None
+
+            digest, blob_path, size = row
+            staged, link_type = self._link(blob_path, file_path)
+            removals = self._add_reference(conn, file_path, digest, blob_path, size, source_url)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            self._discard(staged)
+            raise
+
+        self._publish(staged, file_path, removals)
+        return {"sha256": digest, "deduplicated": True, "link": link_type, "bytes": size}
+
+    def _add_reference(self, conn, file_path, digest, blob_path, size, source_url):
+        """
+        파일명 → 해시 기록 + 참조 수 갱신 (트랜잭션 안에서 호출)
+
+        반환값: COMMIT 후 지울 blob 경로 목록 (같은 파일명을 다른 내용으로 덮어써서 참조가 0 이 된 blob)
+        """
+        now = time.time()
+        removals = []
+        previous = conn.execute("SELECT hash FROM images WHERE file_path = ?", (file_path,)).fetchone()
+
+        conn.execute(
+            "INSERT OR REPLACE INTO images (file_path, hash, source_url, created_at) VALUES (?, ?, ?, ?)",
+            (file_path, digest, source_url, now)
+        )
+        if previous is not None and previous[0] == digest:
+            # 같은 파일명에 같은 내용 - 참조 수는 그대로
+            return removals
+        if previous is not None:
+            # 같은 파일명을 덮어쓰는 경우 이전 blob 참조 해제
+            removable = self._drop_reference(conn, previous[0])
+            if removable is not None:
+                removals.append(removable)
+
+        conn.execute(
+            """
+            INSERT INTO blobs (hash, blob_path, size, refcount, created_at) VALUES (?, ?, ?, 1, ?)
+            ON CONFLICT(hash) DO UPDATE SET refcount = refcount + 1, blob_path = excluded.blob_path
+            """,
+            (digest, blob_path, size, now)
+        )
+        return removals
+
+    @staticmethod
+    def _drop_reference(conn, digest):
+        """참조 수 감소, 0 이 되면 행 삭제 후 blob 경로 반환 (파일 삭제는 호출부가 COMMIT 후에)"""
+        conn.execute("UPDATE blobs SET refcount = refcount - 1 WHERE hash = ?", (digest,))
+        row = conn.execute("SELECT refcount, blob_path FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        if row is not None and row[0] <= 0:
+            conn.execute("DELETE FROM blobs WHERE hash = ?", (digest,))
+            return row[1]
+        return None
+
+    def stats(self):
+        """고유 이미지 수 / 참조 수 / 중복 제거로 아낀 바이트"""
+        conn = self._connection()
+        blobs, unique_bytes, references, logical_bytes = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(refcount), 0), "
+            "COALESCE(SUM(size * refcount), 0) FROM blobs"
+        ).fetchone()
+        return {
+            "unique_images": blobs,
+            "references": references,
+            "unique_bytes": unique_bytes,
+            "logical_bytes": logical_bytes,
+            "bytes_saved": logical_bytes - unique_bytes
+        }
+
+
+def get_image_store():
+    """프로세스 공유 이미지 저장소 (IMAGE_DEDUP_ENABLED=false 면 None)"""
+    global _store
+    if not IMAGE_DEDUP_ENABLED:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ImageStore()
+    return _store
@@ -0,0 +1,225 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+
+from utils.metrics import Counter
+from utils.request_context import current_route, current_user
+from utils.tracing import current_trace_id
+
+# 로그 설정
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json').lower()  # json / text
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))  # 가득 차면 버림 (요청 스레드는 기다리지 않음)
+LOG_PAYLOAD_MAX_CHARS = int(os.environ.get('LOG_PAYLOAD_MAX_CHARS', 120))  # 문자열 필드 최대 길이
+LOG_PAYLOAD_MAX_ITEMS = int(os.environ.get('LOG_PAYLOAD_MAX_ITEMS', 8))  # dict / list 필드 최대 항목 수
+LOG_BATCH_SIZE = 256  # 리스너가 한 번에 모아서 쓰는 최대 기록 수
+
+LOG_RECORDS_DROPPED = Counter("log_records_dropped_total", "로그 큐가 가득 차서 버린 기록 수")
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def get_logger(name):
+    """모듈별 로거 (configure_logging 전에 만들어도 됨)"""
+    return logging.getLogger(name)
+
+
+def summarize(value, max_chars=None, max_items=None, _depth=0):
+    """
+    로그에 남길 값 요약 (긴 문자열은 자르고 길이 표시, 큰 dict / list 는 앞부분 + 개수만)
+
+    캐릭터 정보 / 프롬프트 / 요청 본문 전체를 그대로 찍지 않기 위해 사용
+    """
+    max_chars = max_chars or LOG_PAYLOAD_MAX_CHARS
+    max_items = max_items or LOG_PAYLOAD_MAX_ITEMS
+
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        if len(value) <= max_chars:
+            return value
+        return f"{value[:max_chars]}…(+{len(value) - max_chars}자)"
+    if _depth >= 2:
+        size = len(value) if hasattr(value, '__len__') else None
+        return f"<{type(value).__name__}{f' len={size}' if size is not None else ''}>"
+    if isinstance(value, dict):
+        items = list(value.items())
+        result = {str(k): summarize(v, max_chars, max_items, _depth + 1) for k, v in items[:max_items]}
+        if len(items) > max_items:
+            result["…"] = f"+{len(items) - max_items}개"
+        return result
+    if isinstance(value, (list, tuple, set)):
+        items = list(value)
+        result = [summarize(v, max_chars, max_items, _depth + 1) for v in items[:max_items]]
+        if len(items) > max_items:
+            result.append(f"…+{len(items) - max_items}개")
+        return result
+    return summarize(str(value), max_chars, max_items, _depth)
+
+
+class _RequestQueueHandler(logging.handlers.QueueHandler):
+    """
+    요청 스레드에서는 메시지 확정 + 컨텍스트 캡처 + 페이로드 요약만 하고 큐에 넣음
+
+    포맷팅 / 직렬화 / stdout 쓰기는 _BatchListener 스레드에서 처리.
+    큐가 LOG_QUEUE_SIZE 를 넘으면 기다리지 않고 버린 뒤 개수만 센다 (/metrics 의 log_records_dropped_total).
+    """
+
+    def __init__(self, log_queue, max_size):
+        super().__init__(log_queue)
+        self.max_size = max_size
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        data = getattr(record, 'data', None)
+        if data is not None:
+            record.data = summarize(data)
+        record.route = current_route.get()
+        record.user = current_user.get()
+        record.trace_id = current_trace_id()
+        return record
+
+    def enqueue(self, record):
+        # SimpleQueue 는 크기 제한이 없어서 qsize 로 대략적인 상한만 적용 (락 없이 빠름)
+        if self.queue.qsize() >= self.max_size:
+            LOG_RECORDS_DROPPED.inc()
+            return
+        self.queue.put(record)
+
+
+class _BatchListener:
+    """큐에 쌓인 기록을 모아서 포맷 후 한 번에 쓰고 flush (기록마다 write/flush 하지 않음)"""
+
+    _sentinel = None
+
+    def __init__(self, log_queue, stream, formatter):
+        self.queue = log_queue
+        self.stream = stream
+        self.formatter = formatter
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < LOG_BATCH_SIZE and not self.queue.empty():
+                batch.append(self.queue.get())
+
+            stop = self._sentinel in batch
+            lines = []
+            for record in batch:
+                if record is self._sentinel:
+                    continue
+                try:
+                    lines.append(self.formatter.format(record))
+                except Exception:
+                    lines.append(f"로그 포맷 실패: {record.msg!r}")
+            if lines:
+                try:
+                    self.stream.write("\n".join(lines) + "\n")
+                    self.stream.flush()
+                except Exception:
+                    pass
+            if stop:
+                return
+
+    def stop(self, timeout=2.0):
+        """종료 시 큐에 남은 로그를 마저 쓰고 멈춤 (크기 제한 없이 종료 신호 추가)"""
+        if self._thread.is_alive():
+            self.queue.put(self._sentinel)
+            self._thread.join(timeout)
+
+
+class JsonFormatter(logging.Formatter):
+    """한 줄 JSON (ts, level, logger, msg, route, user, trace_id, data, exc)"""
+
+    # json.dumps 에 옵션을 넘기면 호출마다 인코더를 새로 만들므로 하나를 재사용
+    _encoder = json.JSONEncoder(ensure_ascii=False, default=str)
+
+    def __init__(self):
+        super().__init__()
+        self._second = None
+        self._second_text = ""
+
+    def _timestamp(self, created):
+        # 초 단위 문자열은 같은 초 안에서 재사용 (리스너 스레드 1개에서만 호출)
+        second = int(created)
+        if second != self._second:
+            self._second = second
+            self._second_text = datetime.fromtimestamp(second, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+        return f"{self._second_text}.{int((created - second) * 1000):03d}Z"
+
+    def format(self, record):
+        entry = {
+            "ts": self._timestamp(record.created),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        for key in ("route", "user", "trace_id"):
+            value = getattr(record, key, None)
+            if value not in (None, "unknown", "anonymous"):
+                entry[key] = value
+        data = getattr(record, 'data', None)
+        if data is not None:
+            entry["data"] = data
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return self._encoder.encode(entry)
+
+
+class TextFormatter(logging.Formatter):
+    """개발용 사람이 읽는 형식"""
+
+    def format(self, record):
+        line = f"{self.formatTime(record, '%H:%M:%S')} {record.levelname:<7} {record.getMessage()}"
+        data = getattr(record, 'data', None)
+        if data is not None:
+            line += f" {json.dumps(data, ensure_ascii=False, default=str)}"
+        if record.exc_text:
+            line += f"\n{record.exc_text}"
+        return line
+
+
+def configure_logging():
+    """
+    루트 로거를 큐 핸들러 1개로 구성하고 백그라운드 리스너 시작 (여러 번 불러도 1회만)
+
+    werkzeug 접근 로그 등 다른 라이브러리 로그도 같은 큐를 거친다.
+    """
+    global _listener
+
+    with _listener_lock:
+        if _listener is not None:
+            return
+
+        # 기록마다 스레드 / 프로세스 정보를 모으지 않음 (출력에 쓰지 않는 필드)
+        logging.logThreads = False
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+
+        log_queue = queue.SimpleQueue()
+        formatter = JsonFormatter() if LOG_FORMAT == 'json' else TextFormatter()
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(_RequestQueueHandler(log_queue, LOG_QUEUE_SIZE))
+        root.setLevel(LOG_LEVEL)
+
+        _listener = _BatchListener(log_queue, sys.stdout, formatter)
+        _listener.start()
+        atexit.register(_listener.stop)  # 종료 시 큐에 남은 로그 마저 출력
@@ -0,0 +1,154 @@
+import math
+import os
+import threading
+import time
+
+from utils.deadline import DEADLINE_MIN_CALL_SECONDS, remaining
+from utils.logger import get_logger
+from utils.metrics import Counter, Gauge, Histogram
+
+logger = get_logger(__name__)
+
+# DALL-E 호출 허용량 (프로세스 단위 - 워커 프로세스가 여러 개면 계정 한도를 워커 수로 나눠서 설정)
+IMAGE_RATE_IMAGES_PER_MINUTE = float(os.environ.get('IMAGE_RATE_IMAGES_PER_MINUTE', 50))
+IMAGE_RATE_REQUESTS_PER_MINUTE = float(os.environ.get('IMAGE_RATE_REQUESTS_PER_MINUTE', 50))
+IMAGE_RATE_BURST = float(os.environ.get('IMAGE_RATE_BURST', 5))  # 쉬고 있다가 한 번에 보낼 수 있는 최대 수
+IMAGE_ADMISSION_MAX_WAITERS = int(os.environ.get('IMAGE_ADMISSION_MAX_WAITERS', 32))  # 대기열 상한
+IMAGE_ADMISSION_MAX_WAIT = float(os.environ.get('IMAGE_ADMISSION_MAX_WAIT', 60))  # 마감 없는 호출의 최대 대기 (초)
+
+ADMISSION_TOTAL = Counter("admission_total", "허용량 확인 결과 (admitted / rejected)", ("limiter", "result"))
+ADMISSION_WAIT = Histogram("admission_wait_seconds", "허용될 때까지 기다린 시간 (초)", ("limiter",))
+ADMISSION_WAITERS = Gauge("admission_waiters", "허용을 기다리는 호출 수", ("limiter",))
+
+_image_admission = None
+_image_admission_lock = threading.Lock()
+
+
+class AdmissionRejected(Exception):
+    """허용량 초과로 호출하지 않음 (retry_after 초 뒤 재시도)"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    분당 rate 개씩 채워지고 최대 capacity 개까지 쌓이는 토큰 버킷
+
+    토큰이 음수까지 내려가도록 미리 예약해서, 먼저 온 호출이 먼저 나가는 순서가 유지된다.
+    (호출자가 잠금을 잡고 사용)
+    """
+
+    def __init__(self, per_minute, capacity):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, min(capacity, per_minute))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, cost, now):
+        """cost 개를 예약하면 기다려야 하는 시간 (초)"""
+        self._refill(now)
+        return max(0.0, (cost - self.tokens) / self.rate)
+
+    def reserve(self, cost):
+        self.tokens -= cost
+
+
+class AdmissionController:
+    """
+    여러 토큰 버킷을 동시에 만족해야 호출을 허용 (예: 분당 이미지 수 + 분당 요청 수)
+
+    - 기다려야 하면 대기열(max_waiters)에 들어가 순서대로 잠든 뒤 호출
+    - 대기 시간이 요청의 남은 시간 예산(없으면 max_wait)을 넘거나 대기열이 가득 차면
+      토큰을 쓰지 않고 바로 AdmissionRejected (retry_after = 예상 대기 시간)
+    """
+
+    def __init__(self, name, buckets, max_waiters, max_wait):
+        self.name = name
+        self.buckets = buckets
+        self.max_waiters = max_waiters
+        self.max_wait = max_wait
+        self.waiters = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def _reject(self, reason, wait):
+        self.rejected += 1
+        ADMISSION_TOTAL.inc(limiter=self.name, result="rejected")
+        retry_after = max(1, math.ceil(wait))
+        logger.warning("🚦 %s 호출 거절 (%s, %d초 후 재시도)", self.name, reason, retry_after)
+        raise AdmissionRejected(f"{self.name} 호출 한도 초과 ({reason}) - {retry_after}초 후 다시 시도해주세요", retry_after)
+
+    def acquire(self, **costs):
+        """버킷 이름별 비용만큼 예약하고, 필요한 만큼 기다린 뒤 반환 (기다린 시간 반환)"""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(bucket.wait_for(costs.get(name, 0), now) for name, bucket in self.buckets.items())
+
+            if wait > 0:
+                left = remaining()
+                budget = self.max_wait if left is None else min(self.max_wait, left - DEADLINE_MIN_CALL_SECONDS)
+                if wait > budget:
+                    self._reject("요청 시간 예산 안에 차례가 오지 않음", wait)
+                if self.waiters >= self.max_waiters:
+                    self._reject("대기열 가득 참", wait)
+                self.waiters += 1
+                ADMISSION_WAITERS.set(self.waiters, limiter=self.name)
+
+            for name, bucket in self.buckets.items():
+                bucket.reserve(costs.get(name, 0))
+            self.admitted += 1
+            ADMISSION_TOTAL.inc(limiter=self.name, result="admitted")
+
+        ADMISSION_WAIT.observe(wait, limiter=self.name)
+        if wait > 0:
+            try:
+                logger.debug("🚦 %s 차례 대기 %.2f초", self.name, wait)
+                time.sleep(wait)
+            finally:
+                with self._lock:
+                    self.waiters -= 1
+                    ADMISSION_WAITERS.set(self.waiters, limiter=self.name)
+        return wait
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "waiters": self.waiters,
+                "max_waiters": self.max_waiters,
+                "buckets": {
+                    name: {
+                        "per_minute": round(bucket.rate * 60, 2),
+                        "capacity": bucket.capacity,
+                        "next_wait_seconds": round(bucket.wait_for(1, now), 2)
+                    }
+                    for name, bucket in self.buckets.items()
+                }
+            }
+
+
+def get_image_admission() -> AdmissionController:
+    """모든 DALL-E 호출(캐릭터 / 감정별 캐릭터 / 웹툰 패널 / /generate_image)이 공유하는 허용량"""
+    global _image_admission
+    if _image_admission is None:
+        with _image_admission_lock:
+            if _image_admission is None:
+                _image_admission = AdmissionController(
+                    "image",
+                    {
+                        "images": TokenBucket(IMAGE_RATE_IMAGES_PER_MINUTE, IMAGE_RATE_BURST),
+                        "requests": TokenBucket(IMAGE_RATE_REQUESTS_PER_MINUTE, IMAGE_RATE_BURST)
+                    },
+                    max_waiters=IMAGE_ADMISSION_MAX_WAITERS,
+                    max_wait=IMAGE_ADMISSION_MAX_WAIT
+                )
+    return _image_admission
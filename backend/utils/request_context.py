@@ -0,0 +1,44 @@
+import contextvars
+import functools
+
+# 요청 단위 정보 (라우트 / 사용자) - LLM 사용량 집계 등에서 호출 위치를 알기 위해 사용
+current_route = contextvars.ContextVar("current_route", default="unknown")
+current_user = contextvars.ContextVar("current_user", default="anonymous")
+
+
+def extract_user_id(request):
+    """쿼리스트링 / JSON 본문에서 사용자 ID 추출 (userId, user_id 둘 다 허용)"""
+    user_id = request.args.get("userId") or request.args.get("user_id")
+    if not user_id and request.is_json:
+        body = request.get_json(silent=True)
+        if isinstance(body, dict):
+            user_id = body.get("userId") or body.get("user_id")
+    return str(user_id) if user_id else "anonymous"
+
+
+def bind_request_context(route, user_id):
+    """현재 컨텍스트에 라우트 / 사용자 설정 (reset 용 토큰 반환)"""
+    return current_route.set(route), current_user.set(user_id)
+
+
+def reset_request_context(tokens):
+    route_token, user_token = tokens
+    current_route.reset(route_token)
+    current_user.reset(user_token)
+
+
+def run_in_context(fn):
+    """
+    현재 컨텍스트를 복사해서 fn 을 실행하는 함수 반환
+
+    ThreadPoolExecutor / Thread 는 contextvars 를 물려주지 않으므로
+    executor.submit(run_in_context(fn), ...) 처럼 감싸서 넘긴다.
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        # 같은 wrapper 가 여러 스레드에서 동시에 실행될 수 있으므로 실행마다 다시 복사
+        return context.copy().run(fn, *args, **kwargs)
+
+    return wrapper
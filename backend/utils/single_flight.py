@@ -0,0 +1,94 @@
+import hashlib
+import json
+import threading
+
+from utils.deadline import DeadlineExceeded, remaining
+from utils.logger import get_logger
+from utils.metrics import Counter, Gauge
+
+logger = get_logger(__name__)
+
+SINGLE_FLIGHT_CALLS = Counter("single_flight_calls_total", "같은 작업 합치기 결과 (leader / follower)", ("flight", "role"))
+SINGLE_FLIGHT_IN_FLIGHT = Gauge("single_flight_in_flight", "실행 중인 고유 작업 수", ("flight",))
+
+
+def _normalize(value):
+    """키 계산용 정규화 (문자열 공백 정리, dict 키 정렬은 json.dumps 에서)"""
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def make_flight_key(user_id, payload):
+    """사용자 + 정규화한 요청 본문의 해시 (공백 / 키 순서만 다른 재전송도 같은 키)"""
+    raw = json.dumps(_normalize(payload), ensure_ascii=False, sort_keys=True, default=str)
+    return f"{user_id}:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """
+    같은 키의 작업이 실행 중이면 새로 실행하지 않고 그 결과를 함께 받음
+
+    - 먼저 온 요청(leader)만 fn 을 실행, 나중에 온 요청(follower)은 끝날 때까지 기다렸다가
+      같은 결과(또는 같은 예외)를 받는다
+    - 결과는 보관하지 않음 (끝나면 키 삭제 → 이후 요청은 새로 실행)
+    - follower 는 자기 요청의 남은 시간 예산만큼만 기다리고 넘으면 DeadlineExceeded
+    - 결과 객체를 여러 요청이 공유하므로 호출부에서 수정하지 않아야 함
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """(결과, 다른 요청의 결과를 공유했는지) 반환"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                SINGLE_FLIGHT_IN_FLIGHT.set(len(self._calls), flight=self.name)
+            else:
+                call.followers += 1
+
+        SINGLE_FLIGHT_CALLS.inc(flight=self.name, role="leader" if leader else "follower")
+
+        if leader:
+            try:
+                call.result = fn()
+                return call.result, False
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                    SINGLE_FLIGHT_IN_FLIGHT.set(len(self._calls), flight=self.name)
+                call.done.set()
+                if call.followers:
+                    logger.info("🔗 %s 중복 요청 %d건이 결과 공유", self.name, call.followers)
+
+        logger.debug("🔗 %s 실행 중인 같은 요청 대기", self.name)
+        left = remaining()
+        if not call.done.wait(None if left is None else max(0.0, left)):
+            raise DeadlineExceeded(f"{self.name}: 같은 요청의 결과를 기다리다 시간 예산 소진")
+        if call.error is not None:
+            raise call.error
+        return call.result, True
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
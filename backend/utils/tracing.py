@@ -0,0 +1,159 @@
+import contextvars
+import functools
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+from utils.metrics import Counter, Gauge, Histogram
+
+# 느린 요청 트레이스 보관 설정
+TRACE_SLOW_MS = float(os.environ.get('TRACE_SLOW_MS', 2000))
+TRACE_BUFFER_SIZE = int(os.environ.get('TRACE_BUFFER_SIZE', 50))
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP 요청 처리 시간", ("route", "method", "status")
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "처리 중인 HTTP 요청 수", ("route",))
+STAGE_DURATION = Histogram("stage_duration_seconds", "파이프라인 단계별 소요 시간", ("stage",))
+STAGE_IN_FLIGHT = Gauge("stage_in_flight", "실행 중인 파이프라인 단계 수", ("stage",))
+STAGE_ERRORS = Counter("stage_errors_total", "예외로 끝난 파이프라인 단계 수", ("stage",))
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+_slow_traces = deque(maxlen=TRACE_BUFFER_SIZE)
+_slow_traces_lock = threading.Lock()
+
+
+class Trace:
+    """요청 1건의 단계별 span 기록 (워커 스레드에서 추가돼도 안전)"""
+
+    def __init__(self, route, method):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.route = route
+        self.method = method
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add_span(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def to_dict(self, duration_ms=None, status=None):
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s["start_ms"])
+        return {
+            "trace_id": self.trace_id,
+            "route": self.route,
+            "method": self.method,
+            "status": status,
+            "duration_ms": duration_ms,
+            "spans": spans
+        }
+
+    def server_timing(self):
+        """Server-Timing 헤더 값 (단계별 합계, 브라우저 개발자 도구에서 확인 가능)"""
+        totals = {}
+        with self._lock:
+            for span in self.spans:
+                totals[span["name"]] = totals.get(span["name"], 0.0) + span["duration_ms"]
+        return ", ".join(
+            f"{name.replace('.', '_')};dur={duration:.1f}" for name, duration in totals.items()
+        )
+
+
+def start_trace(route, method):
+    """요청 시작 - 트레이스 생성 후 (trace, reset 토큰) 반환"""
+    trace = Trace(route, method)
+    HTTP_REQUESTS_IN_FLIGHT.inc(route=route)
+    return trace, _current_trace.set(trace)
+
+
+def finish_trace(trace, token, status):
+    """
+    요청 종료 - 요청 히스토그램 기록, 느린 요청은 최근 목록에 보관
+
+    token 이 None 이면 컨텍스트 복원은 하지 않음 (스트리밍 응답: 컨텍스트는 먼저 복원하고 전송이 끝난 뒤 기록)
+    """
+    duration = time.perf_counter() - trace.started
+    HTTP_REQUESTS_IN_FLIGHT.dec(route=trace.route)
+    HTTP_REQUEST_DURATION.observe(duration, route=trace.route, method=trace.method, status=status)
+    if token is not None:
+        _current_trace.reset(token)
+
+    duration_ms = round(duration * 1000, 1)
+    if duration_ms >= TRACE_SLOW_MS:
+        with _slow_traces_lock:
+            _slow_traces.append(trace.to_dict(duration_ms, status))
+
+
+def reset_trace_context(token):
+    """현재 컨텍스트의 트레이스만 복원 (기록은 finish_trace(trace, None, status) 로 나중에)"""
+    _current_trace.reset(token)
+
+
+def current_trace_id():
+    trace = _current_trace.get()
+    return trace.trace_id if trace is not None else None
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    파이프라인 단계 1개 측정 (단계별 히스토그램 / 실행 중 게이지 + 현재 요청 트레이스에 기록)
+
+    요청 밖(작업 큐 워커 등)에서도 메트릭은 기록되고, 트레이스 기록만 생략된다.
+    """
+    trace = _current_trace.get()
+    parent = _current_span.get()
+    token = _current_span.set(name)
+    STAGE_IN_FLIGHT.inc(stage=name)
+    started = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = type(e).__name__
+        STAGE_ERRORS.inc(stage=name)
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        STAGE_IN_FLIGHT.dec(stage=name)
+        STAGE_DURATION.observe(duration, stage=name)
+        _current_span.reset(token)
+        if trace is not None:
+            record = {
+                "name": name,
+                "parent": parent,
+                "start_ms": round((started - trace.started) * 1000, 1),
+                "duration_ms": round(duration * 1000, 1),
+                "thread": threading.current_thread().name
+            }
+            if attributes:
+                record["attributes"] = attributes
+            if error:
+                record["error"] = error
+            trace.add_span(record)
+
+
+def traced(name):
+    """함수 전체를 span 으로 감싸는 데코레이터"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_slow_traces():
+    """최근 느린 요청 트레이스 (느린 순)"""
+    with _slow_traces_lock:
+        traces = list(_slow_traces)
+    return sorted(traces, key=lambda t: t["duration_ms"], reverse=True)